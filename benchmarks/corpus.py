@@ -0,0 +1,76 @@
+import random
+from typing import List
+
+from langchain_core.documents import Document
+
+# Study-flavoured vocabulary so chunking and retrieval see realistic word lengths
+VOCABULARY = (
+    "energy matrix theorem proof cell membrane protein enzyme reaction equilibrium velocity "
+    "acceleration force momentum integral derivative limit function vector eigenvalue basis "
+    "algorithm complexity graph tree heap queue recursion induction lemma corollary market "
+    "demand supply elasticity inflation policy history empire revolution treaty language "
+    "grammar syntax semantics neuron synapse memory learning model network layer gradient "
+    "loss optimization probability variance distribution sample hypothesis test evidence "
+    "the of and to in is that for with as on by this which from are be an at it"
+).split()
+
+
+def synthetic_text(words: int, seed: int) -> str:
+    """Deterministic pseudo-prose of roughly `words` words, in sentences."""
+    rng = random.Random(seed)
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        n = min(remaining, rng.randint(8, 20))
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(n))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= n
+    return " ".join(sentences)
+
+
+def synthetic_documents(count: int, words: int = 150, source: str = "synthetic://corpus", seed: int = 0) -> List[Document]:
+    return [
+        Document(page_content=synthetic_text(words, seed + i), metadata={"source": source, "page": i + 1})
+        for i in range(count)
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: int, words_per_page: int = 350, seed: int = 0):
+    """
+    Write a plain-text PDF of `pages` pages that pypdf can extract.
+    Written by hand so benchmarks need no PDF library beyond the one being measured.
+    """
+    page_streams = []
+    for p in range(pages):
+        words = synthetic_text(words_per_page, seed + p).split()
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        body = " ".join(f"({_escape(line)}) '" for line in lines)
+        page_streams.append(f"BT /F1 10 Tf 40 800 Td 12 TL {body} ET")
+
+    objects = [
+        "<</Type/Catalog/Pages 2 0 R>>",
+        "<</Type/Pages/Kids[%s]/Count %d>>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(pages)), pages),
+        "<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>",
+    ]
+    for i, stream in enumerate(page_streams):
+        objects.append(
+            f"<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]"
+            f"/Resources<</Font<</F1 3 0 R>>>>/Contents {5 + 2 * i} 0 R>>"
+        )
+        objects.append(f"<</Length {len(stream.encode('latin-1'))}>>stream\n{stream}\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj{body}endobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer<</Size {len(objects) + 1}/Root 1 0 R>>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic stand-in for an embedding backend.
+    Each text maps to a fixed unit vector derived from its hash. Every call
+    sleeps `latency` seconds plus `per_text_latency` per text, which mimics
+    a remote or local model server closely enough for throughput numbers.
+    """
+
+    def __init__(self, dim: int = 384, latency: float = 0.0, per_text_latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _wait(self, n: int):
+        with self._lock:
+            self.calls += 1
+            self.texts += n
+        delay = self.latency + self.per_text_latency * n
+        if delay:
+            time.sleep(delay)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._wait(len(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._wait(1)
+        return self._vector(text)
+
+
+class FakeChatOllama(BaseChatModel):
+    """
+    Scripted stand-in for ChatOllama.
+    Replies are taken from a queue filled with `script()`; when it is empty,
+    a fixed answer is returned. Each reply waits `first_token_latency`
+    seconds, then streams its words at `tokens_per_sec`, and it reports
+    usage_metadata like Ollama does, so streaming and tracing see the same
+    shape of data as with a real model.
+    """
+
+    first_token_latency: float = 0.0
+    tokens_per_sec: float = 0.0
+    default_reply: str = "This is a benchmark answer."
+    replies: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.replies = deque()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-ollama"
+
+    def script(self, messages: List[AIMessage]):
+        self.replies.extend(messages)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next(self, messages: List[BaseMessage]) -> AIMessage:
+        reply = self.replies.popleft() if self.replies else AIMessage(content=self.default_reply)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = max(1, len(str(reply.content).split()))
+        return AIMessage(
+            content=reply.content,
+            tool_calls=reply.tool_calls,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager: Optional[CallbackManagerForLLMRun] = None,
+                  **kwargs) -> ChatResult:
+        reply = self._next(messages)
+        time.sleep(self.first_token_latency)
+        if self.tokens_per_sec:
+            time.sleep(reply.usage_metadata["output_tokens"] / self.tokens_per_sec)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    def _stream(self, messages, stop=None, run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs) -> Iterator[ChatGenerationChunk]:
+        reply = self._next(messages)
+        time.sleep(self.first_token_latency)
+        words = str(reply.content).split(" ") if reply.content else []
+        for i, word in enumerate(words):
+            if self.tokens_per_sec:
+                time.sleep(1 / self.tokens_per_sec)
+            text = word if i == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+        # Tool calls and usage arrive with the final chunk, as with Ollama
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(reply.tool_calls)
+            ],
+            usage_metadata=reply.usage_metadata,
+        ))
+
+
+class FakeTool(BaseTool):
+    """
+    Stand-in for an agent tool with the same name.
+    It accepts any arguments, waits `latency` seconds and returns a canned
+    result, so replayed turns exercise the tool node without running
+    commands or touching the machine.
+    """
+
+    description: str = "Benchmark stand-in for an agent tool."
+    latency: float = 0.0
+
+    def _run(self, *args, **kwargs) -> str:
+        time.sleep(self.latency)
+        return f"{self.name} finished with {json.dumps(kwargs, sort_keys=True, default=str)}"
+
+
+def fake_tools(names: List[str], latency: float = 0.0) -> List[FakeTool]:
+    return [FakeTool(name=name, latency=latency) for name in names]
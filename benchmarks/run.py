@@ -0,0 +1,397 @@
+"""
+Offline benchmarks for ingestion, retrieval and agent turns.
+
+Everything runs against deterministic stand-ins (benchmarks/fakes.py) and
+a throwaway Chroma directory, so results only reflect this code base plus
+the configured fake latencies. Examples:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --suite retrieval --corpus-sizes 1000 5000 20000
+    python -m benchmarks.run --out base.json
+    python -m benchmarks.run --compare base.json --tolerance 0.15
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+BENCH_DIR = pathlib.Path(__file__).parent
+ROOT_DIR = BENCH_DIR.parent
+SUITES = ("ingest", "retrieval", "turns", "backends")
+# name -> settings for config.database; each is built and queried in its own process
+BACKENDS = {
+    "chroma": {"VECTOR_BACKEND": "chroma"},
+    "numpy": {"VECTOR_BACKEND": "numpy", "VECTOR_DTYPE": "float32"},
+    "numpy-f16": {"VECTOR_BACKEND": "numpy", "VECTOR_DTYPE": "float16"},
+    "numpy-ivf": {"VECTOR_BACKEND": "numpy", "VECTOR_DTYPE": "float32", "VECTOR_IVF_LISTS": "64", "VECTOR_IVF_PROBES": "8"},
+}
+
+logger = logging.getLogger("benchmarks")
+
+
+# -------------------------
+# Setup
+# -------------------------
+def configure_environment(workdir: str, args):
+    """Point every setting the app reads at import time to throwaway, offline values."""
+    os.environ.update({
+        "DB_LOCATION": os.path.join(workdir, "chroma"),
+        "CHROMA_COLLECTION_NAME": "benchmark",
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite") if args.with_cache else "",
+        "EMBEDDING_MODEL_TYPE": "ollama",
+        "EMBEDDING_MODEL_NAME": "benchmark-embeddings",
+        "MODEL_TYPE": "ollama",
+        "MODEL_NAME": "benchmark-llm",
+        "OLLAMA_BASE_URL": "http://127.0.0.1:9",
+        "TRACE_ENABLED": "False",
+    })
+    if str(ROOT_DIR) not in sys.path:
+        sys.path.insert(0, str(ROOT_DIR))
+
+
+def install_fakes(args):
+    from benchmarks.fakes import FakeChatOllama, FakeEmbeddings
+    import models.embedding as embedding
+
+    embeddings = FakeEmbeddings(dim=args.dim, latency=args.embed_latency, per_text_latency=args.embed_per_text)
+    embedding._build_client = lambda model_type, model_name: embeddings
+    llm = FakeChatOllama(first_token_latency=args.llm_latency, tokens_per_sec=args.tokens_per_sec)
+    return embeddings, llm
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {}
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(float(np.mean(samples_ms)), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def rss_mb() -> float:
+    """Resident set size of this process, from /proc (Linux only)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def grow_corpus(database, size: int, target: int, args) -> int:
+    """Add synthetic sources to `database` until it holds `target` chunks; returns the new size."""
+    from benchmarks.corpus import synthetic_documents
+
+    # Grow the same collection in source-sized batches, like many ingested PDFs
+    while size < target:
+        count = min(args.source_chunks, target - size)
+        session = database.begin_ingest(f"synthetic://corpus/{size}")
+        session.upsert(synthetic_documents(count, words=args.words_per_chunk, source=f"synthetic://corpus/{size}", seed=size))
+        session.commit(f"synthetic-{size}")
+        size += count
+    return size
+
+
+# -------------------------
+# Suites
+# -------------------------
+def bench_ingest(args, workdir: str) -> Dict[str, Any]:
+    from benchmarks.corpus import write_pdf
+    from config.database import Database
+    from handlation.pipeline import ingest_pdf
+
+    pdf_path = os.path.join(workdir, f"synthetic-{args.pages}p.pdf")
+    write_pdf(pdf_path, args.pages, words_per_page=args.words_per_page)
+    database = Database()
+
+    started = time.perf_counter()
+    stats = ingest_pdf(pdf_path, database)
+    first = time.perf_counter() - started
+
+    started = time.perf_counter()
+    again = ingest_pdf(pdf_path, database)
+    unchanged = time.perf_counter() - started
+
+    return {
+        "pages": stats.pages,
+        "chunks": stats.chunks,
+        "seconds": round(first, 3),
+        "pages_per_sec": round(stats.pages / first, 2) if first else None,
+        "chunks_per_sec": round(stats.chunks / first, 2) if first else None,
+        "unchanged_reingest_ms": round(unchanged * 1000, 3),
+        "unchanged_skipped": again.skipped,
+    }
+
+
+def bench_retrieval(args, workdir: str) -> Dict[str, Any]:
+    from benchmarks.corpus import synthetic_text
+    from config.database import Database
+
+    database = Database()
+    queries = [synthetic_text(8, seed=1_000_000 + i) for i in range(args.queries)]
+    results = {}
+    size = 0
+    for target in sorted(args.corpus_sizes):
+        size = grow_corpus(database, size, target, args)
+
+        # First query pays one-off index loading; it is not one of the timed ones,
+        # so the timed queries never hit the retrieval result cache
+        database.get_content(synthetic_text(8, seed=size))
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            database.get_content(query)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[str(target)] = percentiles(samples)
+        logger.info(f"retrieval @ {target} chunks: {results[str(target)]}")
+    return results
+
+
+def _backend_process(stage: str, backend: str, args, workdir: str, out):
+    """Child process body: build the store (`stage="build"`) or open and query it (`"query"`)."""
+    configure_environment(workdir, args)
+    os.environ.update(BACKENDS[backend])
+    os.environ["RETRIEVAL_CACHE_RESULTS"] = "0"
+    install_fakes(args)
+    from benchmarks.corpus import synthetic_text
+    from config.database import Database
+
+    started = time.perf_counter()
+    rss_before = rss_mb()
+    database = Database()
+    if stage == "build":
+        grow_corpus(database, 0, args.backend_size, args)
+        out.put({"build_seconds": round(time.perf_counter() - started, 3)})
+        return
+
+    database.get_content(synthetic_text(8, seed=-1))
+    opened = time.perf_counter() - started
+    samples = []
+    for i in range(args.queries):
+        query = synthetic_text(8, seed=2_000_000 + i)
+        started = time.perf_counter()
+        database.get_content(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    out.put({
+        "open_ms": round(opened * 1000, 3),
+        "query": percentiles(samples),
+        "rss_mb": round(rss_mb() - rss_before, 1),
+    })
+
+
+def bench_backends(args, workdir: str) -> Dict[str, Any]:
+    """
+    Build the same corpus in every backend, then open and query it from a
+    fresh process, so resident memory reflects serving queries only.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in args.backends:
+        backend_dir = os.path.join(workdir, f"backend-{backend}")
+        os.makedirs(backend_dir, exist_ok=True)
+        result = {}
+        for stage in ("build", "query"):
+            out = context.Queue()
+            process = context.Process(target=_backend_process, args=(stage, backend, args, backend_dir, out))
+            process.start()
+            result.update(out.get())
+            process.join()
+        results[backend] = result
+        logger.info(f"backend {backend} @ {args.backend_size} chunks: {result}")
+    return results
+
+
+def load_turns(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def bench_turns(args, llm) -> Dict[str, Any]:
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+    import core.agent as agent
+    from benchmarks.fakes import fake_tools
+    from config.database import Database
+    from core.streaming import stream_turn
+
+    agent._model_chain = llm
+    agent.memory.summarizer = llm
+    # Scripted tool calls go to stand-ins; the real tools would run commands on this machine
+    agent.tool_node.tools = {tool.name: tool for tool in fake_tools(list(agent.tool_node.tools), args.tool_latency)}
+    database = Database()
+
+    turns = load_turns(args.turns)
+    state = {"messages": [SystemMessage(content="You are a benchmark assistant.")], "running_processes": {}}
+    totals, ttfts, tool_calls = [], [], 0
+    for n, turn in enumerate(turns):
+        replies = [
+            AIMessage(
+                content=reply.get("content", ""),
+                tool_calls=[
+                    {"name": call["name"], "args": call.get("args", {}), "id": f"call-{n}-{i}-{j}"}
+                    for j, call in enumerate(reply.get("tool_calls", []))
+                ],
+            )
+            for i, reply in enumerate(turn["replies"])
+        ]
+        llm.script(replies)
+
+        started = time.perf_counter()
+        user_input = turn["user"]
+        context = database.get_content(user_input)
+        if context:
+            user_input += "\n\n[Context from vector store]:\n" + "\n\n".join(doc.page_content for doc in context)
+        state["messages"] = agent.memory.compact(state["messages"]) + [HumanMessage(content=user_input)]
+        state, stats = stream_turn(agent.app, state)
+        totals.append((time.perf_counter() - started) * 1000)
+        if stats.ttft is not None:
+            ttfts.append(stats.ttft * 1000)
+        tool_calls += stats.tool_calls
+
+    return {
+        "turns": len(turns),
+        "tool_calls": tool_calls,
+        "turn": percentiles(totals),
+        "ttft": percentiles(ttfts),
+    }
+
+
+# -------------------------
+# Baselines
+# -------------------------
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print metric changes against a baseline; return the regressions beyond `tolerance`."""
+    now, before = flatten(current["results"]), flatten(baseline["results"])
+    regressions = []
+    print(f"{'metric':<44}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name in sorted(set(now) & set(before)):
+        higher_is_better = name.endswith("per_sec")
+        lower_is_better = name.endswith("_ms") or name.endswith("seconds")
+        if not (higher_is_better or lower_is_better) or not before[name]:
+            continue
+        change = (now[name] - before[name]) / before[name]
+        worse = change < -tolerance if higher_is_better else change > tolerance
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<44}{before[name]:>12.2f}{now[name]:>12.2f}{change:>+8.0%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+# -------------------------
+# Entry point
+# -------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline StudyWithMiku benchmarks")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--pages", type=int, default=60, help="pages in the synthetic PDF")
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[500, 2000, 8000], help="chunks in the store")
+    parser.add_argument("--words-per-chunk", type=int, default=150)
+    parser.add_argument("--source-chunks", type=int, default=500, help="chunks per synthetic source")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--backend-size", type=int, default=5000, help="chunks stored for the backends suite")
+    parser.add_argument("--turns", default=str(BENCH_DIR / "turns.jsonl"), help="JSONL of scripted turns")
+    parser.add_argument("--dim", type=int, default=384, help="fake embedding dimension")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embedding call")
+    parser.add_argument("--embed-per-text", type=float, default=0.0, help="extra seconds per embedded text")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--tool-latency", type=float, default=0.01, help="seconds per fake tool call")
+    parser.add_argument("--with-cache", action="store_true", help="enable the SQLite embedding cache")
+    parser.add_argument("--out", help="write results JSON here (default benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    logger.setLevel(logging.INFO)
+
+    with tempfile.TemporaryDirectory(prefix="swm-bench-") as workdir:
+        configure_environment(workdir, args)
+        embeddings, llm = install_fakes(args)
+
+        results = {}
+        for suite in args.suite:
+            started = time.perf_counter()
+            if suite == "ingest":
+                results[suite] = bench_ingest(args, workdir)
+            elif suite == "retrieval":
+                results[suite] = bench_retrieval(args, workdir)
+            elif suite == "turns":
+                results[suite] = bench_turns(args, llm)
+            elif suite == "backends":
+                results[suite] = bench_backends(args, workdir)
+            logger.info(f"{suite} finished in {time.perf_counter() - started:.1f}s")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "results": results,
+    }
+
+    out = args.out or str(BENCH_DIR / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
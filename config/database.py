@@ -1,12 +1,20 @@
+import hashlib
+import json
 import logging
 import os
 import pathlib
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
 
 import environ
-from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
+from config.manifest import IngestManifest, file_digest
+from config.vector_backends import VectorBackend, create_backend
+from core.text import normalize_query, normalize_text
+from core.tracing import tracer
 from models.embedding import EmbeddingConfig
 
 logging.basicConfig(
@@ -22,26 +30,246 @@ environ.Env.read_env(base_dir / '.env')
 
 CHROMA_COLLECTION_NAME = env("CHROMA_COLLECTION_NAME", default="default_collection")
 DB_LOCATION = env("DB_LOCATION", default="./chroma_db")
+# chroma | numpy (memory-mapped flat index, optionally IVF-partitioned)
+VECTOR_BACKEND = env("VECTOR_BACKEND", default="chroma")
+VECTOR_DTYPE = env("VECTOR_DTYPE", default="float32")
+VECTOR_IVF_LISTS = env.int("VECTOR_IVF_LISTS", default=0)
+VECTOR_IVF_PROBES = env.int("VECTOR_IVF_PROBES", default=8)
+# Set to use a shared vector-store service (config/vector_service.py) instead of opening DB_LOCATION
+VECTOR_SERVICE_HOST = env("VECTOR_SERVICE_HOST", default="")
+VECTOR_SERVICE_PORT = env.int("VECTOR_SERVICE_PORT", default=8765)
+RETRIEVAL_CACHE_QUERIES = env.int("RETRIEVAL_CACHE_QUERIES", default=512)
+RETRIEVAL_CACHE_RESULTS = env.int("RETRIEVAL_CACHE_RESULTS", default=256)
 
 embedding_model = EmbeddingConfig()
 
+
+def backend_options(backend: str) -> Dict[str, Any]:
+    """Settings from the environment for a backend's constructor."""
+    if backend == "numpy":
+        return {"dtype": VECTOR_DTYPE, "ivf_lists": VECTOR_IVF_LISTS, "ivf_probes": VECTOR_IVF_PROBES}
+    if backend == "remote":
+        return {"host": VECTOR_SERVICE_HOST, "port": VECTOR_SERVICE_PORT}
+    return {}
+
+
+def chunk_id(document: Document) -> str:
+    """Stable id derived from a chunk's normalized text and its metadata."""
+    material = json.dumps(
+        {"text": normalize_text(document.page_content), "metadata": document.metadata},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:32]
+
+
+class _LRUTable:
+    """Bounded LRU map that remembers how long each value took to compute."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_ms += entry[1]
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, cost_ms: float):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (value, cost_ms)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+        }
+
+
+class RetrievalCache:
+    """
+    In-memory caches in front of `Database.get_content`.
+    Query embeddings are kept in an LRU keyed by the normalized query, so a
+    repeated question (up to case, punctuation and spacing) is not embedded
+    again. Results are keyed by (normalized query, k, threshold, collection
+    generation); the database bumps its generation on every write, so a
+    result computed before a write is never served after it.
+    """
+
+    def __init__(self, max_queries: int = RETRIEVAL_CACHE_QUERIES, max_results: int = RETRIEVAL_CACHE_RESULTS):
+        self.embeddings = _LRUTable(max_queries)
+        self.results = _LRUTable(max_results)
+        self._lock = threading.Lock()
+
+    def get_embedding(self, query: str) -> Optional[List[float]]:
+        with self._lock:
+            return self.embeddings.get(query)
+
+    def put_embedding(self, query: str, vector: List[float], cost_ms: float):
+        with self._lock:
+            self.embeddings.put(query, vector, cost_ms)
+
+    def get_results(self, key: tuple) -> Optional[List[Document]]:
+        with self._lock:
+            results = self.results.get(key)
+        return list(results) if results is not None else None
+
+    def put_results(self, key: tuple, documents: List[Document], cost_ms: float):
+        with self._lock:
+            self.results.put(key, list(documents), cost_ms)
+
+    def invalidate_results(self):
+        # Old keys can no longer match once the generation moved; this just frees them
+        with self._lock:
+            self.results.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {"query_embeddings": self.embeddings.stats(), "results": self.results.stats()}
+
+
+class IngestSession:
+    """
+    Chunk-level diff of one source against what is already stored.
+    Chunks are upserted as they arrive, skipping ids that already exist;
+    `commit` deletes the ids that were not seen again and records the
+    new state in the manifest.
+    """
+
+    def __init__(self, database: "Database", source: str, existing_ids: Iterable[str]):
+        self.database = database
+        self.source = source
+        self.existing_ids = set(existing_ids)
+        self.seen_ids: List[str] = []
+        self._seen = set()
+        self._added_ids: List[str] = []
+        self.added = 0
+
+    def upsert(self, documents: List[Document]) -> int:
+        """Store the chunks that are new for this source, returning how many were added."""
+        new_docs, new_ids = [], []
+        for doc in documents:
+            doc.id = chunk_id(doc)
+            if doc.id in self._seen:
+                continue
+            self._seen.add(doc.id)
+            self.seen_ids.append(doc.id)
+            if doc.id not in self.existing_ids:
+                new_docs.append(doc)
+                new_ids.append(doc.id)
+
+        if new_docs:
+            self.database.backend.add_documents(new_docs, ids=new_ids)
+            self.database.bump_generation()
+            self._added_ids.extend(new_ids)
+            self.added += len(new_docs)
+        return len(new_docs)
+
+    def rollback(self):
+        """Remove the chunks this session added, leaving the source as it was."""
+        if self._added_ids:
+            self.database.backend.delete(self._added_ids)
+            self.database.bump_generation()
+        logger.info(f"Source '{self.source}': rolled back {len(self._added_ids)} added chunks")
+        self._added_ids = []
+        self.added = 0
+
+    def commit(self, content_hash: Optional[str] = None):
+        vanished = list(self.existing_ids - self._seen)
+        if vanished:
+            self.database.backend.delete(vanished)
+            self.database.bump_generation()
+        if content_hash is None:
+            content_hash = hashlib.sha256("\n".join(sorted(self._seen)).encode("utf-8")).hexdigest()
+        self.database.manifest.put(self.source, content_hash, self.seen_ids)
+        logger.info(
+            f"Source '{self.source}': {self.added} chunks added, {len(vanished)} removed, "
+            f"{len(self.seen_ids) - self.added} unchanged"
+        )
+
 class Database:
     def __init__(self):
         try:
-            self.vector_store = Chroma(
-                collection_name=CHROMA_COLLECTION_NAME,
-                embedding_function=embedding_model.get_embedding_model(),
-                persist_directory=DB_LOCATION,
-                relevance_score_fn=lambda d: 1 - d,
+            # Shared, batched embedding engine used for ingestion and queries
+            self.embedding_engine = embedding_model.get_embedding_model()
+            os.makedirs(DB_LOCATION, exist_ok=True)
+            # With VECTOR_SERVICE_HOST set, the store is owned by a shared service
+            backend = "remote" if VECTOR_SERVICE_HOST else VECTOR_BACKEND
+            self.backend: VectorBackend = create_backend(
+                backend, self.embedding_engine, DB_LOCATION, CHROMA_COLLECTION_NAME, **backend_options(backend)
             )
+            self.manifest = IngestManifest(os.path.join(DB_LOCATION, "ingest_manifest.sqlite"))
             self.min_relevance_threshold = float(env("EMBEDDEDING_TRESHOLD", default=0.0))
-            logger.info("Chroma vector store initialized successfully")
+            # Incremented on every write to the collection; part of each result cache key
+            self.generation = 0
+            self._generation_lock = threading.Lock()
+            self.retrieval_cache = RetrievalCache()
+            logger.info(f"{self.backend.name} vector store initialized successfully")
         except Exception as e:
-            logger.exception("Failed to initialize Chroma vector store")
+            logger.exception("Failed to initialize the vector store")
             raise e
 
-    def get_vector_store(self):
-        return self.vector_store
+    def get_vector_store(self) -> VectorBackend:
+        return self.backend
+
+    def bump_generation(self):
+        with self._generation_lock:
+            self.generation += 1
+        self.retrieval_cache.invalidate_results()
+
+    def source_hash(self, source: str) -> Optional[str]:
+        """Hash of the file behind a source, or None if it is not a local file."""
+        return file_digest(source) if os.path.isfile(source) else None
+
+    def is_source_current(self, source: str, content_hash: Optional[str] = None) -> bool:
+        """True if the source was already ingested with exactly this content."""
+        content_hash = content_hash or self.source_hash(source)
+        return content_hash is not None and self.manifest.content_hash(source) == content_hash
+
+    def begin_ingest(self, source: str) -> IngestSession:
+        entry = self.manifest.get(source)
+        if entry is not None:
+            existing_ids = entry["chunk_ids"]
+        else:
+            # Sources ingested before the manifest existed: fall back to a store scan once
+            existing_ids = self.backend.ids_for_source(source)
+        return IngestSession(self, source, existing_ids)
+
+    def known_sources(self) -> List[str]:
+        return self.manifest.sources()
+
+    def delete_source(self, source: str) -> int:
+        """Remove every chunk of a source, returning how many were deleted."""
+        entry = self.manifest.get(source)
+        if entry is not None:
+            ids = entry["chunk_ids"]
+        else:
+            ids = self.backend.ids_for_source(source)
+        if ids:
+            self.backend.delete(ids)
+            self.bump_generation()
+        self.manifest.remove(source)
+        logger.info(f"Removed {len(ids)} chunks for source '{source}'")
+        return len(ids)
 
     def add_documents(self, documents: List[Document]):
         if not documents:
@@ -53,31 +281,50 @@ class Database:
             logger.warning("No source metadata found in documents, skipping addition")
             return
 
-        # Generate unique IDs for documents if not set
-        for i, doc in enumerate(documents):
-            if doc.id is None:
-                doc.id = f"{os.path.basename(source)}:{i}"
-
-        # Check existing documents for this source
-        existing = self.vector_store.get(where={"source": source})
-        existing_count = len(existing.get("documents", []))
-
-        if existing_count == len(documents):
-            logger.info(f"Documents for source '{source}' already exist with matching count, skipping addition")
+        content_hash = self.source_hash(source)
+        if self.is_source_current(source, content_hash):
+            logger.info(f"Source '{source}' is unchanged since last ingestion, skipping addition")
             return
 
-        # If mismatch, delete existing and add new
-        if existing_count > 0:
-            logger.info(f"Count mismatch for source '{source}' (existing: {existing_count}, new: {len(documents)}), replacing documents")
-            self.vector_store.delete(ids=existing["ids"])
+        session = self.begin_ingest(source)
+        session.upsert(documents)
+        session.commit(content_hash)
 
-        logger.info(f"Adding {len(documents)} documents for source '{source}' to the vector store")
-        self.vector_store.add_documents(documents)
-        self.vector_store.persist()
+    def query_embedding(self, query: str) -> List[float]:
+        """Embed a query, reusing the vector of any earlier query that normalizes the same."""
+        normalized = normalize_query(query)
+        vector = self.retrieval_cache.get_embedding(normalized)
+        if vector is None:
+            started = time.perf_counter()
+            vector = self.embedding_engine.embed_query(query)
+            self.retrieval_cache.put_embedding(normalized, vector, (time.perf_counter() - started) * 1000)
+        return vector
 
-    def get_content(self, query: str, k: int = 4, min_relevance: float = 0.0) -> List[Document]:
-        results = self.vector_store.similarity_search_with_relevance_scores(query, k=k)
-        filtered = [doc for doc, score in results if score >= min_relevance]
+    def get_content(self, query: str, k: int = 4, min_relevance: Optional[float] = None) -> List[Document]:
+        if min_relevance is None:
+            min_relevance = self.min_relevance_threshold
+        # Read the generations first: a write during the search files the result under the old ones.
+        # The backend's revision covers writes made by other processes through a shared service.
+        key = (normalize_query(query), k, min_relevance, self.generation, self.backend.revision())
+        cached = self.retrieval_cache.get_results(key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        query_embedding = self.query_embedding(query)
+        with tracer.span("vector.search", k=k) as span:
+            results = self.backend.similarity_search(query_embedding, k=k)
+            span.set(results=len(results), backend=self.backend.name)
+        filtered = [doc for doc, relevance in results if relevance >= min_relevance]
         if not filtered:
             logger.info(f"No documents met the relevance threshold of {min_relevance}")
-        return filtered
\ No newline at end of file
+        self.retrieval_cache.put_results(key, filtered, (time.perf_counter() - started) * 1000)
+        return filtered
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit rates and time saved by the retrieval cache, plus the persistent embedding cache."""
+        return {
+            "generation": self.generation,
+            **self.retrieval_cache.stats(),
+            "embedding_store": self.embedding_engine.cache_stats(),
+        }
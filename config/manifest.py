@@ -0,0 +1,75 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file's bytes without loading it all into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Small SQLite sidecar next to the vector store that remembers, per source,
+    the hash of the last ingested content and the ids of its chunks.
+    It lets ingestion skip unchanged files and diff chunk ids without
+    scanning the vector store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, source: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, chunk_ids, updated FROM sources WHERE source = ?",
+                (source,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "chunk_ids": json.loads(row[1]), "updated": row[2]}
+
+    def content_hash(self, source: str) -> Optional[str]:
+        entry = self.get(source)
+        return entry["content_hash"] if entry else None
+
+    def put(self, source: str, content_hash: str, chunk_ids: List[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (source, content_hash, chunk_ids, updated) VALUES (?, ?, ?, ?)",
+                (source, content_hash, json.dumps(chunk_ids), time.time()),
+            )
+            self._conn.commit()
+
+    def remove(self, source: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+            self._conn.commit()
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT source FROM sources")]
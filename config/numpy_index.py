@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.vector_backends import VectorBackend
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matrix product in the flat scan; bounds the float32 copy of float16 data
+SCAN_BLOCK_ROWS = 65536
+# IVF lists are trained once there are this many vectors per list, and retrained after 4x growth
+IVF_MIN_POINTS_PER_LIST = 40
+IVF_TRAIN_SAMPLE_PER_LIST = 256
+IVF_ITERATIONS = 12
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class NumpyIndex(VectorBackend):
+    """
+    Vector store kept in a memory-mapped file of unit vectors.
+    Row i of `vectors.bin` (float32 or float16) belongs to row i of a small
+    SQLite table holding the id, source, text and metadata. Queries are a
+    vectorized dot product over the mapped rows, so only pages that are
+    scanned become resident and nothing has to be loaded at startup.
+    Relevance is cosine similarity.
+
+    With `ivf_lists > 0` the vectors are also partitioned by k-means once
+    the corpus is large enough; a query then scans only the `ivf_probes`
+    lists whose centroids are closest to it. Deleted rows are tombstoned
+    and the file is compacted when they outnumber the live ones.
+    """
+
+    name = "numpy"
+
+    def __init__(self, embedding: Embeddings, path: str, dtype: str = "float32",
+                 ivf_lists: int = 0, ivf_probes: int = 8):
+        self.embedding = embedding
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.bin")
+        self._centroids_path = os.path.join(path, "ivf_centroids.npy")
+
+        self._conn = sqlite3.connect(os.path.join(path, "rows.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                source TEXT,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                list INTEGER
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rows_source ON rows (source)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._load()
+
+    # -------------------------
+    # Storage
+    # -------------------------
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _load(self):
+        stored_dtype = self._meta("dtype")
+        if stored_dtype and np.dtype(stored_dtype) != self.dtype:
+            logger.warning(f"[NUMPY INDEX] Index was built as {stored_dtype}; ignoring requested {self.dtype}")
+            self.dtype = np.dtype(stored_dtype)
+        dim = self._meta("dim")
+        self.dim = int(dim) if dim else None
+        self._vectors = None
+        self._capacity = 0
+        self._rows = 0
+        self._live = np.zeros(0, dtype=bool)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._centroids = None
+        self._trained_on = int(self._meta("ivf_trained_on") or 0)
+        if self.dim is None:
+            return
+
+        self._map(os.path.getsize(self._vectors_path) // (self.dim * self.dtype.itemsize))
+        entries = self._conn.execute("SELECT row, list FROM rows").fetchall()
+        self._rows = max((row for row, _ in entries), default=-1) + 1
+        self._live = np.zeros(self._rows, dtype=bool)
+        self._lists = np.full(self._rows, -1, dtype=np.int32)
+        for row, ivf_list in entries:
+            self._live[row] = True
+            self._lists[row] = -1 if ivf_list is None else ivf_list
+        if os.path.exists(self._centroids_path):
+            self._centroids = np.load(self._centroids_path)
+
+    def _map(self, capacity: int):
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim)) \
+            if capacity else None
+        self._capacity = capacity
+
+    def _reserve(self, rows: int):
+        """Grow the file (doubling) so it holds at least `rows` rows."""
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, 2 * self._capacity, 1024)
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._map(capacity)
+
+    # -------------------------
+    # VectorBackend
+    # -------------------------
+    def add_documents(self, documents: List[Document], ids: List[str],
+                      embeddings: Optional[List[List[float]]] = None):
+        if not documents:
+            return
+        if embeddings is None:
+            embeddings = self.embedding.embed_documents([doc.page_content for doc in documents])
+        vectors = _unit(embeddings)
+        with self._lock:
+            self.delete(ids)
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._set_meta("dim", self.dim)
+                self._set_meta("dtype", self.dtype.name)
+                open(self._vectors_path, "ab").close()
+                self._map(0)
+            start = self._rows
+            self._reserve(start + len(documents))
+            self._vectors[start:start + len(documents)] = vectors.astype(self.dtype)
+            self._vectors.flush()
+
+            lists = self._assign(vectors) if self._centroids is not None else np.full(len(documents), -1, np.int32)
+            self._conn.executemany(
+                "INSERT INTO rows (row, id, source, text, metadata, list) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (start + i, doc_id, doc.metadata.get("source"), doc.page_content,
+                     json.dumps(doc.metadata, default=str), None if lists[i] < 0 else int(lists[i]))
+                    for i, (doc, doc_id) in enumerate(zip(documents, ids))
+                ],
+            )
+            self._conn.commit()
+            self._rows = start + len(documents)
+            self._live = np.concatenate([self._live, np.ones(len(documents), dtype=bool)])
+            self._lists = np.concatenate([self._lists, lists])
+            self._maybe_train()
+
+    def delete(self, ids: Sequence[str]):
+        ids = list(ids)
+        if not ids:
+            return
+        with self._lock:
+            rows = []
+            for i in range(0, len(ids), 500):
+                part = ids[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows += [r for (r,) in self._conn.execute(f"SELECT row FROM rows WHERE id IN ({placeholders})", part)]
+                self._conn.execute(f"DELETE FROM rows WHERE id IN ({placeholders})", part)
+            self._conn.commit()
+            if rows:
+                self._live[rows] = False
+                dead = self._rows - int(self._live.sum())
+                if dead > 1024 and dead > self._rows - dead:
+                    self._compact()
+
+    def ids_for_source(self, source: str) -> List[str]:
+        with self._lock:
+            return [doc_id for (doc_id,) in self._conn.execute("SELECT id FROM rows WHERE source = ?", (source,))]
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._live.sum())
+
+    def close(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._conn.close()
+
+    def similarity_search(self, vector: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        query = _unit(vector)
+        with self._lock:
+            if not self._rows or k <= 0:
+                return []
+            if self._centroids is not None:
+                probes = np.argsort(self._centroids @ query)[::-1][:self.ivf_probes]
+                candidates = np.flatnonzero(np.isin(self._lists[:self._rows], probes) & self._live)
+                scores = self._vectors[candidates].astype(np.float32) @ query
+            else:
+                candidates = np.flatnonzero(self._live)
+                scores = np.empty(self._rows, dtype=np.float32)
+                for start in range(0, self._rows, SCAN_BLOCK_ROWS):
+                    end = min(start + SCAN_BLOCK_ROWS, self._rows)
+                    scores[start:end] = self._vectors[start:end].astype(np.float32) @ query
+                scores = scores[candidates]
+            if not len(candidates):
+                return []
+            k = min(k, len(candidates))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            rows = [int(candidates[i]) for i in top]
+            found = {
+                row: (doc_id, text, metadata)
+                for row, doc_id, text, metadata in self._conn.execute(
+                    f"SELECT row, id, text, metadata FROM rows WHERE row IN ({','.join('?' * len(rows))})", rows
+                )
+            }
+        return [
+            (Document(id=found[row][0], page_content=found[row][1], metadata=json.loads(found[row][2])), float(scores[i]))
+            for row, i in zip(rows, top)
+        ]
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def _compact(self):
+        """Rewrite the file without tombstoned rows; row numbers shift down in order."""
+        live_rows = np.flatnonzero(self._live)
+        vectors = np.array(self._vectors[live_rows])
+        # Ascending order: each row moves to a number no live row is using any more
+        self._conn.executemany(
+            "UPDATE rows SET row = ? WHERE row = ?",
+            [(new, int(old)) for new, old in enumerate(live_rows) if new != old],
+        )
+        self._conn.commit()
+        self._vectors[:len(live_rows)] = vectors
+        self._vectors.flush()
+        self._lists = self._lists[live_rows]
+        self._rows = len(live_rows)
+        self._live = np.ones(self._rows, dtype=bool)
+        logger.info(f"[NUMPY INDEX] Compacted to {self._rows} rows")
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _maybe_train(self):
+        live = int(self._live.sum())
+        if not self.ivf_lists or live < self.ivf_lists * IVF_MIN_POINTS_PER_LIST:
+            return
+        if self._centroids is not None and live < 4 * self._trained_on:
+            return
+        self._train(live)
+
+    def _train(self, live: int):
+        """Spherical k-means over a sample of live rows, then assign every row to a list."""
+        rng = np.random.default_rng(0)
+        live_rows = np.flatnonzero(self._live)
+        sample_rows = np.sort(rng.choice(live_rows, size=min(len(live_rows), self.ivf_lists * IVF_TRAIN_SAMPLE_PER_LIST),
+                                         replace=False))
+        sample = self._vectors[sample_rows].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), size=self.ivf_lists, replace=False)]
+        for _ in range(IVF_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(self.ivf_lists):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _unit(centroids)
+        self._centroids = centroids
+        np.save(self._centroids_path, centroids)
+
+        for start in range(0, self._rows, SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, self._rows)
+            self._lists[start:end] = self._assign(self._vectors[start:end].astype(np.float32))
+        self._conn.executemany(
+            "UPDATE rows SET list = ? WHERE row = ?",
+            [(int(self._lists[row]), int(row)) for row in live_rows],
+        )
+        self._trained_on = live
+        self._set_meta("ivf_trained_on", live)
+        self._conn.commit()
+        logger.info(f"[NUMPY INDEX] Trained {self.ivf_lists} IVF lists on {len(sample)} of {live} vectors")
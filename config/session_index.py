@@ -0,0 +1,99 @@
+import logging
+import pathlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import environ
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from config.database import chunk_id, embedding_model
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+
+class SessionIndex:
+    """
+    In-memory vector index for pages read during this session.
+    Nothing is persisted: web pages are indexed so follow-up questions can
+    be answered from them, and are forgotten on exit. Re-reading a URL
+    replaces its chunks, and only the `max_sources` most recently indexed
+    URLs are kept. Relevance is cosine similarity, filtered by the same
+    EMBEDDEDING_TRESHOLD as the document store.
+    """
+
+    def __init__(self, max_sources: int = 30, chunk_size: int = 1000, chunk_overlap: int = 150):
+        self.max_sources = max_sources
+        self.min_relevance_threshold = float(env("EMBEDDEDING_TRESHOLD", default=0.0))
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self._store = None
+        self._sources: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> InMemoryVectorStore:
+        # Created on first use so importing this module never builds an embedding client
+        if self._store is None:
+            self._store = InMemoryVectorStore(embedding=embedding_model.get_embedding_model())
+        return self._store
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def add_page(self, source: str, text: str, title: str = "") -> int:
+        """Chunk, embed and index one page; returns the number of chunks."""
+        documents = [
+            Document(page_content=chunk, metadata={"source": source, "title": title, "chunk": i})
+            for i, chunk in enumerate(self.splitter.split_text(text))
+        ]
+        if not documents:
+            return 0
+        ids = [chunk_id(doc) for doc in documents]
+        # Embedding is the slow part; do it before taking the lock so searches aren't blocked
+        vectors = self.store.embedding.embed_documents([doc.page_content for doc in documents])
+        with self._lock:
+            stale = self._sources.pop(source, None)
+            if stale:
+                self.store.delete(stale)
+            # InMemoryVectorStore has no public way to add precomputed vectors
+            for doc_id, doc, vector in zip(ids, documents, vectors):
+                self.store.store[doc_id] = {
+                    "id": doc_id, "vector": vector, "text": doc.page_content, "metadata": doc.metadata,
+                }
+            self._sources[source] = ids
+            while len(self._sources) > self.max_sources:
+                _, evicted = self._sources.popitem(last=False)
+                self.store.delete(evicted)
+        logger.info(f"[SESSION INDEX] Indexed {len(documents)} chunks from {source}")
+        return len(documents)
+
+    def get_content(self, query: str, k: int = 4, min_relevance: Optional[float] = None) -> List[Document]:
+        """Same contract as `Database.get_content`, over the session's pages."""
+        if not self._sources:
+            return []
+        if min_relevance is None:
+            min_relevance = self.min_relevance_threshold
+        with tracer.span("session_index.search", k=k) as span:
+            vector = self.store.embedding.embed_query(query)
+            with self._lock:
+                results = self.store.similarity_search_with_score_by_vector(vector, k=k)
+            span.set(results=len(results))
+        filtered = [doc for doc, relevance in results if relevance >= min_relevance]
+        if not filtered:
+            logger.info(f"[SESSION INDEX] No pages met the relevance threshold of {min_relevance}")
+        return filtered
+
+    def clear(self):
+        with self._lock:
+            self._sources.clear()
+            self._store = None
+
+
+session_index = SessionIndex()
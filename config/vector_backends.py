@@ -0,0 +1,116 @@
+import logging
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class VectorBackend:
+    """
+    What `Database` needs from a vector store.
+    Backends embed and store documents under caller-chosen ids, delete by
+    id or by source, and return (document, relevance) pairs for a query
+    vector, most relevant first. Relevance is backend-specific but always
+    "higher is better", which is what EMBEDDEDING_TRESHOLD is compared to.
+    """
+
+    name = "base"
+    # Largest number of documents one add_documents call should carry
+    max_batch_size = 4096
+
+    def add_documents(self, documents: List[Document], ids: List[str],
+                      embeddings: Optional[List[List[float]]] = None):
+        """Store documents under `ids`, embedding them unless `embeddings` are given."""
+        raise NotImplementedError
+
+    def delete(self, ids: Sequence[str]):
+        raise NotImplementedError
+
+    def ids_for_source(self, source: str) -> List[str]:
+        raise NotImplementedError
+
+    def delete_source(self, source: str) -> int:
+        ids = self.ids_for_source(source)
+        if ids:
+            self.delete(ids)
+        return len(ids)
+
+    def similarity_search(self, vector: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def revision(self) -> int:
+        """
+        Changes whenever someone other than this process writes to the store.
+        Local backends are only written through our own Database, which
+        tracks that itself, so they always report 0.
+        """
+        return 0
+
+    def close(self):
+        pass
+
+
+class ChromaBackend(VectorBackend):
+    """Embedded, persistent Chroma collection; relevance is 1 - distance."""
+
+    name = "chroma"
+
+    def __init__(self, embedding: Embeddings, collection_name: str, persist_directory: str):
+        from langchain_chroma import Chroma
+
+        self.relevance_score_fn = lambda d: 1 - d
+        self.store = Chroma(
+            collection_name=collection_name,
+            embedding_function=embedding,
+            persist_directory=persist_directory,
+            relevance_score_fn=self.relevance_score_fn,
+        )
+        self.max_batch_size = self.store._client.get_max_batch_size()
+
+    def add_documents(self, documents: List[Document], ids: List[str],
+                      embeddings: Optional[List[List[float]]] = None):
+        if embeddings is None:
+            self.store.add_documents(documents, ids=ids)
+            return
+        for i in range(0, len(documents), self.max_batch_size):
+            part = documents[i:i + self.max_batch_size]
+            self.store._collection.upsert(
+                ids=ids[i:i + self.max_batch_size],
+                embeddings=embeddings[i:i + self.max_batch_size],
+                documents=[doc.page_content for doc in part],
+                metadatas=[doc.metadata or None for doc in part],
+            )
+
+    def delete(self, ids: Sequence[str]):
+        self.store.delete(ids=list(ids))
+
+    def ids_for_source(self, source: str) -> List[str]:
+        return self.store.get(where={"source": source}, include=[])["ids"]
+
+    def similarity_search(self, vector: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        # The by-vector search returns raw distances; convert them like the text search does
+        results = self.store.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+        return [(doc, self.relevance_score_fn(distance)) for doc, distance in results]
+
+    def count(self) -> int:
+        return self.store._collection.count()
+
+
+def create_backend(name: str, embedding: Embeddings, location: str, collection_name: str, **options) -> VectorBackend:
+    """Build the backend selected by VECTOR_BACKEND; backends import their dependencies on demand."""
+    if name == "remote":
+        from config.vector_service import RemoteBackend
+        return RemoteBackend(embedding, **options)
+    elif name == "chroma":
+        return ChromaBackend(embedding, collection_name, location)
+    elif name == "numpy":
+        from config.numpy_index import NumpyIndex
+        return NumpyIndex(embedding, os.path.join(location, f"numpy_{collection_name}"), **options)
+    else:
+        raise ValueError(f"Invalid vector backend: {name}")
@@ -0,0 +1,351 @@
+"""
+Shared vector-store service.
+
+One process owns the vector store; the REPL and every ingestion worker talk
+to it over HTTP instead of opening the persist directory themselves.
+Clients embed locally (with their embedding cache) and send vectors;
+concurrent writes are coalesced into batched upserts on the server.
+
+    python -m config.vector_service                # uses VECTOR_BACKEND, DB_LOCATION, VECTOR_SERVICE_PORT
+    VECTOR_SERVICE_HOST=127.0.0.1 python main.py   # Database() now connects to the service
+
+The protocol is this project's own; CHROMA_HOST/CHROMA_PORT stay reserved
+for a real Chroma server.
+"""
+import argparse
+import json
+import logging
+import pathlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import environ
+import httpx
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from config.vector_backends import VectorBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+VECTOR_SERVICE_HOST = env("VECTOR_SERVICE_HOST", default="")
+VECTOR_SERVICE_PORT = env.int("VECTOR_SERVICE_PORT", default=8765)
+# How long the writer waits for more writes to join a batch that isn't full yet
+VECTOR_SERVICE_LINGER = env.float("VECTOR_SERVICE_LINGER", default=0.05)
+VECTOR_SERVICE_TIMEOUT = env.float("VECTOR_SERVICE_TIMEOUT", default=120.0)
+# How long a client trusts the last revision it saw before asking the service again
+VECTOR_SERVICE_REVISION_TTL = env.float("VECTOR_SERVICE_REVISION_TTL", default=1.0)
+
+
+# -------------------------
+# Server side
+# -------------------------
+class WriteBatcher:
+    """
+    Serializes writes to a backend and coalesces them.
+    Each `add`/`delete` call enqueues an operation and blocks until it is
+    applied. A single writer thread drains the queue in order: runs of
+    consecutive adds become upserts of up to `max_batch` documents, and
+    runs of deletes become one delete, so many small ingestion jobs turn
+    into a few large writes. A batch that isn't full waits up to `linger`
+    seconds for more work. If a merged write fails, its requests are retried
+    one at a time, so only the bad ones fail.
+    """
+
+    def __init__(self, backend: VectorBackend, max_batch: int, linger: float = VECTOR_SERVICE_LINGER):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.linger = linger
+        self.revision = 0
+        self.stats = {"requests": 0, "batches": 0, "documents": 0, "deletes": 0, "failed": 0}
+        self._queue: Deque[Tuple[str, Any, Future]] = deque()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="vector-writer", daemon=True)
+        self._thread.start()
+
+    def _submit(self, kind: str, payload) -> Any:
+        future = Future()
+        with self._cond:
+            self._queue.append((kind, payload, future))
+            self.stats["requests"] += 1
+            self._cond.notify()
+        return future.result()
+
+    def add(self, documents: List[Document], ids: List[str], embeddings: List[List[float]]) -> int:
+        return self._submit("add", (documents, ids, embeddings))
+
+    def delete(self, ids: List[str]) -> int:
+        return self._submit("delete", ids)
+
+    def _take_run(self) -> List[Tuple[str, Any, Future]]:
+        """Pop the longest run of same-kind operations at the head of the queue (adds up to max_batch)."""
+        kind = self._queue[0][0]
+        run, size = [], 0
+        while self._queue and self._queue[0][0] == kind:
+            n = len(self._queue[0][1][1]) if kind == "add" else 1
+            if run and kind == "add" and size + n > self.max_batch:
+                break
+            run.append(self._queue.popleft())
+            size += n
+        return run
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stop:
+                    self._cond.wait()
+                if self._stop and not self._queue:
+                    return
+                # Give concurrent writers a moment to join a batch that isn't full yet
+                deadline = time.monotonic() + self.linger
+                while (not self._stop and self._queue[0][0] == "add"
+                       and sum(len(p[1]) for k, p, _ in self._queue if k == "add") < self.max_batch):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                run = self._take_run()
+            self._apply(run)
+
+    def _write(self, kind: str, run: List[Tuple[str, Any, Future]]) -> List[int]:
+        if kind == "add":
+            documents, ids, embeddings = [], [], []
+            for _, (d, i, e), _ in run:
+                documents += d
+                ids += i
+                embeddings += e
+            for start in range(0, len(documents), self.max_batch):
+                end = start + self.max_batch
+                self.backend.add_documents(documents[start:end], ids[start:end], embeddings[start:end])
+                self.stats["batches"] += 1
+            self.stats["documents"] += len(documents)
+            return [len(payload[1]) for _, payload, _ in run]
+        ids = list(dict.fromkeys(i for _, payload, _ in run for i in payload))
+        self.backend.delete(ids)
+        self.stats["deletes"] += 1
+        return [len(payload) for _, payload, _ in run]
+
+    def _apply(self, run: List[Tuple[str, Any, Future]]):
+        kind = run[0][0]
+        try:
+            results = self._write(kind, run)
+        except Exception as e:
+            # Part of the batch may have been written before it failed
+            self.revision += 1
+            if len(run) > 1:
+                logger.warning(f"[VECTOR SERVICE] {kind} batch of {len(run)} requests failed ({e}); retrying one by one")
+                for entry in run:
+                    self._apply([entry])
+                return
+            logger.exception(f"[VECTOR SERVICE] {kind} request failed")
+            self.stats["failed"] += 1
+            run[0][2].set_exception(e)
+            return
+        self.revision += 1
+        for (_, _, future), result in zip(run, results):
+            future.set_result(result)
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+def _document(payload: Dict[str, Any]) -> Document:
+    return Document(id=payload.get("id"), page_content=payload["page_content"], metadata=payload.get("metadata") or {})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients can reuse pooled connections
+    protocol_version = "HTTP/1.1"
+    server: "VectorService"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, self.server.status())
+        elif self.path == "/revision":
+            self._reply(200, {"revision": self.server.batcher.revision})
+        else:
+            self._reply(404, {"error": f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path not in self.server.endpoints:
+            self._reply(404, {"error": f"unknown endpoint {self.path}"})
+            return
+        try:
+            self._reply(200, self.server.dispatch(self.path, body))
+        except KeyError as e:
+            self._reply(400, {"error": f"missing {e}"})
+        except Exception as e:
+            logger.exception(f"[VECTOR SERVICE] {self.path} failed")
+            self._reply(500, {"error": str(e)})
+
+
+class VectorService(ThreadingHTTPServer):
+    """HTTP front for one backend; reads run concurrently, writes go through a WriteBatcher."""
+
+    daemon_threads = True
+    endpoints = ("/add", "/delete", "/ids_for_source", "/search", "/count")
+
+    def __init__(self, backend: VectorBackend, host: str = "127.0.0.1", port: int = VECTOR_SERVICE_PORT,
+                 linger: float = VECTOR_SERVICE_LINGER):
+        super().__init__((host, port), _Handler)
+        self.backend = backend
+        self.batcher = WriteBatcher(backend, backend.max_batch_size, linger)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "count": self.backend.count(),
+            "revision": self.batcher.revision,
+            "max_batch_size": self.backend.max_batch_size,
+            "writes": dict(self.batcher.stats),
+        }
+
+    def dispatch(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        if path == "/add":
+            documents = [_document(d) for d in body["documents"]]
+            return {"added": self.batcher.add(documents, body["ids"], body["embeddings"]), "revision": self.batcher.revision}
+        if path == "/delete":
+            return {"deleted": self.batcher.delete(body["ids"]), "revision": self.batcher.revision}
+        if path == "/ids_for_source":
+            return {"ids": self.backend.ids_for_source(body["source"])}
+        if path == "/search":
+            results = self.backend.similarity_search(body["vector"], k=body.get("k", 4))
+            return {
+                "results": [
+                    {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata, "relevance": relevance}
+                    for doc, relevance in results
+                ],
+                "revision": self.batcher.revision,
+            }
+        if path == "/count":
+            return {"count": self.backend.count()}
+        raise KeyError(path)
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+        self.backend.close()
+
+
+# -------------------------
+# Client side
+# -------------------------
+class RemoteBackend(VectorBackend):
+    """
+    VectorBackend that forwards to a VectorService.
+    Documents and queries are embedded here, so the local embedding cache
+    still applies; one pooled HTTP client is shared by every thread. The
+    server's revision is re-read at most every `revision_ttl` seconds, so
+    cached retrievals see other processes' writes within that delay.
+    """
+
+    name = "remote"
+
+    def __init__(self, embedding: Embeddings, host: str = VECTOR_SERVICE_HOST, port: int = VECTOR_SERVICE_PORT,
+                 timeout: float = VECTOR_SERVICE_TIMEOUT, revision_ttl: float = VECTOR_SERVICE_REVISION_TTL):
+        self.embedding = embedding
+        self.revision_ttl = revision_ttl
+        self.base_url = f"http://{host}:{port}"
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+        )
+        status = self._client.get("/health").raise_for_status().json()
+        self.max_batch_size = status["max_batch_size"]
+        self._revision = status["revision"]
+        self._revision_at = time.monotonic()
+        logger.info(f"[VECTOR SERVICE] Connected to {self.base_url} ({status['backend']}, {status['count']} vectors)")
+
+    def _post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        reply = self._client.post(path, json=body).raise_for_status().json()
+        if "revision" in reply:
+            self._revision, self._revision_at = reply["revision"], time.monotonic()
+        return reply
+
+    def add_documents(self, documents: List[Document], ids: List[str],
+                      embeddings: Optional[List[List[float]]] = None):
+        if embeddings is None:
+            embeddings = self.embedding.embed_documents([doc.page_content for doc in documents])
+        self._post("/add", {
+            "documents": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+            "ids": list(ids),
+            "embeddings": [list(map(float, vector)) for vector in embeddings],
+        })
+
+    def delete(self, ids: Sequence[str]):
+        self._post("/delete", {"ids": list(ids)})
+
+    def ids_for_source(self, source: str) -> List[str]:
+        return self._post("/ids_for_source", {"source": source})["ids"]
+
+    def similarity_search(self, vector: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        reply = self._post("/search", {"vector": list(map(float, vector)), "k": k})
+        return [(_document(r), r["relevance"]) for r in reply["results"]]
+
+    def count(self) -> int:
+        return self._post("/count", {})["count"]
+
+    def revision(self) -> int:
+        # Writes by other processes bump the server's revision; ask for it when ours is stale
+        if time.monotonic() - self._revision_at >= self.revision_ttl:
+            revision = self._client.get("/revision").raise_for_status().json()["revision"]
+            self._revision, self._revision_at = revision, time.monotonic()
+        return self._revision
+
+    def close(self):
+        self._client.close()
+
+
+def main(argv=None):
+    from config.database import CHROMA_COLLECTION_NAME, DB_LOCATION, VECTOR_BACKEND, backend_options, embedding_model
+
+    parser = argparse.ArgumentParser(description="Shared vector-store service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=VECTOR_SERVICE_PORT)
+    parser.add_argument("--backend", default=VECTOR_BACKEND, choices=["chroma", "numpy"])
+    parser.add_argument("--location", default=DB_LOCATION)
+    parser.add_argument("--linger", type=float, default=VECTOR_SERVICE_LINGER)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    backend = create_backend(args.backend, embedding_model.get_embedding_model(), args.location,
+                             CHROMA_COLLECTION_NAME, **backend_options(args.backend))
+    service = VectorService(backend, args.host, args.port, args.linger)
+    logger.info(f"[VECTOR SERVICE] Serving {args.backend} store at {args.location} on http://{args.host}:{args.port}")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.server_close()
+        logger.info(f"[VECTOR SERVICE] Stopped; writes: {service.batcher.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,15 @@ import logging , environ , pathlib
 from typing import Literal
 from models.LLM import LLM
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 
+from core.memory import ConversationMemory, estimate_tokens
 from core.state import AgentState
+from core.tool_executor import ParallelToolNode
+from core.tracing import tracer
 from core.tools import __all__ as tool_functions
+from tools.system.shell import KILL_GRACE, RUN_COMMAND_TIMEOUT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +27,25 @@ environ.Env.read_env(base_dir / '.env')
 _model_chain = None
 llm = LLM().initialize()
 
+# Prompt token budget, overridable per model: CONTEXT_TOKEN_BUDGETS=llama3.2=8192,qwen2.5=16384
+CONTEXT_TOKEN_BUDGET = env.dict("CONTEXT_TOKEN_BUDGETS", cast={"value": int}, default={}).get(
+    env("MODEL_NAME", default=""), env.int("CONTEXT_TOKEN_BUDGET", default=6000)
+)
+memory = ConversationMemory(CONTEXT_TOKEN_BUDGET, summarizer=llm)
+
+# Tool calls from one response run concurrently, each bounded by its timeout
+# in seconds: TOOL_TIMEOUTS=run_command=120,check_internet=5
+tool_node = ParallelToolNode(
+    tool_functions,
+    max_workers=env.int("TOOL_MAX_WORKERS", default=4),
+    default_timeout=env.float("TOOL_TIMEOUT", default=30.0),
+    timeouts={
+        # run_command kills its process group at RUN_COMMAND_TIMEOUT; leave time to report the partial output
+        "run_command": RUN_COMMAND_TIMEOUT + KILL_GRACE + 5.0,
+        **env.dict("TOOL_TIMEOUTS", cast={"value": float}, default={}),
+    },
+)
+
 def get_model_chain():
     global _model_chain
     if _model_chain is None:
@@ -37,6 +60,38 @@ def get_model_chain():
 # -------------------------
 
 
+def _prepare_messages(state: AgentState):
+    # Trim history to the token budget; the system prompt stays the first message
+    messages = memory.build_prompt(state["messages"])
+
+    # Debug logging for context tracking
+    logger.info(
+        f"[AGENT] Processing with {len(messages)}/{len(state['messages'])} messages, "
+        f"~{estimate_tokens(messages)} prompt tokens (budget {memory.budget_tokens})"
+    )
+    return messages
+
+
+def _log_response(response, span):
+    logger.info(f"[MODEL RESPONSE] {response.content}")
+    usage = response.usage_metadata or {}
+    if usage:
+        logger.info(f"[AGENT] Prompt tokens: {usage.get('input_tokens')}, completion tokens: {usage.get('output_tokens')}")
+    completion = usage.get("output_tokens")
+    span.set(
+        prompt_tokens=usage.get("input_tokens"),
+        completion_tokens=completion,
+        tool_calls=len(response.tool_calls),
+    )
+    if completion:
+        tokens_per_sec = completion / (span.duration_ms / 1000)
+        span.set(tokens_per_sec=round(tokens_per_sec, 2))
+        tracer.observe("llm.tokens_per_sec", tokens_per_sec)
+        tracer.observe("llm.completion_tokens", completion)
+    if usage.get("input_tokens"):
+        tracer.observe("llm.prompt_tokens", usage["input_tokens"])
+
+
 def call_model(state: AgentState):
     """
     The main agent node.
@@ -44,16 +99,25 @@ def call_model(state: AgentState):
     1. Checking for pending confirmations.
     2. Invoking the LLM.
     """
-    messages = state["messages"]
-
-    # Debug logging for context tracking
-    logger.info(f"[AGENT] Processing with {len(messages)} messages in context")
+    messages = _prepare_messages(state)
 
     # 1. Normal AI Invocation
     # Lazy load the model chain if not ready
     chain = get_model_chain()
-    response = chain.invoke(messages , config={"max_output_tokens": env("MAX_OUTPUT_TOKEN", default=512)})
-    logger.info(f"[MODEL RESPONSE] {response.content}")
+    with tracer.span("llm.call", messages=len(messages)) as span:
+        response = chain.invoke(messages , config={"max_output_tokens": env("MAX_OUTPUT_TOKEN", default=512)})
+        _log_response(response, span)
+
+    return {"messages": [response]}
+
+
+async def acall_model(state: AgentState):
+    """Async variant of `call_model`, used by `app.ainvoke`/`app.astream` so a cancelled turn aborts the request."""
+    messages = _prepare_messages(state)
+    chain = get_model_chain()
+    with tracer.span("llm.call", messages=len(messages)) as span:
+        response = await chain.ainvoke(messages , config={"max_output_tokens": env("MAX_OUTPUT_TOKEN", default=512)})
+        _log_response(response, span)
 
     return {"messages": [response]}
 
@@ -80,8 +144,8 @@ def should_continue(state: AgentState) -> Literal["tools", "__end__", "call_mode
 # -------------------------
 graph = StateGraph(AgentState)
 
-graph.add_node("agent", call_model)
-graph.add_node("tools", ToolNode(tools=tool_functions))
+graph.add_node("agent", RunnableLambda(call_model, afunc=acall_model, name="agent"))
+graph.add_node("tools", tool_node.as_runnable())
 
 graph.set_entry_point("agent")
 
@@ -0,0 +1,164 @@
+import logging
+import pathlib
+import re
+from typing import Callable, Dict, List, Tuple
+
+import environ
+import numpy as np
+from langchain_core.documents import Document
+
+from core.text import normalize_text
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+CONTEXT_COMPRESSION = env.bool("CONTEXT_COMPRESSION", default=True)
+CONTEXT_MAX_TOKENS = env.int("CONTEXT_MAX_TOKENS", default=500)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_LINE_BREAK = re.compile(r"\s*\n\s*")
+# Text without punctuation (tables, lists) is cut into pieces of about this size
+MAX_SENTENCE_CHARS = 400
+
+
+def estimate_tokens(text: str) -> int:
+    # Same ~4 characters per token estimate as core.memory
+    return len(text) // 4 + 1
+
+
+def split_sentences(text: str) -> List[str]:
+    text = _LINE_BREAK.sub(" ", text).strip()
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        while len(sentence) > MAX_SENTENCE_CHARS:
+            cut = sentence.rfind(" ", 0, MAX_SENTENCE_CHARS)
+            cut = cut if cut > 0 else MAX_SENTENCE_CHARS
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def merge_overlapping(a: str, b: str, probe: int = 32):
+    """
+    Join two chunks if the end of `a` is the start of `b` (chunk overlap),
+    keeping the longest overlap of at least `probe` characters; None otherwise.
+    """
+    if len(b) < probe:
+        return None
+    head = b[:probe]
+    start = a.find(head)
+    while start != -1:
+        if b.startswith(a[start:]):
+            return a + b[len(a) - start:]
+        start = a.find(head, start + 1)
+    return None
+
+
+def cite(metadata: dict) -> str:
+    """Human-readable citation: the source plus its page range, when known."""
+    source = metadata.get("source", "unknown")
+    page, page_end = metadata.get("page"), metadata.get("page_end")
+    if page is None:
+        return source
+    if page_end is not None and page_end != page:
+        return f"{source}, pp. {page}-{page_end}"
+    return f"{source}, p. {page}"
+
+
+class ContextCompressor:
+    """
+    Extractive compression of retrieved chunks before they enter the prompt.
+    Chunks from the same source and pages are merged where they overlap,
+    split into sentences and de-duplicated. Each sentence is scored by
+    cosine similarity to the query and the best ones are kept until
+    `max_tokens` is used up. Kept sentences stay in document order and are
+    returned as one Document per source/page range, with its metadata, so
+    citations survive. Sentence embeddings go through the embedding engine
+    and its persistent cache, so recurring chunks are embedded once.
+    """
+
+    def __init__(self, embed_query: Callable[[str], List[float]],
+                 embed_documents: Callable[[List[str]], List[List[float]]],
+                 max_tokens: int = CONTEXT_MAX_TOKENS, enabled: bool = CONTEXT_COMPRESSION):
+        self.embed_query = embed_query
+        self.embed_documents = embed_documents
+        self.max_tokens = max_tokens
+        self.enabled = enabled
+
+    @staticmethod
+    def _group(documents: List[Document]) -> List[Tuple[dict, List[str]]]:
+        """Merge overlapping chunks of the same source/page range; keeps retrieval order."""
+        groups: Dict[tuple, Tuple[dict, List[str]]] = {}
+        for doc in documents:
+            key = (doc.metadata.get("source"), doc.metadata.get("page"), doc.metadata.get("page_end"))
+            texts = groups.setdefault(key, (dict(doc.metadata), []))[1]
+            text = doc.page_content
+            for i, other in enumerate(texts):
+                merged = merge_overlapping(other, text) or merge_overlapping(text, other)
+                if merged is not None:
+                    texts[i] = merged
+                    break
+            else:
+                texts.append(text)
+        return list(groups.values())
+
+    def compress(self, query: str, documents: List[Document]) -> List[Document]:
+        if not self.enabled or not documents:
+            return documents
+
+        with tracer.span("context.compress", chunks=len(documents)) as span:
+            sentences: List[str] = []
+            owners: List[int] = []
+            seen = set()
+            groups = self._group(documents)
+            for g, (_, texts) in enumerate(groups):
+                for text in texts:
+                    for sentence in split_sentences(text):
+                        key = normalize_text(sentence).lower()
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        sentences.append(sentence)
+                        owners.append(g)
+
+            tokens_in = sum(estimate_tokens(d.page_content) for d in documents)
+            if sum(estimate_tokens(s) for s in sentences) <= self.max_tokens:
+                chosen = range(len(sentences))
+            else:
+                chosen = self._select(query, sentences)
+
+            kept: Dict[int, List[str]] = {}
+            for i in sorted(chosen):
+                kept.setdefault(owners[i], []).append(sentences[i])
+            # Groups keep retrieval order, so the best-ranked source still comes first
+            compressed = [Document(page_content=" ".join(kept[g]), metadata=groups[g][0]) for g in sorted(kept)]
+            tokens_out = sum(estimate_tokens(d.page_content) for d in compressed)
+            span.set(sentences=len(sentences), kept=len(chosen), tokens_in=tokens_in, tokens_out=tokens_out)
+
+        logger.info(f"[CONTEXT] Compressed {len(documents)} chunks from ~{tokens_in} to ~{tokens_out} tokens")
+        return compressed
+
+    def _select(self, query: str, sentences: List[str]) -> List[int]:
+        """Indices of the most query-similar sentences that fit in the token budget."""
+        matrix = np.asarray(self.embed_documents(sentences), dtype=np.float32)
+        vector = np.asarray(self.embed_query(query), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+        scores = (matrix @ vector) / np.maximum(norms, 1e-12)
+
+        order = np.argsort(scores)[::-1]
+        chosen, budget = [], self.max_tokens
+        for i in order:
+            cost = estimate_tokens(sentences[i])
+            if cost <= budget:
+                chosen.append(int(i))
+                budget -= cost
+            if budget <= 0:
+                break
+        # A budget smaller than any sentence still yields the best one
+        return chosen or [int(order[0])]
@@ -0,0 +1,172 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Marker main.py uses when it appends retrieved chunks to a user message
+CONTEXT_MARKER = "\n\n[Context from vector store]:"
+SUMMARY_ID = "conversation-summary"
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a study session between a student and their assistant. "
+    "Keep facts, definitions, decisions, file names and open questions; drop greetings and filler. "
+    "Answer with the summary only, at most {words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew conversation to fold in:\n{conversation}"
+)
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Cheap token estimate: ~4 characters per token plus per-message overhead."""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += len(content) // 4 + 4
+        if isinstance(message, AIMessage) and message.tool_calls:
+            total += sum(len(str(call.get("args", ""))) // 4 + 8 for call in message.tool_calls)
+    return total
+
+
+def strip_context(message: BaseMessage) -> BaseMessage:
+    """Return the message without an injected vector-store context block."""
+    if isinstance(message, HumanMessage) and isinstance(message.content, str) and CONTEXT_MARKER in message.content:
+        return HumanMessage(content=message.content.split(CONTEXT_MARKER, 1)[0], id=message.id)
+    return message
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a HumanMessage."""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+class ConversationMemory:
+    """
+    Keeps the prompt inside a token budget.
+    The system prompt is always sent first and unchanged so the model
+    server can reuse its KV cache for it. Retrieved context is only kept on
+    the latest turn. When history grows past `summarize_at` of the budget,
+    the oldest turns are folded into a rolling summary on a background
+    thread; until that finishes, the oldest turns are simply left out of the
+    prompt.
+    """
+
+    def __init__(self, budget_tokens: int, summarizer=None, keep_recent_turns: int = 4,
+                 summarize_at: float = 0.75, summary_words: int = 200):
+        self.budget_tokens = budget_tokens
+        self.summarizer = summarizer
+        self.keep_recent_turns = keep_recent_turns
+        self.summarize_at = summarize_at
+        self.summary_words = summary_words
+        self.summary = ""
+        self._folded_ids: set = set()
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+    # -------------------------
+    # Prompt assembly
+    # -------------------------
+    def _split(self, messages: Sequence[BaseMessage]):
+        with self._lock:
+            folded_ids = self._folded_ids
+        system = [m for m in messages[:1] if isinstance(m, SystemMessage) and m.id != SUMMARY_ID]
+        rest = [m for m in messages[len(system):] if m.id != SUMMARY_ID and m.id not in folded_ids]
+        return system, split_turns(rest)
+
+    def _head(self, system: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        The system prompt with the rolling summary appended to it. Some chat
+        models (Gemini) reject a second system message, and appending leaves
+        the prompt itself an unchanged prefix.
+        """
+        with self._lock:
+            summary = self.summary
+        if not summary:
+            return list(system)
+        note = f"[Summary of earlier conversation]:\n{summary}"
+        if not system:
+            return [SystemMessage(content=note, id=SUMMARY_ID)]
+        return [SystemMessage(content=f"{system[0].content}\n\n{note}", id=system[0].id)]
+
+    def build_prompt(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """Messages to send to the model for this call, within the token budget."""
+        system, turns = self._split(messages)
+        turns = [
+            turn if i == len(turns) - 1 else [strip_context(m) for m in turn]
+            for i, turn in enumerate(turns)
+        ]
+        head = self._head(system)
+        available = self.budget_tokens - estimate_tokens(head)
+
+        # Newest turns first; the current turn is always kept
+        kept: List[List[BaseMessage]] = []
+        for turn in reversed(turns):
+            cost = estimate_tokens(turn)
+            if kept and cost > available:
+                break
+            kept.append(turn)
+            available -= cost
+        dropped = len(turns) - len(kept)
+        if dropped:
+            logger.info(f"[MEMORY] {dropped} old turns left out of the prompt to fit {self.budget_tokens} tokens")
+        return head + [m for turn in reversed(kept) for m in turn]
+
+    # -------------------------
+    # Rolling summary
+    # -------------------------
+    def compact(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """
+        Return the conversation state to carry forward: system prompt and
+        unsummarized turns, with retrieved context removed from finished
+        turns. The summary itself is kept here and added by `build_prompt`.
+        Starts a background summary when history is large.
+        """
+        system, turns = self._split(messages)
+        turns = [[strip_context(m) for m in turn] for turn in turns]
+        history_tokens = sum(estimate_tokens(turn) for turn in turns)
+
+        with self._lock:
+            idle = self._pending is None or self._pending.done()
+        if (
+            idle
+            and self.summarizer is not None
+            and len(turns) > self.keep_recent_turns
+            and history_tokens > self.summarize_at * self.budget_tokens
+        ):
+            to_fold = [m for turn in turns[: -self.keep_recent_turns] for m in turn]
+            with self._lock:
+                self._pending = self._executor.submit(self._fold, to_fold)
+
+        return system + [m for turn in turns for m in turn]
+
+    def _fold(self, messages: List[BaseMessage]):
+        conversation = "\n".join(
+            f"{type(m).__name__.replace('Message', '')}: {m.content}"
+            for m in messages
+            if isinstance(m, (HumanMessage, AIMessage, ToolMessage)) and m.content
+        )
+        with self._lock:
+            summary = self.summary
+        prompt = SUMMARY_PROMPT.format(
+            words=self.summary_words, summary=summary or "(none)", conversation=conversation
+        )
+        try:
+            response = self.summarizer.invoke([HumanMessage(content=prompt)])
+        except Exception as e:
+            logger.error(f"[MEMORY] Summarization failed, keeping full history: {e}")
+            return
+        summary = response.content.strip() if isinstance(response.content, str) else str(response.content)
+        with self._lock:
+            self.summary = summary
+            # A new set, so a prompt being built keeps a consistent view
+            self._folded_ids = self._folded_ids | {m.id for m in messages if m.id}
+        logger.info(f"[MEMORY] Folded {len(messages)} messages into the rolling summary")
@@ -0,0 +1,168 @@
+import logging
+import pathlib
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+import environ
+import numpy as np
+
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+ROUTER_ENABLED = env.bool("ROUTER_ENABLED", default=True)
+# Minimum lead of the best route's similarity over the runner-up
+ROUTER_MARGIN = env.float("ROUTER_MARGIN", default=0.03)
+
+DOCUMENTS = "documents"
+WEB = "web"
+NONE = "none"
+
+# Things the assistant's tools act on; a command verb only means "no retrieval" with one of these
+_TOOL_OBJECTS = (
+    r"(the |my |a |an )?(new )?(web )?(browser|terminal|shell|console|youtube|firefox|chrome|chromium|"
+    r"vs ?code|code editor|editor|spotify|music|song|video|app|application|program|window|tab|"
+    r"[\w.-]+ (app|process|window|tab)|process(es)?|pid \d+|\d+)\b"
+)
+_NETWORK_OBJECTS = r"(the |my )?(wi-?fi|internet|network|vpn|bluetooth|connection)\b"
+
+# Checked in order; the first matching rule decides without any embedding call.
+# NONE only matches whole commands and small talk; anything else goes to the classifier,
+# so study questions like "run me through the Krebs cycle" or "terminal velocity" still retrieve.
+_RULES = [
+    (DOCUMENTS, re.compile(
+        r"\b(pdfs?|documents?|notes?|lectures?|slides?|chapters?|textbook|book|syllabus|"
+        r"according to|in my (files|materials))\b", re.I)),
+    (WEB, re.compile(
+        r"\b(search (the )?(web|internet|online)|google|look (it )?up online|latest|news|weather|"
+        r"forecast|stock price|price of|exchange rate|who won|release date)\b", re.I)),
+    (NONE, re.compile(
+        r"^\s*(hi|hello|hey|yo|thanks|thank you|ok|okay|bye|good (morning|night|evening))( miku)?[\s!.,]*$|"
+        r"\bwhat time is it\b|\bwhat'?s the time\b|\bwhat day is (it|today)\b|"
+        r"^\s*(please |can you |could you )?("
+        rf"(open|launch|start|close|quit|exit|kill|stop|restart|play|pause) {_TOOL_OBJECTS}|"
+        r"run (the |this |my )?(command|script)\b|run `|"
+        rf"((dis)?connect( to)?|turn (on|off)|check|test) {_NETWORK_OBJECTS}|"
+        r"(list|show)( me)? (the |all |my )?(running )?(process(es)?|apps|programs)\b"
+        r")", re.I)),
+]
+
+# Labelled examples for the nearest-centroid fallback
+EXAMPLES: Dict[str, List[str]] = {
+    DOCUMENTS: [
+        "explain the difference between mitosis and meiosis",
+        "how does backpropagation work",
+        "define price elasticity of demand",
+        "prove the fundamental theorem of calculus",
+        "give me practice questions on thermodynamics",
+        "quiz me on the causes of the french revolution",
+        "what are the steps of the krebs cycle",
+        "help me understand eigenvalues and eigenvectors",
+    ],
+    WEB: [
+        "what is happening in the world right now",
+        "who is the current president of france",
+        "when does the next iphone come out",
+        "find me a good tutorial about docker",
+        "what are people saying about the new movie",
+        "how much does a flight to tokyo cost",
+    ],
+    NONE: [
+        "how are you today",
+        "tell me a joke",
+        "that's all for now",
+        "you're the best miku",
+        "show me what is using my cpu",
+        "check if i am connected",
+        "list the files in my home folder",
+        "sing me a song",
+    ],
+}
+
+
+class Route:
+    def __init__(self, target: str, reason: str, score: Optional[float] = None):
+        self.target = target
+        self.reason = reason
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"Route({self.target!r}, {self.reason!r})"
+
+
+class RetrievalRouter:
+    """
+    Decides per turn whether retrieval is worth it: the document store, the
+    pages read from the web this session, or nothing at all.
+    WEB only selects which index is searched; it never searches the web by
+    itself. Fresh information comes from the model calling search_and_read,
+    whose pages then land in the session index for follow-up questions.
+    Keyword rules handle the obvious cases for free. Anything else is
+    embedded (through the database's query-embedding cache, so a later
+    search reuses the vector) and assigned to the nearest centroid of
+    `EXAMPLES`. When no route clearly wins, the turn goes to the documents,
+    as it did before routing existed.
+    """
+
+    def __init__(self, embed_query: Callable[[str], List[float]],
+                 embed_documents: Callable[[List[str]], List[List[float]]],
+                 margin: float = ROUTER_MARGIN, enabled: bool = ROUTER_ENABLED):
+        self.embed_query = embed_query
+        self.embed_documents = embed_documents
+        self.margin = margin
+        self.enabled = enabled
+        self._labels: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def prepare(self):
+        """Embed the examples once; called during warm-up or on the first ambiguous turn."""
+        with self._lock:
+            if self._centroids is not None:
+                return
+            labels = list(EXAMPLES)
+            texts = [text for label in labels for text in EXAMPLES[label]]
+            vectors = self._unit(self.embed_documents(texts))
+            centroids, start = [], 0
+            for label in labels:
+                end = start + len(EXAMPLES[label])
+                centroids.append(vectors[start:end].mean(axis=0))
+                start = end
+            self._labels = labels
+            self._centroids = self._unit(centroids)
+
+    def classify(self, query: str) -> Route:
+        self.prepare()
+        similarities = self._centroids @ self._unit(self.embed_query(query))
+        order = np.argsort(similarities)[::-1]
+        best, runner_up = float(similarities[order[0]]), float(similarities[order[1]])
+        if best - runner_up < self.margin:
+            return Route(DOCUMENTS, "classifier unsure", best)
+        return Route(self._labels[order[0]], "classifier", best)
+
+    def route(self, query: str) -> Route:
+        with tracer.span("router") as span:
+            if not self.enabled:
+                route = Route(DOCUMENTS, "routing disabled")
+            else:
+                route = next((Route(target, "rule") for target, rule in _RULES if rule.search(query)), None)
+                if route is None:
+                    try:
+                        route = self.classify(query)
+                    except Exception as e:
+                        logger.warning(f"[ROUTER] Classifier failed, searching documents: {e}")
+                        route = Route(DOCUMENTS, "classifier failed")
+            span.set(route=route.target, reason=route.reason)
+        logger.info(f"[ROUTER] {route.target} ({route.reason})")
+        return route
@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first when several events are waiting
+PRIORITIES = {"exit": 0, "user": 1, "files": 5}
+
+
+class AgentRuntime:
+    """
+    Asyncio event loop around the agent.
+    Events are posted from any thread with `put((kind, data))`, like the
+    queue it replaces. Each user message starts its retrieval immediately on
+    a worker thread, even while another turn is still generating, and by
+    default cancels a generation that is still in flight, since the student
+    has moved on. Lower-priority events such as content-folder summaries
+    are coalesced and only run when no user turn is active.
+    """
+
+    def __init__(
+        self,
+        state: Dict[str, Any],
+        prepare: Callable[[str, Any], BaseMessage],
+        run_turn: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        compact: Callable[[List[BaseMessage]], List[BaseMessage]] = None,
+        on_turn_done: Callable[[Dict[str, Any]], None] = None,
+        interrupt: bool = True,
+    ):
+        self.state = state
+        self.prepare = prepare
+        self.run_turn = run_turn
+        self.compact = compact or (lambda messages: list(messages))
+        self.on_turn_done = on_turn_done
+        self.interrupt = interrupt
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._early: List[tuple] = []
+        self._early_lock = threading.Lock()
+        self._seq = itertools.count()
+        self._turn: Optional[asyncio.Task] = None
+        self._deferred: List[Any] = []
+
+    # -------------------------
+    # Event intake (thread-safe)
+    # -------------------------
+    def put(self, item):
+        kind, data = item
+        with self._early_lock:
+            if self._loop is None:
+                self._early.append(item)
+                return
+        self._loop.call_soon_threadsafe(self._enqueue, kind, data)
+
+    def _enqueue(self, kind: str, data: Any):
+        self._queue.put_nowait((PRIORITIES.get(kind, 10), next(self._seq), kind, data))
+
+    # -------------------------
+    # Dispatcher
+    # -------------------------
+    async def run(self):
+        self._queue = asyncio.PriorityQueue()
+        with self._early_lock:
+            self._loop = asyncio.get_running_loop()
+            for kind, data in self._early:
+                self._enqueue(kind, data)
+            self._early = []
+
+        while True:
+            _, _, kind, data = await self._queue.get()
+            if kind == "exit":
+                break
+            if kind == "user":
+                self._start_user_turn(data)
+            else:
+                self._deferred.append((kind, data))
+                self._maybe_run_deferred()
+
+        await self._cancel_turn()
+
+    def _busy(self) -> bool:
+        return self._turn is not None and not self._turn.done()
+
+    def _start_user_turn(self, data: Any):
+        previous = self._turn
+        if self.interrupt and self._busy():
+            logger.info("[RUNTIME] New input arrived, cancelling the in-flight turn")
+            previous.cancel()
+        self._turn = asyncio.create_task(
+            self._turn_after(previous, "user", lambda: asyncio.to_thread(self.prepare, "user", data))
+        )
+
+    def _maybe_run_deferred(self):
+        if self._busy() or not self._deferred:
+            return
+        deferred, self._deferred = self._deferred, []
+        # Several queued notifications become one turn
+        content = "\n\n".join(self.prepare(kind, data).content for kind, data in deferred)
+
+        async def make_message():
+            return HumanMessage(content=content)
+
+        self._turn = asyncio.create_task(self._turn_after(None, deferred[0][0], make_message))
+
+    async def _cancel_turn(self):
+        if self._busy():
+            self._turn.cancel()
+            await asyncio.wait([self._turn])
+
+    # -------------------------
+    # Turn execution
+    # -------------------------
+    @staticmethod
+    async def _settle(message_future: asyncio.Future) -> Optional[BaseMessage]:
+        """Result of a turn's input once it's ready, or None if preparing it failed."""
+        if not message_future.done():
+            try:
+                await asyncio.shield(message_future)
+            except asyncio.CancelledError:
+                # Cancelled again while waiting; the input is still being prepared
+                pass
+        if not message_future.done() or message_future.cancelled() or message_future.exception():
+            return None
+        return message_future.result()
+
+    async def _turn_after(self, previous: Optional[asyncio.Task], kind: str,
+                          make_message: Callable[[], Awaitable[BaseMessage]]):
+        appended = False
+        message = None
+        message_future = None
+        with tracer.span("turn", kind=kind) as span, tracer.maybe_profile("turn"):
+            try:
+                # Retrieval starts now, overlapping whatever the previous turn is still doing
+                message_future = asyncio.ensure_future(make_message())
+                if previous is not None:
+                    # Wait without propagating cancellation in either direction
+                    await asyncio.wait([previous])
+                # Shielded so cancelling the turn doesn't throw away the input
+                message = await asyncio.shield(message_future)
+                self.state["messages"] = self.compact(self.state["messages"]) + [message]
+                appended = True
+                self.state = await self.run_turn(self.state)
+                if self.on_turn_done:
+                    self.on_turn_done(self.state)
+            except asyncio.CancelledError:
+                span.set(cancelled=True)
+                logger.info("[RUNTIME] Turn cancelled")
+                if not appended:
+                    if message is None and message_future is not None:
+                        message = await self._settle(message_future)
+                    if message is not None:
+                        # Keep the superseded input as context for the next turn
+                        self.state["messages"] = self.state["messages"] + [message]
+                raise
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                logger.error(f"An error occurred: {e}")
+            finally:
+                asyncio.get_running_loop().call_soon(self._maybe_run_deferred)
@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+PROCESS_STARTED = time.perf_counter()
+
+
+class Component:
+    def __init__(self, name: str, loader: Callable[[], Any], depends: Iterable[str] = ()):
+        self.name = name
+        self.loader = loader
+        self.depends = list(depends)
+        self.future: Future = Future()
+        self.claimed = False
+        self.running = False
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.thread: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if not self.claimed:
+            return "not loaded"
+        if not self.future.done():
+            return "loading"
+        return "failed" if self.future.exception() else "ready"
+
+
+class StartupManager:
+    """
+    Loads expensive components on demand, at most once.
+    `get(name)` returns a component, loading it (and its dependencies) on
+    the calling thread if nobody has started it yet, or waiting for the
+    load already in progress. `warm_up(names)` queues loads on background
+    threads so they overlap each other and the user's first keystrokes; a
+    queued load that someone needs before a worker reaches it is run by
+    whoever needs it, so workers never wait on loads stuck behind them.
+    Start/finish times are kept for `timeline()`.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._components: Dict[str, Component] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+
+    def register(self, name: str, loader: Callable[[], Any], depends: Iterable[str] = ()):
+        self._components[name] = Component(name, loader, depends)
+
+    def _claim(self, name: str) -> bool:
+        with self._lock:
+            component = self._components[name]
+            if component.claimed:
+                return False
+            component.claimed = True
+            return True
+
+    def _start(self, name: str) -> bool:
+        """Take over loading `name` unless some thread is already running its loader."""
+        with self._lock:
+            component = self._components[name]
+            if component.running:
+                return False
+            component.claimed = component.running = True
+            return True
+
+    def _load_queued(self, name: str):
+        # The load may already have been run inline by a thread that needed it
+        if self._start(name):
+            self._load(name)
+
+    def _load(self, name: str):
+        component = self._components[name]
+        try:
+            for dependency in component.depends:
+                self.get(dependency)
+            component.thread = threading.current_thread().name
+            component.started = time.perf_counter()
+            with tracer.span(f"startup.{name}"):
+                value = component.loader()
+            component.finished = time.perf_counter()
+            logger.info(f"[STARTUP] {name} ready in {component.finished - component.started:.2f}s")
+            component.future.set_result(value)
+        except BaseException as e:
+            component.finished = time.perf_counter()
+            logger.error(f"[STARTUP] {name} failed to load: {e}")
+            component.future.set_exception(e)
+
+    def get(self, name: str, timeout: float = None) -> Any:
+        if self._start(name):
+            self._load(name)
+        return self._components[name].future.result(timeout)
+
+    def is_ready(self, name: str) -> bool:
+        return self._components[name].status == "ready"
+
+    def warm_up(self, names: Iterable[str]) -> List[Future]:
+        """Start loading `names` in the background; returns their futures."""
+        futures = []
+        for name in names:
+            if name not in self._components:
+                logger.warning(f"[STARTUP] Unknown component for warm-up: {name}")
+                continue
+            if self._claim(name):
+                self._executor.submit(self._load_queued, name)
+            futures.append(self._components[name].future)
+        return futures
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        rows = []
+        for component in self._components.values():
+            rows.append({
+                "component": component.name,
+                "status": component.status,
+                "start_s": round(component.started - PROCESS_STARTED, 3) if component.started else None,
+                "end_s": round(component.finished - PROCESS_STARTED, 3) if component.finished else None,
+                "thread": component.thread,
+            })
+        return sorted(rows, key=lambda row: (row["start_s"] is None, row["start_s"] or 0))
+
+    def report(self):
+        lines = [f"{'component':<14}{'status':<12}{'start':>8}{'end':>8}  thread"]
+        for row in self.timeline():
+            start = f"{row['start_s']:.2f}" if row["start_s"] is not None else "-"
+            end = f"{row['end_s']:.2f}" if row["end_s"] is not None else "-"
+            lines.append(f"{row['component']:<14}{row['status']:<12}{start:>8}{end:>8}  {row['thread'] or '-'}")
+        logger.info("[STARTUP] Timeline (seconds since start):\n" + "\n".join(lines))
+
+
+startup = StartupManager()
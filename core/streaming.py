@@ -0,0 +1,139 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Node whose model tokens are streamed to the user
+AGENT_NODE = "agent"
+
+
+class TurnStats:
+    """Latency and throughput of one streamed agent turn."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.chunks = 0
+        self.output_tokens = 0
+        self.tool_calls = 0
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return self.first_token_at - self.started if self.first_token_at else None
+
+    @property
+    def tokens_per_sec(self) -> float:
+        if not self.first_token_at or not self.finished:
+            return 0.0
+        duration = self.finished - self.first_token_at
+        return self.output_tokens / duration if duration > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ttft": round(self.ttft, 3) if self.ttft is not None else None,
+            "total": round((self.finished or time.perf_counter()) - self.started, 3),
+            "output_tokens": self.output_tokens,
+            "tokens_per_sec": round(self.tokens_per_sec, 2),
+            "tool_calls": self.tool_calls,
+        }
+
+
+def _handle_update(update: Dict[str, Any], stats: TurnStats, on_event: Optional[Callable[[str, Any], None]]):
+    for node, delta in (update or {}).items():
+        for message in (delta or {}).get("messages", []):
+            if isinstance(message, AIMessage):
+                usage = message.usage_metadata or {}
+                if usage.get("output_tokens"):
+                    stats.output_tokens += usage["output_tokens"]
+                for call in message.tool_calls:
+                    stats.tool_calls += 1
+                    if on_event:
+                        on_event("tool_call", call)
+            elif isinstance(message, ToolMessage) and on_event:
+                on_event("tool_result", message)
+
+
+class _TurnCollector:
+    """Consumes (mode, chunk) pairs from a multi-mode graph stream."""
+
+    STREAM_MODES = ["messages", "updates", "values"]
+
+    def __init__(self, state, on_token, on_event):
+        self.stats = TurnStats()
+        self.final_state = state
+        self.on_token = on_token
+        self.on_event = on_event
+        self._pending_output_chunks = 0
+
+    def consume(self, mode: str, chunk: Any):
+        stats = self.stats
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") != AGENT_NODE or not isinstance(message, AIMessageChunk):
+                return
+            text = message.content if isinstance(message.content, str) else ""
+            if not text:
+                return
+            if stats.first_token_at is None:
+                stats.first_token_at = time.perf_counter()
+            stats.chunks += 1
+            self._pending_output_chunks += 1
+            if self.on_token:
+                self.on_token(text)
+        elif mode == "updates":
+            before = stats.output_tokens
+            _handle_update(chunk, stats, self.on_event)
+            if stats.output_tokens == before:
+                # Backend reported no usage; fall back to one token per streamed chunk
+                stats.output_tokens += self._pending_output_chunks
+            self._pending_output_chunks = 0
+        elif mode == "values":
+            self.final_state = chunk
+
+    def finish(self) -> Tuple[Dict[str, Any], TurnStats]:
+        self.stats.finished = time.perf_counter()
+        logger.info(f"[STREAM] Turn stats: {self.stats.as_dict()}")
+        if self.stats.ttft is not None:
+            tracer.observe("stream.ttft.ms", self.stats.ttft * 1000)
+        span = tracer.current()
+        if span is not None:
+            span.set(**self.stats.as_dict())
+        return self.final_state, self.stats
+
+
+def stream_turn(
+    app,
+    state: Dict[str, Any],
+    on_token: Callable[[str], None] = None,
+    on_event: Callable[[str, Any], None] = None,
+) -> Tuple[Dict[str, Any], TurnStats]:
+    """
+    Run one agent turn through the compiled graph's `stream`.
+    Model tokens from the agent node are passed to `on_token` as they are
+    generated, and tool calls/results to `on_event`. Returns the final graph
+    state, identical to what `app.invoke` would have produced, and the
+    turn's timing stats.
+    """
+    collector = _TurnCollector(state, on_token, on_event)
+    for mode, chunk in app.stream(state, stream_mode=_TurnCollector.STREAM_MODES):
+        collector.consume(mode, chunk)
+    return collector.finish()
+
+
+async def astream_turn(
+    app,
+    state: Dict[str, Any],
+    on_token: Callable[[str], None] = None,
+    on_event: Callable[[str, Any], None] = None,
+) -> Tuple[Dict[str, Any], TurnStats]:
+    """Async twin of `stream_turn`; cancelling the awaiting task stops the run."""
+    collector = _TurnCollector(state, on_token, on_event)
+    async for mode, chunk in app.astream(state, stream_mode=_TurnCollector.STREAM_MODES):
+        collector.consume(mode, chunk)
+    return collector.finish()
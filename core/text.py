@@ -0,0 +1,17 @@
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially re-flowed chunks share a cache entry."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a question: case, spacing and a trailing ?, ! or . don't
+    change its meaning. Other symbols do ("c++" vs "c#"), so they are kept.
+    """
+    return _TRAILING_PUNCTUATION.sub("", normalize_text(query).lower())
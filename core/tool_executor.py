@@ -0,0 +1,190 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import BaseTool
+
+from core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+def _content(output: Any) -> str:
+    return output if isinstance(output, str) else str(output)
+
+
+class _Job:
+    """One tool call on the pool; `started` is set when a worker picks it up."""
+
+    def __init__(self, call: Dict[str, Any]):
+        self.call = call
+        self.started: Optional[float] = None
+        self.future: Optional[Future] = None
+
+
+class ParallelToolNode:
+    """
+    Replacement for langgraph's ToolNode.
+    All tool calls of the last AIMessage run at the same time on a bounded
+    thread pool, each under its own timeout (`timeouts[name]`, else
+    `default_timeout` seconds) counted from when the call starts running,
+    so calls queued behind a full pool aren't penalized. A call that times
+    out or raises becomes an error ToolMessage instead of failing the turn.
+    Results are returned in call order, with the call's wall-clock time in
+    `response_metadata["elapsed_ms"]`.
+
+    Python threads can't be killed, so a timed-out call keeps its thread
+    until it returns. New work then goes to a fresh pool, so those threads
+    don't count against `max_workers`.
+    """
+
+    # How often a batch with queued calls checks whether they have started
+    POLL_INTERVAL = 0.05
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        max_workers: int = 4,
+        default_timeout: float = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.tools = {t.name: t for t in tools}
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self._lock = threading.Lock()
+        self._stuck = 0
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    # -------------------------
+    # Single call
+    # -------------------------
+    def _run_call(self, job: _Job):
+        job.started = started = time.perf_counter()
+        call = job.call
+        with tracer.span(f"tool.{call['name']}") as span:
+            tool = self.tools.get(call["name"])
+            if tool is None:
+                content, status = f"Error: {call['name']} is not a valid tool, try one of {sorted(self.tools)}.", "error"
+            else:
+                try:
+                    content, status = _content(tool.invoke(call["args"])), "success"
+                except Exception as e:
+                    logger.error(f"[TOOLS] {call['name']} failed: {e}")
+                    content, status = f"Error: {e}", "error"
+            span.set(status=status, output_chars=len(content))
+        return content, status, round((time.perf_counter() - started) * 1000, 1)
+
+    def _submit(self, job: _Job) -> _Job:
+        # Pool threads don't inherit context; copy it so tool spans nest under the turn
+        with self._lock:
+            job.future = self._executor.submit(contextvars.copy_context().run, self._run_call, job)
+        return job
+
+    def _message(self, call: Dict[str, Any], content: str, status: str, elapsed_ms: float) -> ToolMessage:
+        logger.info(f"[TOOLS] {call['name']} finished with status={status} in {elapsed_ms} ms")
+        return ToolMessage(
+            content=content,
+            name=call["name"],
+            tool_call_id=call["id"],
+            status=status,
+            response_metadata={"elapsed_ms": elapsed_ms},
+        )
+
+    def _timed_out(self, job: _Job) -> ToolMessage:
+        timeout = self.timeout_for(job.call["name"])
+        logger.warning(f"[TOOLS] {job.call['name']} timed out after {timeout}s")
+        elapsed_ms = round((time.perf_counter() - job.started) * 1000, 1)
+        return self._message(job.call, f"Error: {job.call['name']} timed out after {timeout}s", "error", elapsed_ms)
+
+    def _abandon(self, job: _Job, batch: List[_Job]):
+        """Leave a timed-out call its thread and move new and not-yet-started work to a fresh pool."""
+        with self._lock:
+            self._stuck += 1
+            stuck = self._stuck
+            old, self._executor = self._executor, self._new_executor()
+        old.shutdown(wait=False)
+        job.future.add_done_callback(self._released)
+        logger.warning(f"[TOOLS] {job.call['name']} is still running; {stuck} thread(s) held by timed-out calls")
+        for other in batch:
+            if other.started is None and other.future.cancel():
+                self._submit(other)
+
+    def _released(self, _future):
+        with self._lock:
+            self._stuck -= 1
+            stuck = self._stuck
+        logger.info(f"[TOOLS] A timed-out call returned; {stuck} thread(s) still held")
+
+    def _step(self, batch: List[_Job], messages: Dict[int, ToolMessage]) -> Optional[float]:
+        """
+        Collect finished and timed-out calls into `messages`; returns how long
+        to wait before looking again, or None once every call is accounted for.
+        """
+        now = time.perf_counter()
+        for i, job in enumerate(batch):
+            if i in messages:
+                continue
+            if job.future.done() and not job.future.cancelled():
+                messages[i] = self._message(job.call, *job.future.result())
+            elif job.started is not None and now - job.started >= self.timeout_for(job.call["name"]):
+                messages[i] = self._timed_out(job)
+                self._abandon(job, batch)
+        waits = [
+            job.started + self.timeout_for(job.call["name"]) - now if job.started is not None else self.POLL_INTERVAL
+            for i, job in enumerate(batch) if i not in messages
+        ]
+        return max(0.0, min(waits)) if waits else None
+
+    @staticmethod
+    def _tool_calls(state) -> List[Dict[str, Any]]:
+        last = state["messages"][-1]
+        return list(last.tool_calls) if isinstance(last, AIMessage) else []
+
+    # -------------------------
+    # Graph node entry points
+    # -------------------------
+    def invoke(self, state):
+        batch = [self._submit(_Job(call)) for call in self._tool_calls(state)]
+        messages: Dict[int, ToolMessage] = {}
+        timeout = self._step(batch, messages)
+        while timeout is not None:
+            pending = [job.future for i, job in enumerate(batch) if i not in messages]
+            wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            timeout = self._step(batch, messages)
+        return {"messages": [messages[i] for i in range(len(batch))]}
+
+    async def ainvoke(self, state):
+        batch = [self._submit(_Job(call)) for call in self._tool_calls(state)]
+        messages: Dict[int, ToolMessage] = {}
+        waiters: Dict[Future, asyncio.Future] = {}
+        try:
+            timeout = self._step(batch, messages)
+            while timeout is not None:
+                pending = [job.future for i, job in enumerate(batch) if i not in messages]
+                for future in pending:
+                    if future not in waiters:
+                        waiters[future] = asyncio.wrap_future(future)
+                await asyncio.wait([waiters[f] for f in pending], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                timeout = self._step(batch, messages)
+        except asyncio.CancelledError:
+            # Turn cancelled: drop calls that haven't started yet
+            for job in batch:
+                job.future.cancel()
+            raise
+        return {"messages": [messages[i] for i in range(len(batch))]}
+
+    def as_runnable(self, name: str = "tools") -> RunnableLambda:
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name=name)
@@ -1,5 +1,5 @@
-from tools.network import network, openwifi, searchweb
-from tools.embedded import embedded_pdf
+from tools.network import network, openwifi, searchweb, readweb
+from tools.embedded import embedded_pdf, ingestion_status, cancel_ingestion
 from tools.browser import open
 from tools.processes_tools import findProcess , killProcess
 from tools.system import run_command
@@ -8,7 +8,10 @@ __all__ = [
     network.check_internet,
     openwifi.enable_wifi,
     searchweb.duckduckgo_search,
+    readweb.search_and_read,
     embedded_pdf.embedded_pdf,
+    ingestion_status.ingestion_status,
+    cancel_ingestion.cancel_ingestion,
     open.open_browser,
     findProcess.find_process,
     killProcess.kill_process,
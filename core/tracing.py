@@ -0,0 +1,250 @@
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pathlib
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import environ
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+TRACE_ENABLED = env.bool("TRACE_ENABLED", default=True)
+TRACE_PATH = env("TRACE_PATH", default="./traces.jsonl")
+PROFILE_DIR = env("PROFILE_DIR", default="./profiles")
+PROFILE_TURNS = env.int("PROFILE_TURNS", default=0)
+# Finished spans are appended to TRACE_PATH once this many are waiting
+TRACE_FLUSH_SPANS = env.int("TRACE_FLUSH_SPANS", default=500)
+# Samples kept per metric for percentiles; counts and maxima stay exact
+TRACE_MAX_SAMPLES = env.int("TRACE_MAX_SAMPLES", default=10_000)
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation; nested spans share the trace id of the turn they run in."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end", "attributes", "_started", "_ended")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._ended: Optional[float] = None
+        self.end: Optional[float] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        self._ended = time.perf_counter()
+        self.end = self.start + (self._ended - self._started)
+
+    @property
+    def duration_ms(self) -> float:
+        ended = self._ended if self._ended is not None else time.perf_counter()
+        return (ended - self._started) * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+        }
+
+
+class Reservoir:
+    """Uniform sample of at most `capacity` values from a stream, plus its exact count and max."""
+
+    __slots__ = ("capacity", "values", "count", "max")
+
+    def __init__(self, capacity: int = TRACE_MAX_SAMPLES):
+        self.capacity = capacity
+        self.values: List[float] = []
+        self.count = 0
+        self.max = float("-inf")
+
+    def add(self, value: float):
+        self.count += 1
+        self.max = max(self.max, value)
+        if len(self.values) < self.capacity:
+            self.values.append(value)
+            return
+        slot = random.randrange(self.count)
+        if slot < self.capacity:
+            self.values[slot] = value
+
+
+class Tracer:
+    """
+    Collects spans and metric samples for the session.
+    `span()` times a block and nests under whatever span is current in the
+    calling context (asyncio tasks and `asyncio.to_thread` inherit it; pool
+    threads need `contextvars.copy_context()`). Every span duration also
+    feeds a histogram under the span's name, next to samples recorded with
+    `observe()`. Spans are appended to the JSONL trace every `flush_spans`
+    and histograms keep a reservoir of `max_samples` values, so a long
+    session uses bounded memory. `shutdown()` flushes the rest and logs
+    p50/p95/p99.
+    """
+
+    def __init__(self, enabled: bool = TRACE_ENABLED, path: str = TRACE_PATH, profile_dir: str = PROFILE_DIR,
+                 profile_turns: int = PROFILE_TURNS, flush_spans: int = TRACE_FLUSH_SPANS,
+                 max_samples: int = TRACE_MAX_SAMPLES):
+        self.enabled = enabled
+        self.path = path
+        self.profile_dir = profile_dir
+        self.flush_spans = flush_spans
+        self._profile_remaining = profile_turns
+        self._finished: List[Span] = []
+        self._written = 0
+        self._samples: Dict[str, Reservoir] = defaultdict(lambda: Reservoir(max_samples))
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    # -------------------------
+    # Spans and samples
+    # -------------------------
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            yield Span(name, None, {})
+            return
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            span.finish()
+            with self._lock:
+                self._finished.append(span)
+                self._samples[f"{name}.ms"].add(span.duration_ms)
+                flush = len(self._finished) >= self.flush_spans
+            if flush:
+                self.export()
+
+    def traced(self, name: str):
+        """Decorator form of `span` for plain functions."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name: str, value: float):
+        if self.enabled and value is not None:
+            with self._lock:
+                self._samples[name].add(float(value))
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current.get()
+
+    # -------------------------
+    # Profiling hook
+    # -------------------------
+    def profile_next(self, turns: int = 1):
+        """Profile the next `turns` turns with cProfile."""
+        self._profile_remaining += turns
+
+    @contextmanager
+    def maybe_profile(self, label: str):
+        """
+        Profile the enclosed block if a profile was requested. The .prof file
+        opens in snakeviz or `python -m pstats`; the top functions are logged.
+        For sampling instead, attach py-spy to this PID: its thread names
+        (tool-*, fetch-*, tts-synth, ...) identify each worker pool.
+        """
+        if self._profile_remaining <= 0:
+            yield
+            return
+        self._profile_remaining -= 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            profiler.dump_stats(path)
+            top = io.StringIO()
+            pstats.Stats(profiler, stream=top).sort_stats("cumulative").print_stats(15)
+            logger.info(f"[TRACE] Profile written to {path} (pid {os.getpid()})\n{top.getvalue()}")
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            samples = {name: (list(r.values), r.count, r.max) for name, r in self._samples.items()}
+        report = {}
+        for name, (values, count, maximum) in sorted(samples.items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            report[name] = {
+                "count": count,
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(maximum, 3),
+            }
+        return report
+
+    def export(self, path: str = None) -> int:
+        """Append finished spans to the JSONL trace file; returns how many were written."""
+        path = path or self.path
+        with self._lock:
+            spans, self._finished = self._finished, []
+        if not spans or not path:
+            return 0
+        # Threads that hit the flush threshold together must not interleave lines
+        with self._write_lock, open(path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.as_dict(), default=str) + "\n")
+        with self._lock:
+            self._written += len(spans)
+        return len(spans)
+
+    def shutdown(self):
+        if not self.enabled:
+            return
+        self.export()
+        report = self.summary()
+        if not report:
+            return
+        lines = [f"{'metric':<32}{'count':>7}{'p50':>11}{'p95':>11}{'p99':>11}"]
+        for name, row in report.items():
+            lines.append(f"{name:<32}{row['count']:>7}{row['p50']:>11.1f}{row['p95']:>11.1f}{row['p99']:>11.1f}")
+        logger.info(f"[TRACE] {self._written} spans written to {self.path}\n" + "\n".join(lines))
+
+
+tracer = Tracer()
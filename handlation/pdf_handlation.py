@@ -1,32 +1,57 @@
-from preprocessing.pdf import extract_text_from_pdf, split_text_into_chunks
-from langchain_core.documents import Document
-from config.database import Database
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-database_config = Database()
+# Opened on first use: importing Chroma and opening the store takes seconds,
+# and even the PDF pipeline's imports would slow the prompt down
+_database = None
+_scheduler = None
+_lock = threading.Lock()
+
+
+def get_database():
+    global _database
+    with _lock:
+        if _database is None:
+            from config.database import Database
+            _database = Database()
+        return _database
+
+
+def get_scheduler():
+    global _scheduler
+    database = get_database()
+    with _lock:
+        if _scheduler is None:
+            from handlation.scheduler import IngestionScheduler
+            _scheduler = IngestionScheduler(database)
+        return _scheduler
+
+
+def shutdown_scheduler():
+    """Stop the ingestion workers, if they were ever started."""
+    with _lock:
+        scheduler = _scheduler
+    if scheduler is not None:
+        scheduler.shutdown()
 
 def embed_pdf_worker(pdf_path: str) -> str:
     """Actual function that extracts and embeds PDF content."""
+    from handlation.pipeline import ingest_pdf
     try:
         logger.info(f"[WORKER] Starting PDF embedding for: {pdf_path}")
 
-        pdf_data = extract_text_from_pdf(pdf_path)
-        if pdf_data is None:
-            logger.error(f"[WORKER] Failed to extract text from PDF: {pdf_path}")
-            return "Failed to extract text from the PDF."
-
-        chunks = split_text_into_chunks(pdf_data)
-        documents = [
-            Document(page_content=chunk, metadata={"source": pdf_path}, id=i)
-            for i, chunk in enumerate(chunks)
-        ]
-
-        database_config.add_documents(documents)
+        stats = ingest_pdf(pdf_path, get_database())
+        if stats.skipped:
+            logger.info(f"[WORKER] PDF unchanged since last embedding, skipping: {pdf_path}")
+            return "PDF content is already embedded and unchanged."
 
-        logger.info(f"[WORKER] Successfully embedded PDF with {len(chunks)} chunks.")
-        return f"PDF content embedded successfully with {len(chunks)} chunks."
+        logger.info(f"[WORKER] Successfully embedded PDF with {stats.chunks} chunks.")
+        return (
+            f"PDF content embedded successfully with {stats.chunks} chunks "
+            f"({stats.pages_per_sec:.1f} pages/s, {stats.chunks_per_sec:.1f} chunks/s)."
+        )
 
     except Exception as e:
         logger.exception(f"[WORKER] Error embedding PDF: {e}")
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from queue import Full, Queue
+from typing import Callable, List, Optional
+
+from langchain_core.documents import Document
+
+from preprocessing.pdf import iter_chunks, iter_pages
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 64
+MAX_PENDING_BATCHES = 4
+
+_DONE = object()
+
+
+class IngestCancelled(Exception):
+    """Raised when an ingestion run is cancelled before it commits."""
+
+
+class PipelineStats:
+    """Progress counters for one ingestion run."""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.pages = 0
+        self.chunks = 0
+        self.added = 0
+        self.skipped = False
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "added": self.added,
+            "skipped": self.skipped,
+            "elapsed": round(self.elapsed, 3),
+            "pages_per_sec": round(self.pages_per_sec, 2),
+            "chunks_per_sec": round(self.chunks_per_sec, 2),
+        }
+
+
+def ingest_pdf(
+    pdf_path: str,
+    database,
+    batch_size: int = BATCH_SIZE,
+    max_pending_batches: int = MAX_PENDING_BATCHES,
+    on_progress: Callable[[PipelineStats], None] = None,
+    should_cancel: Callable[[], bool] = None,
+    content_hash: Optional[str] = None,
+) -> PipelineStats:
+    """
+    Stream a PDF into the vector store.
+    Pages are extracted on a process pool and chunked per page window on a
+    producer thread; chunk batches go through a bounded queue to the
+    embed-and-upsert stage, so a slow embedding backend throttles extraction
+    instead of letting chunks pile up in memory. If `should_cancel` turns
+    true, the chunks added so far are rolled back and IngestCancelled is
+    raised. `content_hash` is the file digest when the caller already has it.
+    """
+    stats = PipelineStats(pdf_path)
+    content_hash = content_hash or database.source_hash(pdf_path)
+    if database.is_source_current(pdf_path, content_hash):
+        stats.skipped = True
+        stats.finished = time.perf_counter()
+        logger.info(f"[PIPELINE] {pdf_path} unchanged since last ingestion, skipping")
+        return stats
+
+    session = database.begin_ingest(pdf_path)
+    batches: Queue = Queue(maxsize=max_pending_batches)
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def counted_pages():
+        for page in iter_pages(pdf_path):
+            stats.pages += 1
+            yield page
+
+    def produce():
+        batch: List[Document] = []
+        try:
+            for doc in iter_chunks(counted_pages(), source=pdf_path):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch:
+                put(batch)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name="pdf-producer", daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            batch = batches.get()
+            if batch is _DONE:
+                break
+            if should_cancel and should_cancel():
+                session.rollback()
+                raise IngestCancelled(pdf_path)
+            stats.added += session.upsert(batch)
+            stats.chunks += len(batch)
+            if on_progress:
+                on_progress(stats)
+    finally:
+        stop.set()
+        producer.join()
+    if errors:
+        raise errors[0]
+    if should_cancel and should_cancel():
+        session.rollback()
+        raise IngestCancelled(pdf_path)
+
+    session.commit(content_hash)
+    stats.finished = time.perf_counter()
+    logger.info(
+        f"[PIPELINE] {pdf_path}: {stats.pages} pages, {stats.chunks} chunks ({stats.added} new) "
+        f"in {stats.elapsed:.2f}s — {stats.pages_per_sec:.1f} pages/s, {stats.chunks_per_sec:.1f} chunks/s"
+    )
+    return stats
@@ -0,0 +1,233 @@
+import itertools
+import logging
+import os
+import threading
+import time
+import uuid
+from queue import PriorityQueue
+from typing import Dict, List, Optional
+
+from config.manifest import file_digest
+from handlation.pipeline import IngestCancelled, PipelineStats, ingest_pdf
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers run first
+PRIORITY_USER = 0
+PRIORITY_WATCHER = 10
+# How long shutdown waits for running jobs to commit before cancelling them
+SHUTDOWN_GRACE = 30.0
+# How long it then waits for cancelled jobs to roll back
+SHUTDOWN_ROLLBACK_WAIT = 10.0
+
+_ACTIVE = ("queued", "running")
+
+
+class IngestJob:
+    def __init__(self, path: str, file_hash: str, priority: int):
+        self.id = uuid.uuid4().hex[:8]
+        self.path = path
+        self.file_hash = file_hash
+        self.priority = priority
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.stats: Optional[PipelineStats] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    def as_dict(self) -> dict:
+        info = {
+            "id": self.id,
+            "path": self.path,
+            "status": self.status,
+            "priority": self.priority,
+            "queued_for": round((self.started or time.time()) - self.submitted, 2),
+        }
+        if self.stats is not None:
+            info.update(self.stats.as_dict())
+        if self.error:
+            info["error"] = self.error
+        return info
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done_event.wait(timeout)
+
+
+class IngestionScheduler:
+    """
+    Resident ingestion scheduler.
+    Jobs run on a small pool of worker threads inside the assistant process,
+    so every file shares the warm vector store and embedding client. Jobs
+    are ordered by priority, deduplicated by (path, file hash) and can be
+    cancelled while queued or running.
+    """
+
+    def __init__(self, database, workers: int = 2, history: int = 100):
+        self.database = database
+        self.workers = workers
+        self.history = history
+        self._queue: PriorityQueue = PriorityQueue()
+        self._seq = itertools.count()
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._stopping = False
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, path: str, priority: int = PRIORITY_USER, file_hash: str = None) -> IngestJob:
+        """
+        Queue a file for ingestion, reusing an identical queued or running job.
+        Pass `file_hash` when the caller already hashed the file; the job
+        carries it to the pipeline so the file is hashed only once.
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        file_hash = file_hash or file_digest(path)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.path != path or job.status not in _ACTIVE:
+                    continue
+                if job.file_hash == file_hash:
+                    if priority < job.priority and job.status == "queued":
+                        # Re-queue under the more urgent priority; the stale entry is skipped
+                        job.priority = priority
+                        self._queue.put((priority, next(self._seq), job))
+                    logger.info(f"[SCHEDULER] Reusing job {job.id} for {path}")
+                    return job
+                # The file changed since this job was queued; the new content wins
+                self._cancel(job)
+
+            job = IngestJob(path, file_hash, priority)
+            self._jobs[job.id] = job
+            self._prune()
+            self._ensure_workers()
+            self._queue.put((priority, next(self._seq), job))
+        logger.info(f"[SCHEDULER] Queued job {job.id} for {path} (priority {priority})")
+        return job
+
+    def cancel(self, job_id_or_path: str) -> bool:
+        cancelled = False
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status in _ACTIVE and job_id_or_path in (job.id, job.path):
+                    self._cancel(job)
+                    cancelled = True
+        return cancelled
+
+    def _cancel(self, job: IngestJob):
+        job.cancel_event.set()
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id_or_path: str = None) -> List[dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if job_id_or_path:
+            jobs = [job for job in jobs if job_id_or_path in (job.id, job.path)]
+        return [job.as_dict() for job in sorted(jobs, key=lambda j: j.submitted)]
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status in _ACTIVE)
+
+    def shutdown(self, grace: float = SHUTDOWN_GRACE, rollback_wait: float = SHUTDOWN_ROLLBACK_WAIT):
+        """
+        Stop taking jobs and drop the queued ones. Running jobs get up to
+        `grace` seconds to commit; cancelling them rolls back every chunk
+        they embedded, so that only happens to jobs still running after it,
+        and their workers get another `rollback_wait` seconds to finish the
+        rollback before the interpreter exits. The watcher's reconcile picks
+        cancelled files up again next start.
+        """
+        self._stopping = True
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == "queued":
+                    self._cancel(job)
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+        if running:
+            logger.info(f"[SCHEDULER] Waiting up to {grace}s for {running} running job(s) to finish")
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._seq), None))
+
+        deadline = time.monotonic() + grace
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            running = [job for job in self._jobs.values() if job.status == "running"]
+            for job in running:
+                logger.warning(f"[SCHEDULER] Job {job.id} still running after {grace}s, cancelling: {job.path}")
+                job.cancel_event.set()
+        if not running:
+            return
+        deadline = time.monotonic() + rollback_wait
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        stuck = [thread.name for thread in self._threads if thread.is_alive()]
+        if stuck:
+            logger.error(f"[SCHEDULER] {', '.join(stuck)} did not finish rolling back within {rollback_wait}s")
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.status not in _ACTIVE]
+        for job in sorted(finished, key=lambda j: j.submitted)[: max(0, len(finished) - self.history)]:
+            del self._jobs[job.id]
+
+    def _worker(self):
+        while True:
+            priority, _, job = self._queue.get()
+            if job is None or self._stopping:
+                return
+            with self._lock:
+                if job.status != "queued" or priority != job.priority:
+                    continue
+                path_lock = self._path_locks.setdefault(job.path, threading.Lock())
+            # A superseded job for the same file must finish rolling back first
+            with path_lock:
+                with self._lock:
+                    if job.status != "queued":
+                        continue
+                    job.status = "running"
+                    job.started = time.time()
+                self._run(job)
+
+    def _run(self, job: IngestJob):
+        def on_progress(stats: PipelineStats):
+            job.stats = stats
+
+        try:
+            job.stats = ingest_pdf(
+                job.path,
+                self.database,
+                content_hash=job.file_hash,
+                on_progress=on_progress,
+                should_cancel=job.cancel_event.is_set,
+            )
+            status = "skipped" if job.stats.skipped else "done"
+        except IngestCancelled:
+            status = "cancelled"
+        except Exception as e:
+            logger.exception(f"[SCHEDULER] Job {job.id} failed for {job.path}")
+            job.error = str(e)
+            status = "failed"
+        with self._lock:
+            self._finish(job, status)
+
+    def _finish(self, job: IngestJob, status: str):
+        job.status = status
+        job.finished = time.time()
+        job.done_event.set()
+        logger.info(f"[SCHEDULER] Job {job.id} {status}: {job.path}")
@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from watchdog.events import FileSystemEventHandler
+
+from handlation.scheduler import PRIORITY_WATCHER
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf",)
+
+
+class ContentFolderHandler(FileSystemEventHandler):
+    """
+    Debounced watcher for the content folder.
+    File events are coalesced per path; a file is dispatched to the
+    ingestion scheduler once no event arrived for `debounce` seconds and its
+    size stopped changing. Deletions and moves drop the old source from the
+    vector store. Each burst of activity produces a single summary message
+    on the event queue instead of one agent turn per file.
+    """
+
+    def __init__(self, event_queue, scheduler, database, content_path: str, debounce: float = 1.0, poll_interval: float = 0.5):
+        self.event_queue = event_queue
+        self.scheduler = scheduler
+        self.database = database
+        self.content_path = os.path.abspath(content_path)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        # path -> (last event time, last observed (size, mtime))
+        self._pending: Dict[str, Tuple[float, Optional[Tuple[int, float]]]] = {}
+        self._removed: List[str] = []
+        self._burst = {"queued": [], "unchanged": [], "removed": [], "unsupported": []}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------
+    # Watchdog callbacks
+    # -------------------------
+    def on_created(self, event):
+        if not event.is_directory:
+            self._touch(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._touch(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._forget(event.src_path)
+            if os.path.dirname(os.path.abspath(event.dest_path)) == self.content_path:
+                self._touch(event.dest_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._forget(event.src_path)
+
+    def _touch(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            _, last_stat = self._pending.get(path, (None, None))
+            self._pending[path] = (time.monotonic(), last_stat)
+
+    def _forget(self, path: str):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._pending.pop(path, None)
+            self._removed.append(path)
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval * 4)
+
+    def reconcile(self):
+        """
+        Bring the vector store in line with the folder as it is right now:
+        queue new or changed files, drop sources whose files are gone, and
+        send one summary for everything that changed while we were not running.
+        """
+        present = set()
+        for name in sorted(os.listdir(self.content_path)):
+            path = os.path.join(self.content_path, name)
+            if os.path.isfile(path):
+                present.add(path)
+                self._dispatch(path, announce_skipped=False)
+
+        for source in self.database.known_sources():
+            if os.path.dirname(source) == self.content_path and source not in present:
+                self._delete(source)
+
+        self._flush_summary(reason="startup")
+
+    def _run(self):
+        try:
+            self.reconcile()
+        except Exception as e:
+            logger.error(f"[WATCHER] Startup reconciliation failed: {e}")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._poll()
+            except Exception as e:
+                logger.error(f"[WATCHER] Error while processing content events: {e}")
+
+    def _poll(self):
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            removed, self._removed = self._removed, []
+            for path, (last_event, last_stat) in list(self._pending.items()):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    del self._pending[path]
+                    continue
+                current = (stat.st_size, stat.st_mtime)
+                if now - last_event >= self.debounce and current == last_stat:
+                    ready.append(path)
+                    del self._pending[path]
+                else:
+                    self._pending[path] = (last_event, current)
+            idle = not self._pending
+
+        for path in removed:
+            if not os.path.exists(path):
+                self._delete(path)
+        for path in ready:
+            self._dispatch(path)
+        if idle:
+            self._flush_summary(reason="change")
+
+    # -------------------------
+    # Dispatch
+    # -------------------------
+    def _dispatch(self, path: str, announce_skipped: bool = True):
+        name = os.path.basename(path)
+        if not path.lower().endswith(SUPPORTED_EXTENSIONS):
+            if announce_skipped:
+                self._burst["unsupported"].append(name)
+            return
+        # Hashed once here; the scheduler and the pipeline reuse the digest
+        file_hash = self.database.source_hash(path)
+        if self.database.is_source_current(path, file_hash):
+            if announce_skipped:
+                self._burst["unchanged"].append(name)
+            return
+        job = self.scheduler.submit(path, priority=PRIORITY_WATCHER, file_hash=file_hash)
+        self._burst["queued"].append(f"{name} (job {job.id})")
+        logger.info(f"[WATCHER] Queued {path} for embedding as job {job.id}")
+
+    def _delete(self, path: str):
+        self.scheduler.cancel(path)
+        if path in self.database.known_sources():
+            self.database.delete_source(path)
+            self._burst["removed"].append(os.path.basename(path))
+
+    def _flush_summary(self, reason: str):
+        burst = {key: values for key, values in self._burst.items() if values}
+        self._burst = {key: [] for key in self._burst}
+        if not burst:
+            return
+
+        lines = ["content folder updated" + (" while the assistant was offline" if reason == "startup" else "") + ":"]
+        if "queued" in burst:
+            lines.append(f"- embedding in background: {', '.join(burst['queued'])}")
+        if "unchanged" in burst:
+            lines.append(f"- already embedded, unchanged: {', '.join(burst['unchanged'])}")
+        if "removed" in burst:
+            lines.append(f"- removed from the knowledge base: {', '.join(burst['removed'])}")
+        if "unsupported" in burst:
+            lines.append(f"- not a PDF, ignored: {', '.join(burst['unsupported'])}")
+        logger.info(f"[WATCHER] {' '.join(lines)}")
+        self.event_queue.put(("files", "\n".join(lines)))
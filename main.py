@@ -1,17 +1,23 @@
+import asyncio
 import logging
 import os
+import pathlib
 import sys
-from queue import Queue
 import threading
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+import environ
+from concurrent.futures import wait
 
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from core.agent import app
-from config.database import Database
+from core.compression import ContextCompressor, cite
+from core.router import DOCUMENTS, WEB, RetrievalRouter
+from core.runtime import AgentRuntime
+from core.startup import startup
+from core.streaming import astream_turn
+from core.tracing import tracer
+from handlation.pdf_handlation import get_database, get_scheduler, shutdown_scheduler
 from langchain_core.prompts import load_prompt
-
-database_config = Database()
+from tools.network.monitor import connectivity_monitor
+from tools.system.shell import close_sessions
 
 # -------------------------
 # Logging configuration
@@ -24,23 +30,92 @@ handler.setFormatter(formatter)
 if not logger.handlers:
     logger.addHandler(handler)
 
+# -------------------------
+# Environment
+# -------------------------
+env = environ.Env()
+environ.Env.read_env(pathlib.Path(__file__).parent / '.env')
+STREAM_RESPONSES = env.bool("STREAM_RESPONSES", default=True)
+INTERRUPT_ON_NEW_INPUT = env.bool("INTERRUPT_ON_NEW_INPUT", default=True)
+# Loaded in the background while the prompt is already accepting input
+WARMUP_COMPONENTS = env.list("WARMUP_COMPONENTS", default=["database", "embeddings", "agent", "llm", "router", "watcher"])
+
 # -------------------------
 # Load prompt
 # -------------------------
 prompt = load_prompt("prompt.yaml").format(home=os.path.expanduser("~"))
 
 # -------------------------
-# File watcher handler
+# Startup components
+# -------------------------
+# Nothing heavy is imported above: the agent graph, provider SDKs, Chroma
+# and the embedding client are loaded here, on first use or during warm-up.
+def load_agent():
+    import core.agent
+    return core.agent
+
+
+def load_session_index():
+    from config.session_index import session_index
+    return session_index
+
+
+def warm_embeddings():
+    # One tiny request loads the embedding model on the server side
+    get_database().embedding_engine.embed_query("warm up")
+
+
+def preload_llm():
+    from models.LLM import preload_model
+    preload_model()
+
+
+# Rule-matched turns never touch the database, so it is only resolved when embedding
+router = RetrievalRouter(
+    embed_query=lambda query: startup.get("database").query_embedding(query),
+    embed_documents=lambda texts: startup.get("database").embedding_engine.embed_documents(texts),
+)
+compressor = ContextCompressor(
+    embed_query=lambda query: startup.get("database").query_embedding(query),
+    embed_documents=lambda texts: startup.get("database").embedding_engine.embed_documents(texts),
+)
+
+
+startup.register("database", get_database)
+startup.register("embeddings", warm_embeddings, depends=["database"])
+startup.register("agent", load_agent)
+startup.register("llm", preload_llm)
+startup.register("session_index", load_session_index)
+startup.register("scheduler", get_scheduler, depends=["database"])
+startup.register("router", router.prepare, depends=["database"])
+
+# -------------------------
+# Streaming output
 # -------------------------
-class ContentFolderHandler(FileSystemEventHandler):
-    def __init__(self, event_queue):
-        self.event_queue = event_queue
+class StreamPrinter:
+    """Prints model tokens as they arrive and tool activity as one-line events."""
+
+    def __init__(self):
+        self.streaming = False
 
-    def on_created(self, event):
-        if not event.is_directory:
-            file_path = os.path.abspath(event.src_path)
-            logger.info(f"📄 New file detected → {file_path}")
-            self.event_queue.put(("file", file_path))
+    def on_token(self, text):
+        if not self.streaming:
+            print("\n🤖 AI:")
+            self.streaming = True
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def on_event(self, kind, payload):
+        self.end_stream()
+        if kind == "tool_call":
+            print(f"🔧 {payload['name']}({payload.get('args', {})})")
+        elif kind == "tool_result":
+            print(f"✅ {payload.name} finished")
+
+    def end_stream(self):
+        if self.streaming:
+            print("\n")
+            self.streaming = False
 
 # -------------------------
 # User input thread
@@ -54,12 +129,88 @@ def user_input_thread(event_queue):
             if user_input.lower() in ["exit", "quit"]:
                 event_queue.put(("exit", None))
                 break
+            if user_input.lower() == "/profile":
+                # cProfile the next turn; the .prof path is logged when it ends
+                tracer.profile_next()
+                print("⏱️ The next turn will be profiled.")
+                continue
             event_queue.put(("user", user_input))
         except Exception as e:
             logger.error(f"Error in user input thread: {e}")
             event_queue.put(("exit", None))
             break
 
+# -------------------------
+# Turn handling
+# -------------------------
+def prepare_message(event_type, data):
+    """Build the HumanMessage for an event; runs on a worker thread for user input."""
+    if event_type == "user":
+        user_input = data
+        # Commands and chit-chat skip retrieval. Web questions only search pages read this
+        # session; the web itself is searched by the model through search_and_read.
+        route = router.route(user_input)
+        vector_context = []
+        if route.target == DOCUMENTS:
+            vector_context += startup.get("database").get_content(user_input)
+        if route.target in (DOCUMENTS, WEB):
+            vector_context += startup.get("session_index").get_content(user_input, k=2)
+        # Only the sentences most relevant to the question are kept, within a token budget
+        vector_context = compressor.compress(user_input, vector_context)
+        if vector_context:
+            context_str = "\n\n".join([f"Source: {cite(doc.metadata)}\nContent: {doc.page_content}" for doc in vector_context])
+            user_input += f"\n\n[Context from vector store]:\n{context_str}"
+        elif route.target == WEB:
+            # Inside the context block, so memory strips the hint from finished turns
+            user_input += "\n\n[Context from vector store]:\nNo page read this session covers this; use search_and_read."
+        logger.info(f"💬 User prompt injected: {user_input}")
+        return HumanMessage(content=f"{user_input}")
+
+    logger.info(f"📥 Content folder summary injected")
+    return HumanMessage(content=data)
+
+
+def compact(messages):
+    # Nothing to compact before the agent (and its memory) has loaded
+    if not startup.is_ready("agent"):
+        return list(messages)
+    return startup.get("agent").memory.compact(messages)
+
+
+async def run_turn(state):
+    # Waits off the event loop if the first turn arrives before warm-up finished
+    app = (await asyncio.to_thread(startup.get, "agent")).app
+    if not STREAM_RESPONSES:
+        return await app.ainvoke(state)
+    printer = StreamPrinter()
+    try:
+        state, turn_stats = await astream_turn(
+            app, state, on_token=printer.on_token, on_event=printer.on_event
+        )
+    finally:
+        printer.end_stream()
+    if turn_stats.ttft is not None:
+        logger.info(
+            f"⏱️ First token after {turn_stats.ttft:.2f}s, "
+            f"{turn_stats.tokens_per_sec:.1f} tokens/s ({turn_stats.output_tokens} tokens)"
+        )
+    return state
+
+
+def show_response(state):
+    last_msg = state["messages"][-1]
+
+    # Display last message
+    if isinstance(last_msg, AIMessage):
+        if not STREAM_RESPONSES:
+            print("\n🤖 AI:")
+            print(last_msg.content)
+            print("\n")
+        logger.info(f"📝 AI Response delivered.")
+
+    elif isinstance(last_msg, HumanMessage):
+        logger.info(f"[SYSTEM]: {last_msg.content}")
+
 # -------------------------
 # Main Execution
 # -------------------------
@@ -71,81 +222,71 @@ def main():
     messages = [SystemMessage(content=prompt)]
     current_state = {"messages": messages, "running_processes": {}}
 
-    # Set up event queue and threads
-    event_queue = Queue()
+    # Events from the input thread and the watcher are dispatched on an asyncio loop
+    runtime = AgentRuntime(
+        current_state,
+        prepare=prepare_message,
+        run_turn=run_turn,
+        compact=compact,
+        on_turn_done=show_response,
+        interrupt=INTERRUPT_ON_NEW_INPUT,
+    )
+
+    # Set up content folder watcher once the store and scheduler are open
+    content_path = os.path.join(os.getcwd(), "content")
+    os.makedirs(content_path, exist_ok=True)
+
+    def start_watcher():
+        from watchdog.observers import Observer
+        from handlation.watcher import ContentFolderHandler
+
+        handler = ContentFolderHandler(runtime, startup.get("scheduler"), startup.get("database"), content_path)
+        observer = Observer()
+        observer.schedule(handler, content_path, recursive=False)
+        observer.start()
+        handler.start()
+        logger.info(f"Watching content folder: {content_path}")
+        return handler, observer
+
+    startup.register("watcher", start_watcher, depends=["scheduler"])
 
     # Start user input thread
-    input_thread = threading.Thread(target=user_input_thread, args=(event_queue,))
+    input_thread = threading.Thread(target=user_input_thread, args=(runtime,))
     input_thread.daemon = True
     input_thread.start()
 
-    # Set up content folder watcher
-    content_path = os.path.join(os.getcwd(), "content")
-    os.makedirs(content_path, exist_ok=True)
-    logger.info(f"Watching content folder: {content_path}")
+    # Keep the internet status fresh in the background for check_internet
+    connectivity_monitor.start()
 
-    handler = ContentFolderHandler(event_queue)
-    observer = Observer()
-    observer.schedule(handler, content_path, recursive=False)
-    observer.start()
+    # Heavy components load in parallel while the user is typing
+    warm_up = startup.warm_up(WARMUP_COMPONENTS)
+    threading.Thread(target=lambda: (wait(warm_up), startup.report()), name="startup-report", daemon=True).start()
 
     logger.info("AI Assistant Ready. Type 'exit' or 'quit' to stop.\n")
 
     # -------------------------
     # Main event loop
     # -------------------------
-    while True:
-        try:
-            event_type, data = event_queue.get()
-
-            if event_type == "exit":
-                logger.info("Shutting down assistant...")
-                break
-
-            elif event_type == "user":
-                user_input = data
-                vector_context = database_config.get_content(user_input)
-                if vector_context:
-                    context_str = "\n\n".join([f"Source: {doc.metadata.get('source', 'unknown')}\nContent: {doc.page_content}" for doc in vector_context])
-                    user_input += f"\n\n[Context from vector store]:\n{context_str}"
-                msg = HumanMessage(content=f"{user_input}")
-                logger.info(f"💬 User prompt injected: {user_input}")
-
-            elif event_type == "file":
-                file_path = data
-                msg_content = f"user added file to content → {file_path} (embedding in background)"
-                msg = HumanMessage(content=msg_content)
-                logger.info(f"📥 File addition prompt injected for: {file_path}")
-
-            # Append message to conversation
-            current_state["messages"].append(msg)
-
-            # Invoke agent
-            current_state = app.invoke(current_state)
-            last_msg = current_state["messages"][-1]
-
-            # Display last message
-            if isinstance(last_msg, AIMessage):
-                print("\n🤖 AI:")
-                print(last_msg.content)
-                print("\n")
-                logger.info(f"📝 AI Response delivered.")
-
-            elif isinstance(last_msg, HumanMessage):
-                logger.info(f"[SYSTEM]: {last_msg.content}")
-
-        except KeyboardInterrupt:
-            logger.info("KeyboardInterrupt detected. Exiting...")
-            break
-        except Exception as e:
-            logger.error(f"An error occurred: {e}")
-            continue
+    try:
+        asyncio.run(runtime.run())
+        logger.info("Shutting down assistant...")
+    except KeyboardInterrupt:
+        logger.info("KeyboardInterrupt detected. Exiting...")
 
     # -------------------------
     # Cleanup
     # -------------------------
-    observer.stop()
-    observer.join()
+    if startup.is_ready("watcher"):
+        handler, observer = startup.get("watcher")
+        handler.stop()
+        observer.stop()
+        observer.join()
+    if startup.is_ready("database"):
+        logger.info(f"Retrieval cache: {startup.get('database').cache_stats()}")
+    connectivity_monitor.stop()
+    close_sessions()
+    tracer.shutdown()
+    shutdown_scheduler()
     input_thread.join(timeout=1)
     logger.info("Assistant shutdown complete.")
 
@@ -1,7 +1,4 @@
-from langchain_ollama import ChatOllama
 import environ , pathlib , logging
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
 
 # Configure logging
 logging.basicConfig(
@@ -16,11 +13,14 @@ environ.Env.read_env(base_dir / '.env')
 
 MODEL_NAME = env("MODEL_NAME" , default="")
 MODEL_TYPE = env("MODEL_TYPE" , default="")
+KEEP_ALIVE = 1000000
 
 class LLM:
     def __init__(self):
         self.model = None
+        # Provider SDKs are imported on demand; each one takes seconds to import
         if MODEL_TYPE == "ollama":
+            from langchain_ollama import ChatOllama
             self.model = ChatOllama(
                 model=MODEL_NAME,
                 temperature=0.5,
@@ -30,9 +30,10 @@ class LLM:
                 num_gpu=1,
                 top_k=20,
                 use_mmap=True,
-                keep_alive=1000000
+                keep_alive=KEEP_ALIVE
             )
         elif MODEL_TYPE == "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI
             self.model = ChatGoogleGenerativeAI(
                 model=MODEL_NAME,
                 temperature=0.5,
@@ -40,6 +41,7 @@ class LLM:
                 api_key=env("GOOGLE_API_KEY"),
             )
         elif MODEL_TYPE == "openai":
+            from langchain_openai import ChatOpenAI
             self.model = ChatOpenAI(
                 model=MODEL_NAME,
                 temperature=0.5,
@@ -51,5 +53,16 @@ class LLM:
         
     def initialize(self):
         return self.model
-    
-    
\ No newline at end of file
+
+
+def preload_model():
+    """Ask Ollama to load the model into memory now, so the first turn doesn't wait for it."""
+    if MODEL_TYPE != "ollama":
+        return
+    import httpx
+    response = httpx.post(
+        f"{env('OLLAMA_BASE_URL').rstrip('/')}/api/generate",
+        json={"model": MODEL_NAME, "keep_alive": KEEP_ALIVE},
+        timeout=120,
+    )
+    response.raise_for_status()
@@ -1,6 +1,12 @@
-import logging, environ, pathlib
-from langchain_ollama import OllamaEmbeddings
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+import logging, environ, pathlib, random, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple, TypeVar
+
+from langchain_core.embeddings import Embeddings
+
+from core.tracing import tracer
+from models.embedding_cache import EmbeddingCache, text_hash
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -15,37 +21,224 @@ environ.Env.read_env(base_dir / ".env")
 # Initialize the Google Generative AI client and Database
 EMBEDDING_MODEL_NAME = env("EMBEDDING_MODEL_NAME")
 
+# Batching / retry knobs for the shared embedding engine
+EMBEDDING_BATCH_SIZE = env.int("EMBEDDING_BATCH_SIZE", default=64)
+EMBEDDING_BATCH_CHARS = env.int("EMBEDDING_BATCH_CHARS", default=64_000)
+EMBEDDING_MAX_CONCURRENCY = env.int("EMBEDDING_MAX_CONCURRENCY", default=4)
+EMBEDDING_MAX_RETRIES = env.int("EMBEDDING_MAX_RETRIES", default=5)
+EMBEDDING_BACKOFF_BASE = env.float("EMBEDDING_BACKOFF_BASE", default=1.0)
+EMBEDDING_BACKOFF_MAX = env.float("EMBEDDING_BACKOFF_MAX", default=30.0)
+
+# Persistent embedding cache; set EMBEDDING_CACHE_PATH="" to disable it
+EMBEDDING_CACHE_PATH = env("EMBEDDING_CACHE_PATH", default="./embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = env.int("EMBEDDING_CACHE_MAX_ENTRIES", default=200_000)
+
+T = TypeVar("T")
+
+
+def _build_client(model_type: str, model_name: str) -> Embeddings:
+    # Imported here so only the configured provider's SDK is loaded
+    if model_type == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return GoogleGenerativeAIEmbeddings(model=model_name, api_key=env("api_key"))
+    elif model_type == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        return OllamaEmbeddings(model=model_name, base_url=env("OLLAMA_BASE_URL"))
+    else:
+        raise ValueError("Invalid embedding model type")
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    Long-lived embedding engine.
+    It keeps one backend client for its lifetime, groups texts into
+    size-bounded batches for `embed_documents`, runs at most
+    `max_concurrency` batches at once and retries failed calls with
+    exponential backoff. When a cache is attached, only texts that are not
+    already cached for this model reach the backend.
+    """
+
+    def __init__(
+        self,
+        model_type: str,
+        model_name: str,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        batch_chars: int = EMBEDDING_BATCH_CHARS,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        backoff_base: float = EMBEDDING_BACKOFF_BASE,
+        backoff_max: float = EMBEDDING_BACKOFF_MAX,
+        client: Embeddings = None,
+        cache: EmbeddingCache = None,
+    ):
+        self.model_type = model_type
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.batch_chars = max(1, batch_chars)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = client or _build_client(model_type, model_name)
+        self.cache = cache
+        self.cache_key = f"{model_type}:{model_name}"
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="embedding"
+        )
+
+    # -------------------------
+    # Batching
+    # -------------------------
+    def _batches(self, texts: List[str]) -> List[Tuple[int, List[str]]]:
+        """Split texts into (offset, batch) pairs bounded by count and characters."""
+        batches = []
+        start, current, current_chars = 0, [], 0
+        for i, text in enumerate(texts):
+            if current and (
+                len(current) >= self.batch_size
+                or current_chars + len(text) > self.batch_chars
+            ):
+                batches.append((start, current))
+                start, current, current_chars = i, [], 0
+            current.append(text)
+            current_chars += len(text)
+        if current:
+            batches.append((start, current))
+        return batches
+
+    def _with_retry(self, fn: Callable[..., T], *args) -> T:
+        attempt = 0
+        while True:
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay *= 0.5 + random.random() / 2  # jitter
+                logger.warning(
+                    f"Embedding call failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    # -------------------------
+    # Embeddings interface
+    # -------------------------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        texts = list(texts)
+        with tracer.span("embedding.documents", texts=len(texts)) as span:
+            vectors = self._embed_documents(texts, span)
+        return vectors
+
+    def _embed_documents(self, texts: List[str], span) -> List[List[float]]:
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.cache_key, hashes)
+
+        # Embed each missing text once, even if it repeats within the call
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors and h not in missing:
+                missing[h] = text
+        if missing:
+            computed = dict(zip(missing, self._embed_uncached(list(missing.values()))))
+            self.cache.put_many(self.cache_key, computed)
+            vectors.update(computed)
+        logger.info(f"Embedding cache: {len(missing)} of {len(texts)} texts needed the backend")
+        span.set(backend_texts=len(missing))
+        return [vectors[h] for h in hashes]
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        batches = self._batches(texts)
+        if len(batches) == 1:
+            return self._with_retry(self.client.embed_documents, batches[0][1])
+
+        vectors: List[List[float]] = [None] * len(texts)
+        futures = [
+            (offset, self._executor.submit(self._with_retry, self.client.embed_documents, batch))
+            for offset, batch in batches
+        ]
+        for offset, future in futures:
+            for j, vector in enumerate(future.result()):
+                vectors[offset + j] = vector
+        logger.info(f"Embedded {len(texts)} texts in {len(batches)} batches")
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with tracer.span("embedding.query") as span:
+            if self.cache is None:
+                return self._with_retry(self.client.embed_query, text)
+            # Some backends embed queries with a different task type than documents
+            key, h = f"{self.cache_key}:query", text_hash(text)
+            vector = self.cache.get(key, h)
+            span.set(cached=vector is not None)
+            if vector is None:
+                vector = self._with_retry(self.client.embed_query, text)
+                self.cache.put_many(key, {h: vector})
+            return vector
+
+    def cache_stats(self) -> Dict[str, float]:
+        return self.cache.stats() if self.cache is not None else {}
+
+
+# One engine per (backend, model) for the whole process
+_engines: Dict[Tuple[str, str], EmbeddingEngine] = {}
+_engines_lock = threading.Lock()
+_cache: EmbeddingCache = None
+
+
+def get_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache, or None when disabled."""
+    global _cache
+    if _cache is None and EMBEDDING_CACHE_PATH:
+        _cache = EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def get_engine(model_type: str, model_name: str) -> EmbeddingEngine:
+    """Return the process-wide engine for a backend, creating it on first use."""
+    key = (model_type, model_name)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = EmbeddingEngine(model_type, model_name, cache=get_cache())
+            _engines[key] = engine
+            logger.info(f"Embedding engine created for {model_type}:{model_name}")
+        return engine
+
+
 class EmbeddingConfig:
     def __init__(self):
         self.embedding_model_name = env("EMBEDDING_MODEL_NAME")
         self.embedding_model_type = env("EMBEDDING_MODEL_TYPE")
-    
+
     def __call__(self, text: str) -> list[float]:
         if self.embedding_model_type == "google":
             return self.get_text_embedding(text, self.embedding_model_name)
         elif self.embedding_model_type == "ollama":
             return self.get_text_embedding_ollama(text, self.embedding_model_name)
-    
-    def get_embedding_model(self):
-        if self.embedding_model_type == "google":
-            return GoogleGenerativeAIEmbeddings(model=self.embedding_model_name, api_key=env("api_key"))
-        elif self.embedding_model_type == "ollama":
-            return OllamaEmbeddings(model=self.embedding_model_name, base_url=env("OLLAMA_BASE_URL"))
-        else:
+
+    def get_embedding_model(self) -> EmbeddingEngine:
+        if self.embedding_model_type not in ("google", "ollama"):
             raise ValueError("Invalid embedding model type")
+        return get_engine(self.embedding_model_type, self.embedding_model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts through the shared, batched engine."""
+        return self.get_embedding_model().embed_documents(texts)
 
     def get_text_embedding(self,text: str, EMBEDDING_MODEL_NAME) -> list[float]:
         if not text:
             return []
         try:
-            embedding = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL_NAME, api_key=env("api_key"))
-            embedding_result = embedding.embed_query(text=text)
-            return embedding_result
+            return get_engine("google", EMBEDDING_MODEL_NAME).embed_query(text)
         except Exception as e:
-            logger.error(f"Embedding Error: sleep for 60 seconds")
-            import time
-
-            time.sleep(60)
+            logger.error(f"Embedding Error: {e}", exc_info=True)
             return []
 
     def get_text_embedding_ollama(self,text: str, model: str = EMBEDDING_MODEL_NAME) -> list[float]:
@@ -54,16 +247,8 @@ class EmbeddingConfig:
             return []
 
         try:
-            response = OllamaEmbeddings(
-                model=model,
-                base_url=env("OLLAMA_BASE_URL"),
-                
-            )
-            return response.embed_query(text)
+            return get_engine("ollama", model).embed_query(text)
 
         except Exception as e:
             logger.error(f"Ollama embedding error: {e}", exc_info=True)
             return []
-    
-    
-
@@ -1,9 +1,13 @@
-import warnings , logging , environ , pathlib
+import warnings , logging , environ , pathlib , re , threading , time
+from queue import Empty, Full, Queue
+from typing import Iterable, List, Optional
 warnings.filterwarnings("ignore", module="librosa")
 
-from TTS.api import TTS
+import numpy as np
 import sounddevice as sd
 
+from core.tracing import tracer
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -13,35 +17,254 @@ logger = logging.getLogger(__name__)
 #initialize the environment variables
 env = environ.Env()
 base_dir = pathlib.Path(__file__).parent.parent
-environ.Env.read_env(base_dir / '.env') 
+environ.Env.read_env(base_dir / '.env')
 
 MODEL_TTS_NAME = env("MODEL_TTS_NAME" , default="")
 MODEL_TTS_TYPE = env("MODEL_TTS_TYPE" , default="tts")
+TTS_SPEAKER_INDEX = env.int("TTS_SPEAKER_INDEX", default=11)
+
+# Sentence boundary: terminal punctuation followed by whitespace, or a line break
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Don't synthesize fragments shorter than this unless the stream ended
+MIN_SENTENCE_CHARS = 12
+
+_END = object()
+
+
+class SentenceSplitter:
+    """Incrementally cut a token stream into speakable sentences."""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
 
-import DiffSinger.utils.hparams as hs
-from DiffSinger.inference.ds_variance import DiffSingerVarianceInfer  # Adjust based on actual module
 
 class TTS_INSTANCE:
     def __init__(self):
+        # Engines are imported here so text-only sessions never pay for them
         if MODEL_TTS_TYPE == "tts":
+            from TTS.api import TTS
             self.tts = TTS(MODEL_TTS_NAME, progress_bar=False, gpu=True)
+            # Resolve the voice and output rate once instead of on every utterance
+            self.speaker = self.tts.speakers[TTS_SPEAKER_INDEX] if self.tts.speakers else None
+            self.sample_rate = self.tts.synthesizer.output_sample_rate
         elif MODEL_TTS_TYPE == "vocoder":
+            import DiffSinger.utils.hparams as hs
+            from DiffSinger.inference.ds_variance import DiffSingerVarianceInfer  # Adjust based on actual module
             hs.load_config('DiffSinger/dsconfig.yaml')  # Load config
             self.tts = DiffSingerVarianceInfer()
+            self.speaker = None
+            self.sample_rate = None
         else:
             raise ValueError("Invalid model type")
+        self._speaker_engine: Optional["StreamingSpeaker"] = None
 
-    def speak(self, text):
+    def synthesize(self, text: str) -> np.ndarray:
         if MODEL_TTS_TYPE == "tts":
-            speaker = self.tts.speakers[11]
-            wav = self.tts.tts(
-                text=text,
-                speaker=speaker
-            )
-            sd.play(wav, samplerate=self.tts.synthesizer.output_sample_rate)
-            sd.wait()
+            with tracer.span("tts.synthesize", chars=len(text)):
+                wav = self.tts.tts(text=text, speaker=self.speaker)
+            return np.asarray(wav, dtype=np.float32)
         elif MODEL_TTS_TYPE == "vocoder":
-            pass
             # self.tts.run_inference('path/to/test.ds', out_path='output/test.wav')
+            return np.zeros(0, dtype=np.float32)
         else:
-            raise ValueError("Invalid model type")
\ No newline at end of file
+            raise ValueError("Invalid model type")
+
+    @property
+    def streaming(self) -> "StreamingSpeaker":
+        if self._speaker_engine is None:
+            self._speaker_engine = StreamingSpeaker(self)
+        return self._speaker_engine
+
+    def speak(self, text):
+        """Speak a full reply, starting playback after the first sentence is ready."""
+        if MODEL_TTS_TYPE == "vocoder":
+            return
+        self.streaming.speak(text)
+        self.streaming.wait()
+
+    def speak_stream(self, tokens: Iterable[str]):
+        """Speak while tokens are still arriving; returns once playback ends."""
+        if MODEL_TTS_TYPE == "vocoder":
+            return
+        self.streaming.speak_stream(tokens)
+        self.streaming.wait()
+
+    def stop(self):
+        """Barge-in: drop queued sentences and silence playback immediately."""
+        if self._speaker_engine is not None:
+            self._speaker_engine.cancel()
+
+
+class StreamingSpeaker:
+    """
+    Sentence-pipelined speech output.
+    Text is split into sentences on the caller's thread, a synthesis worker
+    turns them into audio while the previous sentence plays, and one
+    long-lived output stream drains the audio queue back to back so there are
+    no gaps between sentences.
+    """
+
+    def __init__(self, engine: TTS_INSTANCE, max_pending_audio: int = 4):
+        self.engine = engine
+        self._text: Queue = Queue()
+        self._audio: Queue = Queue(maxsize=max_pending_audio)
+        self._current: Optional[np.ndarray] = None
+        self._position = 0
+        self._generation = 0
+        # Callback-side state: the generation it last played, and whether the
+        # utterance's final samples are still in the device buffer
+        self._playing_generation = 0
+        self._draining = False
+        self._idle = threading.Event()
+        self._idle.set()
+        self._utterance_started: Optional[float] = None
+        self.time_to_first_audio: Optional[float] = None
+
+        self._worker = threading.Thread(target=self._synthesize_loop, name="tts-synth", daemon=True)
+        self._worker.start()
+        self._stream = sd.OutputStream(
+            samplerate=engine.sample_rate,
+            channels=1,
+            dtype="float32",
+            callback=self._play_callback,
+        )
+        self._stream.start()
+
+    # -------------------------
+    # Producer side
+    # -------------------------
+    def _begin(self):
+        self._idle.clear()
+        self._utterance_started = time.perf_counter()
+        self.time_to_first_audio = None
+
+    def speak(self, text: str):
+        self._begin()
+        splitter = SentenceSplitter()
+        for sentence in splitter.feed(text) + splitter.flush():
+            self._text.put((self._generation, sentence))
+        self._text.put((self._generation, _END))
+
+    def speak_stream(self, tokens: Iterable[str]):
+        self._begin()
+        generation = self._generation
+        splitter = SentenceSplitter()
+        for token in tokens:
+            if generation != self._generation:
+                return
+            for sentence in splitter.feed(token):
+                self._text.put((generation, sentence))
+        for sentence in splitter.flush():
+            self._text.put((generation, sentence))
+        self._text.put((generation, _END))
+
+    def cancel(self):
+        """
+        Stop speaking now; anything queued for the current utterance is discarded.
+        The audio callback notices the new generation and drops the block it is
+        playing, so only the callback ever touches `_current`.
+        """
+        self._generation += 1
+        for q in (self._text, self._audio):
+            while True:
+                try:
+                    q.get_nowait()
+                except Empty:
+                    break
+        self._idle.set()
+        logger.info("[TTS] Playback cancelled (barge-in)")
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._idle.wait(timeout)
+
+    def close(self):
+        self.cancel()
+        self._text.put((None, None))
+        self._stream.stop()
+        self._stream.close()
+
+    # -------------------------
+    # Synthesis worker
+    # -------------------------
+    def _synthesize_loop(self):
+        while True:
+            generation, sentence = self._text.get()
+            if generation is None:
+                return
+            if generation != self._generation:
+                continue
+            if sentence is _END:
+                self._put_audio(generation, _END)
+                continue
+            try:
+                audio = self.engine.synthesize(sentence)
+            except Exception as e:
+                logger.error(f"[TTS] Synthesis failed for sentence: {e}")
+                continue
+            self._put_audio(generation, audio)
+
+    def _put_audio(self, generation: int, item):
+        # Bounded queue: synthesis stays at most a few sentences ahead of playback
+        while generation == self._generation:
+            try:
+                self._audio.put((generation, item), timeout=0.1)
+                return
+            except Full:
+                continue
+
+    # -------------------------
+    # Audio callback
+    # -------------------------
+    def _play_callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        generation = self._generation
+        if generation != self._playing_generation:
+            # Cancelled since the last call
+            self._playing_generation = generation
+            self._current = None
+            self._draining = False
+        elif self._draining:
+            # The block with the utterance's last samples was played out in the previous period
+            self._draining = False
+            self._idle.set()
+
+        filled = 0
+        while filled < frames:
+            if self._current is None or self._position >= len(self._current):
+                try:
+                    item_generation, item = self._audio.get_nowait()
+                except Empty:
+                    break
+                if item_generation != generation:
+                    continue
+                if item is _END:
+                    self._current = None
+                    self._draining = True
+                    break
+                self._current, self._position = item, 0
+                if self.time_to_first_audio is None and self._utterance_started is not None:
+                    self.time_to_first_audio = time.perf_counter() - self._utterance_started
+                    logger.info(f"[TTS] Time to first audio: {self.time_to_first_audio:.3f}s")
+                    tracer.observe("tts.time_to_first_audio.ms", self.time_to_first_audio * 1000)
+            count = min(frames - filled, len(self._current) - self._position)
+            out[filled:filled + count] = self._current[self._position:self._position + count]
+            self._position += count
+            filled += count
+        out[filled:] = 0
@@ -1,11 +1,24 @@
 import logging
-import whisper
+import threading
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-logger.info("Loading Whisper...")
-whisper_model = whisper.load_model("small", device="cpu").cpu()
-logger.info("Whisper loaded.\n")
\ No newline at end of file
+WHISPER_MODEL_NAME = "small"
+
+_whisper_model = None
+_lock = threading.Lock()
+
+
+def get_whisper_model():
+    """Load Whisper on first use; importing it and reading the weights takes several seconds."""
+    global _whisper_model
+    with _lock:
+        if _whisper_model is None:
+            import whisper
+            logger.info("Loading Whisper...")
+            _whisper_model = whisper.load_model(WHISPER_MODEL_NAME, device="cpu").cpu()
+            logger.info("Whisper loaded.\n")
+        return _whisper_model
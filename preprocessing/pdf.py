@@ -1,10 +1,22 @@
+import os
 import pypdf
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pages handed to one worker task, and pages chunked together as one window
+PAGES_PER_TASK = 16
+PAGES_PER_WINDOW = 2
+POOL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
 
 def split_text_into_chunks(text, chunk_size=1000, chunk_overlap=300):
     """Split text into chunks for processing."""
@@ -16,13 +28,97 @@ def split_text_into_chunks(text, chunk_size=1000, chunk_overlap=300):
 def extract_text_from_pdf(pdf_path):
     """Extract text from a PDF file."""
     try:
-        # Open the PDF file
-        with open(pdf_path, "rb") as file:
-            reader = pypdf.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text()
-        return text
+        return "".join(text for _, text in iter_pages(pdf_path))
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+
+# -------------------------
+# Streaming pipeline stages
+# -------------------------
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Process pool shared by every extraction in this process.
+    Workers are spawned, not forked: the assistant process already runs the
+    watcher, scheduler and HTTP client threads, and a fork can inherit their
+    locks in a held state.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def count_pages(pdf_path: str) -> int:
+    with open(pdf_path, "rb") as file:
+        return len(pypdf.PdfReader(file).pages)
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Worker task: extract pages [start, stop) of a PDF."""
+    with open(pdf_path, "rb") as file:
+        reader = pypdf.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pages(pdf_path: str, pages_per_task: int = PAGES_PER_TASK, pool: ProcessPoolExecutor = None,
+               max_workers: int = POOL_WORKERS) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) in page order, 1-based.
+    Page ranges are extracted on the process pool with a bounded number of
+    ranges in flight, so memory stays proportional to the pool size rather
+    than to the document. Small PDFs are extracted in-process. Pass
+    `max_workers` along with a custom `pool`.
+    """
+    total = count_pages(pdf_path)
+    ranges = [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+
+    if len(ranges) <= 1:
+        for start, stop in ranges:
+            for offset, text in enumerate(_extract_page_range(pdf_path, start, stop)):
+                yield start + offset + 1, text
+        return
+
+    pool = pool or get_pool()
+    max_in_flight = 2 * max(1, max_workers)
+    pending = []
+    next_range = 0
+    while pending or next_range < len(ranges):
+        while next_range < len(ranges) and len(pending) < max_in_flight:
+            start, stop = ranges[next_range]
+            pending.append((start, pool.submit(_extract_page_range, pdf_path, start, stop)))
+            next_range += 1
+        start, future = pending.pop(0)
+        for offset, text in enumerate(future.result()):
+            yield start + offset + 1, text
+
+
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]],
+    source: str,
+    pages_per_window: int = PAGES_PER_WINDOW,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 300,
+) -> Iterator[Document]:
+    """
+    Chunk pages window by window.
+    Windows are aligned to fixed page boundaries, so editing one page only
+    changes the chunks of the window that contains it.
+    """
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    window: List[Tuple[int, str]] = []
+
+    def flush():
+        text = "".join(text for _, text in window)
+        metadata = {"source": source, "page": window[0][0], "page_end": window[-1][0]}
+        for chunk in splitter.split_text(text):
+            yield Document(page_content=chunk, metadata=dict(metadata))
+
+    for page_number, text in pages:
+        if window and (page_number - 1) // pages_per_window != (window[0][0] - 1) // pages_per_window:
+            yield from flush()
+            window = []
+        window.append((page_number, text))
+    if window:
+        yield from flush()
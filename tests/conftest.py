@@ -0,0 +1,44 @@
+import hashlib
+import os
+import re
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+# config.* reads these at import time; no test talks to a model server
+os.environ.setdefault("EMBEDDING_MODEL_NAME", "test")
+os.environ.setdefault("EMBEDDING_MODEL_TYPE", "ollama")
+os.environ.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+os.environ.setdefault("TRACE_ENABLED", "false")
+
+_WORD = re.compile(r"\w+")
+
+
+class WordEmbeddings(Embeddings):
+    """Bag of hashed words: texts sharing words are similar, which is all retrieval tests need."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+@pytest.fixture
+def embeddings() -> WordEmbeddings:
+    return WordEmbeddings()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+for module in ("noisereduce", "sounddevice", "webrtcvad"):
+    pytest.importorskip(module)
+
+from voices.capture import RingBuffer
+
+
+def _samples(start, stop):
+    return np.arange(start, stop, dtype=np.float32)
+
+
+def test_last_returns_samples_in_order_across_the_wrap():
+    ring = RingBuffer(8)
+    ring.write(_samples(0, 5))
+    ring.write(_samples(5, 11))
+    assert len(ring) == 8
+    np.testing.assert_array_equal(ring.last(8), _samples(3, 11))
+    np.testing.assert_array_equal(ring.last(3), _samples(8, 11))
+
+
+@pytest.mark.parametrize("offset", [0, 3, 7])
+def test_write_larger_than_capacity_keeps_the_newest_samples_in_order(offset):
+    ring = RingBuffer(8)
+    ring.write(_samples(0, offset))
+    ring.write(_samples(offset, offset + 21))
+    np.testing.assert_array_equal(ring.last(8), _samples(offset + 13, offset + 21))
+    # Later small writes continue from the right place
+    ring.write(_samples(offset + 21, offset + 24))
+    np.testing.assert_array_equal(ring.last(8), _samples(offset + 16, offset + 24))
+
+
+def test_clear_and_short_reads():
+    ring = RingBuffer(4)
+    ring.write(_samples(0, 2))
+    np.testing.assert_array_equal(ring.last(10), _samples(0, 2))
+    ring.clear()
+    assert len(ring) == 0
+    assert ring.last(4).size == 0
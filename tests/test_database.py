@@ -0,0 +1,95 @@
+import pytest
+from langchain_core.documents import Document
+
+
+@pytest.fixture
+def database(tmp_path, embeddings, monkeypatch):
+    import config.database as database
+    import models.embedding as embedding
+
+    monkeypatch.setattr(embedding, "_build_client", lambda model_type, model_name: embeddings)
+    monkeypatch.setattr(embedding, "_engines", {})
+    monkeypatch.setattr(database, "DB_LOCATION", str(tmp_path / "db"))
+    monkeypatch.setattr(database, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(database, "VECTOR_SERVICE_HOST", "")
+    db = database.Database()
+    yield db
+    db.backend.close()
+
+
+def _chunks(*texts, source="notes.pdf"):
+    return [Document(page_content=text, metadata={"source": source}) for text in texts]
+
+
+def test_rollback_removes_only_what_the_session_added(database):
+    database.add_documents(_chunks("Mitochondria produce ATP.", "Ribosomes build proteins."))
+    kept = sorted(database.backend.ids_for_source("notes.pdf"))
+    manifest = database.manifest.get("notes.pdf")
+
+    session = database.begin_ingest("notes.pdf")
+    assert session.upsert(_chunks("Mitochondria produce ATP.", "Chloroplasts absorb light.")) == 1
+    assert database.backend.count() == 3
+    session.rollback()
+
+    assert sorted(database.backend.ids_for_source("notes.pdf")) == kept
+    assert database.manifest.get("notes.pdf") == manifest
+
+
+def test_rollback_of_a_new_source_leaves_nothing_behind(database):
+    session = database.begin_ingest("draft.pdf")
+    session.upsert(_chunks("Eigenvalues solve the characteristic polynomial.", source="draft.pdf"))
+    session.upsert(_chunks("Determinants vanish for singular matrices.", source="draft.pdf"))
+    session.rollback()
+    assert database.backend.count() == 0
+    assert database.known_sources() == []
+    assert session.added == 0
+
+
+def test_commit_removes_chunks_that_vanished(database):
+    database.add_documents(_chunks("Old first page.", "Shared second page."))
+    session = database.begin_ingest("notes.pdf")
+    session.upsert(_chunks("Shared second page.", "New third page."))
+    session.commit("v2")
+    texts = [doc.page_content for doc, _ in database.backend.similarity_search([1.0] * 64, k=10)]
+    assert sorted(texts) == ["New third page.", "Shared second page."]
+    assert database.manifest.content_hash("notes.pdf") == "v2"
+
+
+def test_results_are_cached_per_normalized_query(database):
+    database.add_documents(_chunks("Mitochondria produce ATP through respiration."))
+    first = database.get_content("What do mitochondria produce?", k=1)
+    again = database.get_content("  what do MITOCHONDRIA produce ", k=1)
+    assert [doc.page_content for doc in again] == [doc.page_content for doc in first]
+    stats = database.cache_stats()
+    assert stats["results"]["hits"] == 1
+    assert stats["query_embeddings"]["misses"] == 1
+    # Symbols other than trailing punctuation change the question
+    database.get_content("c++ templates", k=1)
+    database.get_content("c# templates", k=1)
+    assert database.cache_stats()["results"]["hits"] == 1
+
+
+def test_writes_invalidate_cached_results(database):
+    query = "how do chloroplasts absorb light"
+    assert database.get_content(query, k=1) == []
+    generation = database.generation
+
+    database.add_documents(_chunks("Chloroplasts absorb light for photosynthesis.", source="bio.pdf"))
+    assert database.generation > generation
+    assert [doc.metadata["source"] for doc in database.get_content(query, k=1)] == ["bio.pdf"]
+
+    database.delete_source("bio.pdf")
+    assert database.get_content(query, k=1) == []
+    # Each lookup after a write missed; the query embedding was still reused
+    stats = database.cache_stats()
+    assert stats["results"]["hits"] == 0
+    assert stats["query_embeddings"]["hits"] == 2
+
+
+def test_rollback_invalidates_cached_results(database):
+    query = "determinants of singular matrices"
+    session = database.begin_ingest("draft.pdf")
+    session.upsert(_chunks("Determinants vanish for singular matrices.", source="draft.pdf"))
+    assert database.get_content(query, k=1)
+    session.rollback()
+    assert database.get_content(query, k=1) == []
@@ -0,0 +1,203 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from config.session_index import SessionIndex
+from tools.network.fetch import PageFetcher
+
+PAGE_DELAY = 0.3
+
+PAGES = {
+    "/photosynthesis": (
+        "Photosynthesis",
+        "Photosynthesis converts light energy into chemical energy in the chloroplasts of plant cells. "
+        "Chlorophyll absorbs light and the energy splits water, releasing oxygen as a by-product.",
+    ),
+    "/mitochondria": (
+        "Mitochondria",
+        "Mitochondria produce most of the cell's supply of ATP through cellular respiration. "
+        "The electron transport chain in the inner membrane drives ATP synthase.",
+    ),
+}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if self.path == "/slow":
+                time.sleep(2.0)
+                self._send(200, b"<p>too late to matter for anyone</p>")
+            elif self.path == "/big":
+                self._send(200, b"x" * 1_000_000, "text/plain")
+            elif self.path.startswith("/page/"):
+                time.sleep(PAGE_DELAY)
+                self._send(200, f"<html><title>Page</title><body><nav>Home</nav>"
+                                f"<p>This is fixture page {self.path[6:]} with some text.</p></body></html>".encode())
+            elif self.path in PAGES:
+                title, text = PAGES[self.path]
+                self._send(200, f"<html><title>{title}</title><body><p>{text}</p></body></html>".encode())
+            else:
+                self._send(404, b"not found")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def site():
+    server, url = _serve()
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def other_site():
+    server, url = _serve()
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = PageFetcher(max_connections=8, per_host=2, timeout=1.0, max_bytes=10_000)
+    yield fetcher
+    fetcher.close()
+
+
+def test_fetch_extracts_main_text(site, fetcher):
+    _, url = site
+    result = fetcher.fetch(f"{url}/page/1")
+    assert result.ok
+    assert result.title == "Page"
+    assert result.text == "This is fixture page 1 with some text."
+
+
+def test_per_host_limit(site, fetcher):
+    server, url = site
+    started = time.perf_counter()
+    results = fetcher.fetch_many([f"{url}/page/{i}" for i in range(6)])
+    elapsed = time.perf_counter() - started
+
+    assert all(r.ok for r in results)
+    assert [r.text for r in results] == [f"This is fixture page {i} with some text." for i in range(6)]
+    assert server.max_in_flight == 2
+    # Six pages, two at a time
+    assert elapsed >= 3 * PAGE_DELAY
+
+
+def test_hosts_fetched_concurrently(site, other_site, fetcher):
+    (first, url), (second, other_url) = site, other_site
+    urls = [f"{url}/page/{i}" for i in range(2)] + [f"{other_url}/page/{i}" for i in range(2)]
+    started = time.perf_counter()
+    results = fetcher.fetch_many(urls)
+    elapsed = time.perf_counter() - started
+
+    assert all(r.ok for r in results)
+    assert first.max_in_flight == second.max_in_flight == 2
+    # All four run at once; one at a time would take 4 * PAGE_DELAY
+    assert elapsed < 2 * PAGE_DELAY
+
+
+def test_timeout(site, fetcher):
+    _, url = site
+    started = time.perf_counter()
+    result = fetcher.fetch(f"{url}/slow")
+    assert not result.ok
+    assert result.error
+    assert time.perf_counter() - started < 1.9
+
+
+def test_byte_cap(site, fetcher):
+    _, url = site
+    result = fetcher.fetch(f"{url}/big")
+    assert result.ok
+    assert len(result.text) == 10_000
+
+
+def test_http_error(site, fetcher):
+    _, url = site
+    result = fetcher.fetch(f"{url}/missing")
+    assert result.status == 404
+    assert result.error == "HTTP 404"
+    assert not result.ok
+
+
+@pytest.fixture
+def session_index(embeddings):
+    index = SessionIndex()
+    index.min_relevance_threshold = 0.0
+    index._store = InMemoryVectorStore(embedding=embeddings)
+    return index
+
+
+def test_session_index_answers_from_fetched_pages(site, fetcher, session_index):
+    _, url = site
+    for result in fetcher.fetch_many([f"{url}{path}" for path in PAGES]):
+        session_index.add_page(result.url, result.text, result.title)
+
+    documents = session_index.get_content("how does chlorophyll absorb light in photosynthesis", k=1)
+    assert [doc.metadata["source"] for doc in documents] == [f"{url}/photosynthesis"]
+    assert documents[0].metadata["title"] == "Photosynthesis"
+
+
+def test_session_index_applies_relevance_threshold(site, fetcher, session_index):
+    _, url = site
+    result = fetcher.fetch(f"{url}/mitochondria")
+    session_index.add_page(result.url, result.text, result.title)
+
+    assert session_index.get_content("mitochondria ATP synthase", k=1)
+    assert session_index.get_content("unrelated words entirely", k=1, min_relevance=0.5) == []
+    session_index.min_relevance_threshold = 0.99
+    assert session_index.get_content("mitochondria ATP synthase", k=1) == []
+
+
+def test_session_index_replaces_reread_pages(session_index):
+    session_index.add_page("https://example.org/a", "Old text about the French revolution and its causes.")
+    session_index.add_page("https://example.org/a", "New text about the Krebs cycle and its enzymes.")
+    documents = session_index.get_content("Krebs cycle enzymes", k=4)
+    assert len(session_index) == 1
+    assert [doc.page_content for doc in documents] == ["New text about the Krebs cycle and its enzymes."]
+
+
+def test_session_index_embeds_outside_its_lock(session_index, embeddings, monkeypatch):
+    embed_documents = embeddings.embed_documents
+    held = []
+
+    def checked(texts):
+        held.append(session_index._lock.locked())
+        return embed_documents(texts)
+
+    monkeypatch.setattr(embeddings, "embed_documents", checked)
+    session_index.add_page("https://example.org/b", "Ribosomes translate messenger RNA into proteins.")
+    assert held == [False]
+    assert session_index.get_content("ribosomes proteins", k=1)[0].metadata["source"] == "https://example.org/b"
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from config.numpy_index import NumpyIndex
+
+
+def _documents(n, source="notes.pdf", prefix="chunk"):
+    return [Document(page_content=f"{prefix} {i}", metadata={"source": source, "i": i}) for i in range(n)]
+
+
+def _clustered(n, dim=32, clusters=8, seed=0):
+    """Unit vectors around `clusters` random centres, so IVF lists have something to find."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(clusters, size=n)] + 0.1 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def open_index(tmp_path, embeddings):
+    indexes = []
+
+    def open_index(**options) -> NumpyIndex:
+        index = NumpyIndex(embeddings, str(tmp_path / "index"), **options)
+        indexes.append(index)
+        return index
+
+    yield open_index
+    for index in indexes:
+        index.close()
+
+
+def test_search_ranks_by_cosine_similarity(open_index, embeddings):
+    index = open_index()
+    texts = ["Mitochondria produce ATP.", "Chloroplasts absorb light.", "Eigenvalues of a matrix."]
+    index.add_documents([Document(page_content=t, metadata={"source": "bio.pdf"}) for t in texts], ["a", "b", "c"])
+    results = index.similarity_search(embeddings.embed_query("how do chloroplasts absorb light"), k=2)
+    assert [doc.id for doc, _ in results][0] == "b"
+    assert results[0][1] >= results[1][1]
+    assert index.similarity_search(embeddings.embed_query("light"), k=0) == []
+
+
+def test_delete_tombstones_and_reopens(open_index):
+    vectors = _clustered(10)
+    index = open_index()
+    index.add_documents(_documents(10), [f"id{i}" for i in range(10)], vectors.tolist())
+    index.delete(["id3", "id4"])
+    assert index.count() == 8
+    assert "id3" not in [doc.id for doc, _ in index.similarity_search(vectors[3].tolist(), k=10)]
+    index.close()
+
+    reopened = open_index()
+    assert reopened.count() == 8
+    assert sorted(reopened.ids_for_source("notes.pdf")) == sorted(f"id{i}" for i in range(10) if i not in (3, 4))
+    doc, score = reopened.similarity_search(vectors[7].tolist(), k=1)[0]
+    assert (doc.id, doc.metadata["i"]) == ("id7", 7)
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_re_adding_an_id_replaces_it(open_index, embeddings):
+    index = open_index()
+    index.add_documents([Document(page_content="old text", metadata={"source": "a"})], ["x"])
+    index.add_documents([Document(page_content="new text", metadata={"source": "a"})], ["x"])
+    assert index.count() == 1
+    assert index.similarity_search(embeddings.embed_query("text"), k=5)[0][0].page_content == "new text"
+
+
+def test_compaction_keeps_rows_and_results(open_index):
+    vectors = _clustered(3000)
+    index = open_index()
+    ids = [f"id{i}" for i in range(3000)]
+    index.add_documents(_documents(3000), ids, vectors.tolist())
+    index.delete(ids[:2500])
+    # More than half the rows were dead, so the file was rewritten without them
+    assert index._rows == 500
+    assert index.count() == 500
+    doc, _ = index.similarity_search(vectors[2900].tolist(), k=1)[0]
+    assert doc.id == "id2900"
+    index.close()
+    assert open_index().similarity_search(vectors[2600].tolist(), k=1)[0][0].id == "id2600"
+
+
+def test_float16_index_keeps_its_dtype(open_index):
+    vectors = _clustered(20)
+    index = open_index(dtype="float16")
+    index.add_documents(_documents(20), [f"id{i}" for i in range(20)], vectors.tolist())
+    assert index.similarity_search(vectors[5].tolist(), k=1)[0][0].id == "id5"
+    index.close()
+    assert open_index(dtype="float32").dtype == np.float16
+
+
+def test_ivf_trains_and_finds_the_same_neighbours(open_index, tmp_path, embeddings):
+    vectors = _clustered(1000)
+    ids = [f"id{i}" for i in range(1000)]
+    index = open_index(ivf_lists=8, ivf_probes=3)
+    # Below 8 lists x 40 points per list the index stays flat
+    index.add_documents(_documents(200), ids[:200], vectors[:200].tolist())
+    assert index._centroids is None
+    index.add_documents(_documents(800, prefix="more"), ids[200:], vectors[200:].tolist())
+    assert index._centroids is not None
+    assert (index._lists[:1000] >= 0).all()
+
+    flat = NumpyIndex(embeddings, str(tmp_path / "flat"))
+    try:
+        flat.add_documents(_documents(1000), ids, vectors.tolist())
+        queries = vectors[::50] + 0.05 * np.random.default_rng(1).normal(size=(20, vectors.shape[1]))
+        overlap = [
+            len({d.id for d, _ in index.similarity_search(q.tolist(), k=5)} &
+                {d.id for d, _ in flat.similarity_search(q.tolist(), k=5)})
+            for q in queries
+        ]
+        assert sum(overlap) >= 0.9 * 5 * len(queries)
+    finally:
+        flat.close()
+
+    # Rows added after training go straight into a list, and the lists survive a reopen
+    index.add_documents(_documents(1, prefix="late"), ["late"], [vectors[0].tolist()])
+    assert index._lists[index._rows - 1] >= 0
+    index.close()
+    reopened = open_index(ivf_lists=8, ivf_probes=3)
+    assert reopened._centroids is not None
+    assert reopened.similarity_search(vectors[10].tolist(), k=1)[0][0].id == "id10"
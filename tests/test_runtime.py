@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from core.runtime import AgentRuntime
+
+
+class Agent:
+    """prepare/run_turn pair for the runtime; `slow` inputs take a while to prepare or answer."""
+
+    def __init__(self, prepare_seconds=None, turn_seconds=None):
+        self.prepare_seconds = prepare_seconds or {}
+        self.turn_seconds = turn_seconds or {}
+        self.answered = []
+
+    def prepare(self, kind, data):
+        time.sleep(self.prepare_seconds.get(data, 0.0))
+        return HumanMessage(content=data)
+
+    async def run_turn(self, state):
+        question = state["messages"][-1].content
+        await asyncio.sleep(self.turn_seconds.get(question, 0.0))
+        self.answered.append(question)
+        return {"messages": state["messages"] + [AIMessage(content=f"re: {question}")]}
+
+
+def _contents(runtime):
+    return [message.content for message in runtime.state["messages"]]
+
+
+def _run(runtime, events):
+    """Post `(delay, kind, data)` events to the runtime, then stop it once it's idle."""
+
+    async def main():
+        task = asyncio.create_task(runtime.run())
+        for delay, kind, data in events:
+            await asyncio.sleep(delay)
+            runtime.put((kind, data))
+        # Let the dispatcher pick up the last event before checking for idle
+        await asyncio.sleep(0.05)
+        while runtime._busy() or runtime._deferred:
+            await asyncio.sleep(0.01)
+        runtime.put(("exit", None))
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(main())
+
+
+def test_turns_run_in_order():
+    agent = Agent()
+    runtime = AgentRuntime({"messages": []}, agent.prepare, agent.run_turn)
+    _run(runtime, [(0, "user", "one"), (0.1, "user", "two")])
+    assert _contents(runtime) == ["one", "re: one", "two", "re: two"]
+
+
+def test_new_input_cancels_generation_and_keeps_the_old_input():
+    agent = Agent(turn_seconds={"slow": 5.0})
+    runtime = AgentRuntime({"messages": []}, agent.prepare, agent.run_turn)
+    _run(runtime, [(0, "user", "slow"), (0.1, "user", "fast")])
+    assert agent.answered == ["fast"]
+    assert _contents(runtime) == ["slow", "fast", "re: fast"]
+
+
+def test_input_cancelled_while_waiting_is_kept():
+    # "b" is still being prepared behind the cancelled "a" when "c" supersedes it
+    agent = Agent(prepare_seconds={"b": 0.3}, turn_seconds={"a": 5.0})
+    runtime = AgentRuntime({"messages": []}, agent.prepare, agent.run_turn)
+    _run(runtime, [(0, "user", "a"), (0.1, "user", "b"), (0.05, "user", "c")])
+    assert agent.answered == ["c"]
+    assert _contents(runtime) == ["a", "b", "c", "re: c"]
+
+
+def test_without_interrupt_turns_queue_up():
+    agent = Agent(turn_seconds={"slow": 0.2})
+    runtime = AgentRuntime({"messages": []}, agent.prepare, agent.run_turn, interrupt=False)
+    _run(runtime, [(0, "user", "slow"), (0.05, "user", "next")])
+    assert _contents(runtime) == ["slow", "re: slow", "next", "re: next"]
+
+
+def test_deferred_events_are_coalesced_after_the_user_turn():
+    agent = Agent(turn_seconds={"question": 0.2})
+    runtime = AgentRuntime({"messages": []}, agent.prepare, agent.run_turn)
+    _run(runtime, [(0, "user", "question"), (0.05, "files", "a.pdf"), (0, "files", "b.pdf")])
+    assert _contents(runtime) == ["question", "re: question", "a.pdf\n\nb.pdf", "re: a.pdf\n\nb.pdf"]
+
+
+def test_events_posted_before_the_loop_starts_are_kept():
+    agent = Agent()
+    runtime = AgentRuntime({"messages": []}, agent.prepare, agent.run_turn)
+    runtime.put(("user", "early"))
+    _run(runtime, [])
+    assert _contents(runtime) == ["early", "re: early"]
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+import handlation.scheduler as scheduler_module
+from handlation.pipeline import IngestCancelled, PipelineStats
+from handlation.scheduler import PRIORITY_USER, PRIORITY_WATCHER, IngestionScheduler
+
+
+class FakeIngest:
+    """Stands in for ingest_pdf: each file takes `durations[name]` seconds and honours cancellation."""
+
+    def __init__(self, durations=None, rollback_seconds: float = 0.0):
+        self.durations = durations or {}
+        self.rollback_seconds = rollback_seconds
+        self.started = []
+        self.rolled_back = []
+        self.hashes = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, path, database, on_progress=None, should_cancel=None, **kwargs):
+        self.started.append(path.rsplit("/", 1)[-1])
+        self.hashes.append(kwargs.get("content_hash"))
+        self.release.wait()
+        deadline = time.monotonic() + self.durations.get(path.rsplit("/", 1)[-1], 0.0)
+        while time.monotonic() < deadline:
+            if should_cancel():
+                time.sleep(self.rollback_seconds)
+                self.rolled_back.append(path)
+                raise IngestCancelled()
+            time.sleep(0.01)
+        return PipelineStats(path)
+
+
+@pytest.fixture
+def files(tmp_path):
+    def make(*names):
+        paths = []
+        for name in names:
+            path = tmp_path / name
+            path.write_text(name)
+            paths.append(str(path))
+        return paths
+    return make
+
+
+@pytest.fixture
+def fake_ingest(monkeypatch):
+    fake = FakeIngest()
+    monkeypatch.setattr(scheduler_module, "ingest_pdf", fake)
+    return fake
+
+
+def test_jobs_run_by_priority(files, fake_ingest):
+    fake_ingest.release.clear()
+    scheduler = IngestionScheduler(database=None, workers=1)
+    blocker, low, high = files("blocker.pdf", "low.pdf", "high.pdf")
+    jobs = [scheduler.submit(blocker), scheduler.submit(low, PRIORITY_WATCHER), scheduler.submit(high, PRIORITY_USER)]
+    fake_ingest.release.set()
+    assert all(job.wait(5) for job in jobs)
+    assert fake_ingest.started == ["blocker.pdf", "high.pdf", "low.pdf"]
+    assert [job.status for job in jobs] == ["done", "done", "done"]
+    scheduler.shutdown(grace=1)
+
+
+def test_identical_submissions_share_a_job(files, fake_ingest):
+    fake_ingest.release.clear()
+    scheduler = IngestionScheduler(database=None, workers=1)
+    path, = files("notes.pdf")
+    first = scheduler.submit(path, PRIORITY_WATCHER)
+    assert scheduler.submit(path, PRIORITY_USER) is first
+    fake_ingest.release.set()
+    assert first.wait(5)
+    assert scheduler.get(first.id) is first
+    scheduler.shutdown(grace=1)
+
+
+def test_cancel_queued_job(files, fake_ingest):
+    fake_ingest.release.clear()
+    scheduler = IngestionScheduler(database=None, workers=1)
+    running, queued = files("a.pdf", "b.pdf")
+    scheduler.submit(running)
+    job = scheduler.submit(queued)
+    assert scheduler.cancel(queued)
+    assert job.status == "cancelled"
+    fake_ingest.release.set()
+    scheduler.shutdown(grace=1)
+    assert "b.pdf" not in fake_ingest.started
+
+
+def test_shutdown_lets_running_jobs_finish(files, fake_ingest):
+    fake_ingest.durations = {"short.pdf": 0.3}
+    scheduler = IngestionScheduler(database=None, workers=1)
+    short, queued = files("short.pdf", "queued.pdf")
+    running = scheduler.submit(short)
+    waiting = scheduler.submit(queued)
+    time.sleep(0.1)
+    scheduler.shutdown(grace=5)
+    assert running.status == "done"
+    assert waiting.status == "cancelled"
+    assert fake_ingest.rolled_back == []
+
+
+def test_shutdown_waits_for_rollback_after_grace(files, fake_ingest):
+    fake_ingest.durations = {"long.pdf": 30.0}
+    fake_ingest.rollback_seconds = 0.3
+    scheduler = IngestionScheduler(database=None, workers=1)
+    path, = files("long.pdf")
+    job = scheduler.submit(path)
+    time.sleep(0.1)
+    scheduler.shutdown(grace=0.2, rollback_wait=5)
+    # The rollback finished before shutdown returned
+    assert fake_ingest.rolled_back == [path]
+    assert job.status == "cancelled"
+
+
+def test_digest_is_passed_through_to_the_pipeline(files, fake_ingest, monkeypatch):
+    calls = []
+    monkeypatch.setattr(scheduler_module, "file_digest", lambda path: calls.append(path) or "computed")
+    scheduler = IngestionScheduler(database=None, workers=1)
+    hashed, unhashed = files("hashed.pdf", "unhashed.pdf")
+    jobs = [scheduler.submit(hashed, file_hash="known"), scheduler.submit(unhashed)]
+    assert all(job.wait(5) for job in jobs)
+    assert fake_ingest.hashes == ["known", "computed"]
+    assert calls == [unhashed]
+    scheduler.shutdown(grace=1)
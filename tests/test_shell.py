@@ -0,0 +1,52 @@
+import sys
+import time
+
+import pytest
+
+import tools.system.run_command as run_command_module
+from tools.system.shell import OutputBudget, ShellSession, run_streaming
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX shell")
+
+
+def test_output_keeps_head_and_tail():
+    returncode, output, timed_out = run_streaming("seq 1 1000", budget=OutputBudget(max_bytes=10_000, max_lines=10))
+    assert (returncode, timed_out) == (0, False)
+    assert output.startswith("1\n2\n3\n4\n5\n")
+    assert output.endswith("996\n997\n998\n999\n1000\n")
+    assert "[990 lines" in output
+
+
+def test_output_without_newlines_stays_within_budget():
+    # 2 MB on one line: read in pieces, so only the budget's worth is ever kept
+    budget = OutputBudget(max_bytes=2000, max_lines=20)
+    returncode, output, _ = run_streaming("head -c 2000000 /dev/zero | tr '\\0' x", budget=budget)
+    assert returncode == 0
+    assert output.count("x") <= 2000
+    assert output.count("x") + budget.omitted_bytes == 2_000_000
+
+
+def test_timeout_kills_the_command():
+    started = time.monotonic()
+    returncode, output, timed_out = run_streaming("echo before; sleep 30", timeout=0.5)
+    assert timed_out and returncode is None
+    assert output == "before\n"
+    assert time.monotonic() - started < 10
+
+
+def test_session_keeps_state_and_output_without_trailing_newline():
+    session = ShellSession("test")
+    try:
+        assert session.run("cd /tmp && export GREETING=hi")[0] == 0
+        assert session.run("pwd")[1] == "/tmp\n"
+        assert session.run("printf %s $GREETING") == (0, "hi\n", False)
+        assert session.run("false")[0] == 1
+    finally:
+        session.close()
+
+
+def test_run_command_timeout_is_clamped(monkeypatch):
+    seen = []
+    monkeypatch.setattr(run_command_module, "run_streaming", lambda command, timeout: seen.append(timeout) or (0, "", False))
+    run_command_module.run_command.invoke({"command": "true", "timeout": 10_000})
+    assert seen == [run_command_module.RUN_COMMAND_TIMEOUT]
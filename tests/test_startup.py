@@ -0,0 +1,66 @@
+import threading
+import time
+
+from core.startup import StartupManager
+
+
+def test_queued_dependency_is_loaded_by_the_worker_that_needs_it():
+    # One worker: "agent" runs first and needs "database", which is queued behind it
+    startup = StartupManager(max_workers=1)
+    queued = threading.Event()
+    startup.register("gate", lambda: queued.wait(5))
+    startup.register("database", lambda: "db")
+    startup.register("agent", lambda: f"agent on {startup.get('database')}", depends=["database"])
+    _, agent, database = startup.warm_up(["gate", "agent", "database"])
+    queued.set()
+    assert agent.result(timeout=5) == "agent on db"
+    assert database.result(timeout=5) == "db"
+    threads = {row["component"]: row["thread"] for row in startup.timeline()}
+    assert threads["agent"] == threads["database"]
+
+
+def test_more_dependents_than_workers():
+    startup = StartupManager(max_workers=2)
+    queued = threading.Event()
+    startup.register("gate", lambda: queued.wait(5))
+    startup.register("base", lambda: 1)
+    for i in range(6):
+        startup.register(f"c{i}", lambda: startup.get("base") + 1, depends=["base"])
+    futures = startup.warm_up(["gate"] + [f"c{i}" for i in range(6)] + ["base"])
+    queued.set()
+    assert [future.result(timeout=5) for future in futures[1:]] == [2] * 6 + [1]
+
+
+def test_loads_once_and_waits_for_a_running_load():
+    startup = StartupManager(max_workers=1)
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+        return "model"
+
+    startup.register("model", slow)
+    startup.warm_up(["model"])
+    while not calls:
+        time.sleep(0.01)
+    waiter = threading.Thread(target=lambda: calls.append(startup.get("model")))
+    waiter.start()
+    time.sleep(0.1)
+    release.set()
+    waiter.join(5)
+    assert calls[1:] == ["model"]
+    assert len(calls) == 2
+    assert startup.is_ready("model")
+
+
+def test_failed_load_is_reported():
+    startup = StartupManager(max_workers=1)
+
+    def broken():
+        raise RuntimeError("no model server")
+
+    startup.register("llm", broken)
+    startup.warm_up(["llm"])[0].exception(timeout=5)
+    assert startup.timeline()[0]["status"] == "failed"
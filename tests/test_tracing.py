@@ -0,0 +1,47 @@
+import json
+import logging
+
+from core.tracing import Reservoir, Tracer
+
+
+def test_spans_are_flushed_to_the_trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(enabled=True, path=str(path), flush_spans=10)
+    for i in range(25):
+        with tracer.span("step", i=i):
+            pass
+    # Two full batches were written while running; the rest stays in memory until shutdown
+    assert len(path.read_text().splitlines()) == 20
+    assert len(tracer._finished) == 5
+    tracer.shutdown()
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["attributes"]["i"] for span in spans] == list(range(25))
+
+
+def test_samples_are_bounded_but_count_and_max_are_exact():
+    tracer = Tracer(enabled=True, path="", max_samples=100)
+    for value in range(10_000):
+        tracer.observe("latency.ms", value)
+    assert len(tracer._samples["latency.ms"].values) == 100
+    row = tracer.summary()["latency.ms"]
+    assert row["count"] == 10_000
+    assert row["max"] == 9_999
+    # A uniform sample of 0..9999 has its median somewhere in the middle
+    assert 2_000 < row["p50"] < 8_000
+
+
+def test_reservoir_keeps_everything_below_capacity():
+    reservoir = Reservoir(capacity=10)
+    for value in (3.0, 1.0, 2.0):
+        reservoir.add(value)
+    assert reservoir.values == [3.0, 1.0, 2.0]
+    assert (reservoir.count, reservoir.max) == (3, 3.0)
+
+
+def test_profile_stats_go_to_the_log(tmp_path, capsys, caplog):
+    tracer = Tracer(enabled=True, path="", profile_dir=str(tmp_path), profile_turns=1)
+    with caplog.at_level(logging.INFO, logger="core.tracing"), tracer.maybe_profile("turn"):
+        sum(range(1000))
+    assert capsys.readouterr().out == ""
+    assert "cumulative" in caplog.text
+    assert list(tmp_path.glob("turn-*.prof"))
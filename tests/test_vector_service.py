@@ -0,0 +1,162 @@
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from config.numpy_index import NumpyIndex
+from config.vector_service import RemoteBackend, VectorService
+
+TEXTS = {
+    "bio-1": "Mitochondria produce ATP through cellular respiration.",
+    "bio-2": "Chlorophyll absorbs light during photosynthesis in chloroplasts.",
+    "math-1": "Eigenvalues of a matrix are the roots of its characteristic polynomial.",
+}
+
+
+def _documents(ids, source="notes.pdf"):
+    return [Document(page_content=TEXTS.get(i, f"Filler chunk number {i}"), metadata={"source": source}) for i in ids]
+
+
+@pytest.fixture
+def service(tmp_path, embeddings):
+    backend = NumpyIndex(embeddings, str(tmp_path / "index"))
+    service = VectorService(backend, "127.0.0.1", 0, linger=0.2)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    service.shutdown()
+    service.server_close()
+
+
+@pytest.fixture
+def connect(service, embeddings):
+    clients = []
+
+    def connect(**options) -> RemoteBackend:
+        client = RemoteBackend(embeddings, "127.0.0.1", service.server_address[1], **options)
+        clients.append(client)
+        return client
+
+    yield connect
+    for client in clients:
+        client.close()
+
+
+def test_add_search_delete(connect, embeddings):
+    client = connect()
+    client.add_documents(_documents(TEXTS), list(TEXTS))
+    assert client.count() == 3
+    assert sorted(client.ids_for_source("notes.pdf")) == sorted(TEXTS)
+
+    results = client.similarity_search(embeddings.embed_query("how do chloroplasts absorb light"), k=1)
+    assert [(doc.id, doc.metadata["source"]) for doc, _ in results] == [("bio-2", "notes.pdf")]
+    assert 0 < results[0][1] <= 1
+
+    assert client.delete_source("notes.pdf") == 3
+    assert client.count() == 0
+    assert client.similarity_search(embeddings.embed_query("light"), k=1) == []
+
+
+def test_concurrent_writes_are_coalesced(service, connect):
+    clients = [connect(), connect()]
+    requests = 20
+
+    def write(n, client):
+        for i in range(requests):
+            ids = [f"{n}-{i}-{j}" for j in range(5)]
+            client.add_documents(_documents(ids), ids)
+
+    writers = [threading.Thread(target=write, args=(n, client)) for n, client in enumerate(clients)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    stats = service.batcher.stats
+    assert clients[0].count() == 2 * requests * 5
+    assert stats["requests"] == 2 * requests
+    assert stats["documents"] == 2 * requests * 5
+    # Each client waits for its write, so at best the two clients' requests pair up
+    assert stats["batches"] < stats["requests"]
+
+
+def test_revision_invalidates_other_clients(connect):
+    reader, writer = connect(revision_ttl=0.0), connect()
+    before = reader.revision()
+
+    writer.add_documents(_documents(["math-1"]), ["math-1"])
+    assert reader.revision() > before
+
+    seen = reader.revision()
+    writer.delete(["math-1"])
+    assert reader.revision() > seen
+
+
+def test_revision_is_cached_for_its_ttl(service, connect):
+    reader, writer = connect(revision_ttl=60.0), connect()
+    before = reader.revision()
+    writer.add_documents(_documents(["bio-1"]), ["bio-1"])
+    # Within the TTL the reader doesn't ask the service again...
+    assert reader.revision() == before
+    # ...but its own writes and searches bring the revision up to date
+    reader.similarity_search([1.0] * 64, k=1)
+    assert reader.revision() == service.batcher.revision
+
+
+def test_bad_write_only_fails_its_own_request(service, connect, caplog):
+    clients = [connect(), connect(), connect()]
+    backend_add = service.backend.add_documents
+
+    def add_documents(documents, ids, embeddings=None):
+        if "bad" in ids:
+            raise ValueError("rejected")
+        backend_add(documents, ids, embeddings)
+
+    service.backend.add_documents = add_documents
+    errors = {}
+    barrier = threading.Barrier(len(clients))
+
+    def write(name, client):
+        barrier.wait()
+        try:
+            client.add_documents(_documents([name]), [name])
+        except Exception as e:
+            errors[name] = e
+
+    names = ["bio-1", "bad", "math-1"]
+    writers = [threading.Thread(target=write, args=args) for args in zip(names, clients)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert "retrying one by one" in caplog.text
+    assert list(errors) == ["bad"]
+    assert sorted(service.backend.ids_for_source("notes.pdf")) == ["bio-1", "math-1"]
+    assert service.batcher.stats["failed"] == 1
+
+
+def test_database_cache_sees_writes_from_another_process(tmp_path, service, connect, embeddings, monkeypatch):
+    import config.database as database
+    import models.embedding as embedding
+
+    monkeypatch.setattr(embedding, "_build_client", lambda model_type, model_name: embeddings)
+    monkeypatch.setattr(embedding, "_engines", {})
+    monkeypatch.setattr(database, "DB_LOCATION", str(tmp_path / "db"))
+    monkeypatch.setattr(database, "VECTOR_SERVICE_HOST", "127.0.0.1")
+    monkeypatch.setattr(database, "VECTOR_SERVICE_PORT", service.server_address[1])
+
+    db = database.Database()
+    db.backend.revision_ttl = 0.0
+    try:
+        assert db.backend.name == "remote"
+        query = "what do mitochondria produce"
+        assert db.get_content(query) == []
+        assert db.get_content(query) == []
+        assert db.cache_stats()["results"]["hits"] == 1
+
+        # Another client (an ingestion worker) writes; the cached empty result must not be reused
+        connect().add_documents(_documents(["bio-1"]), ["bio-1"])
+        assert [doc.id for doc in db.get_content(query, k=1)] == ["bio-1"]
+    finally:
+        db.backend.close()
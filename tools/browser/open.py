@@ -8,10 +8,11 @@ logger = logging.getLogger(__name__)
 def open_browser(url: str) -> str:
     """Open a URL in the default web browser."""
     try:
+        # Not registered with the process registry: xdg-open hands the URL to the
+        # desktop's browser and exits, so the browser itself can't be tracked or killed
         subprocess.Popen(["xdg-open", url])
         logger.info(f"[TOOL] Opened browser to {url}")
         return f"Opened browser to {url}"
     except Exception as e:
         logger.error(f"[TOOL] open_browser error: {e}")
         return f"Error opening browser: {e}"
-
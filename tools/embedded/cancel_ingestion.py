@@ -0,0 +1,15 @@
+from langchain_core.tools import tool
+import logging
+
+from handlation.pdf_handlation import get_scheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@tool
+def cancel_ingestion(job_id: str) -> str:
+    """Cancel a queued or running PDF embedding job by job id or file path."""
+    if get_scheduler().cancel(job_id):
+        logger.info(f"[TOOL] Cancelled embedding job {job_id}")
+        return f"Embedding job {job_id} cancelled."
+    return f"No queued or running embedding job matches {job_id}"
@@ -1,38 +1,22 @@
 from langchain_core.tools import tool
 import logging
-import subprocess
-import sys
-import os
+
+from handlation.pdf_handlation import get_scheduler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @tool
 def embedded_pdf(pdf_path: str) -> str:
-    """Run PDF embedding in a new terminal window and return PID/log info."""
+    """Queue a PDF for background embedding and return its job id."""
     try:
-        logger.info(f"[TOOL] Launching PDF embedding for {pdf_path} in a new terminal")
-
-        # Build the command to run the worker script in a new terminal
-        python_executable = sys.executable  # current python interpreter
-        worker_script = os.path.abspath("pdf_worker_runner.py")  # we'll create this next
-
-        # Cross-platform terminal launching
-        if sys.platform.startswith("linux") or sys.platform == "darwin":
-            # Linux / macOS: gnome-terminal / xterm
-            cmd = ["gnome-terminal", "--", python_executable, worker_script, pdf_path]
-        elif sys.platform.startswith("win"):
-            # Windows: use start cmd
-            cmd = ["cmd", "/c", "start", "python", worker_script, pdf_path]
-        else:
-            return "Unsupported OS for opening a new terminal."
-
-        # Launch the new terminal
-        process = subprocess.Popen(cmd)
-        logger.info(f"[TOOL] Background process started in new terminal with PID: {process.pid}")
-
-        return f"PDF embedding started in a new terminal (PID: {process.pid})"
+        logger.info(f"[TOOL] Queueing PDF embedding for {pdf_path}")
+        job = get_scheduler().submit(pdf_path)
+        logger.info(f"[TOOL] PDF embedding job {job.id} is {job.status}")
+        return f"PDF embedding job {job.id} is {job.status} for {job.path}"
 
+    except FileNotFoundError:
+        return f"Error: file not found: {pdf_path}"
     except Exception as e:
-        logger.exception(f"[TOOL] Error launching background PDF embedding")
-        return f"Error starting background process: {e}"
+        logger.exception(f"[TOOL] Error queueing PDF embedding")
+        return f"Error starting background embedding: {e}"
@@ -0,0 +1,26 @@
+from langchain_core.tools import tool
+import logging
+
+from handlation.pdf_handlation import get_scheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@tool
+def ingestion_status(job_id: str = "") -> str:
+    """Report progress of PDF embedding jobs. Pass a job id or file path, or nothing for all jobs."""
+    jobs = get_scheduler().status(job_id or None)
+    if not jobs:
+        return f"No embedding job found for {job_id}" if job_id else "No embedding jobs yet."
+    lines = []
+    for job in jobs:
+        line = f"{job['id']} {job['status']}: {job['path']}"
+        if "pages" in job:
+            line += (
+                f" — {job['pages']} pages, {job['chunks']} chunks ({job['added']} new), "
+                f"{job['pages_per_sec']} pages/s"
+            )
+        if "error" in job:
+            line += f" — error: {job['error']}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,168 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import environ
+import httpx
+import pathlib
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+FETCH_TIMEOUT = env.float("FETCH_TIMEOUT", default=8.0)
+FETCH_MAX_CONNECTIONS = env.int("FETCH_MAX_CONNECTIONS", default=8)
+FETCH_PER_HOST = env.int("FETCH_PER_HOST", default=2)
+FETCH_MAX_BYTES = env.int("FETCH_MAX_BYTES", default=2_000_000)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) StudyWithMiku/1.0"
+
+# Elements whose text is never part of the article
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "iframe"}
+# Elements that end a block of text
+_BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "br", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote"}
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[str] = []
+        self._current: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in _BLOCK_TAGS:
+            self._end_block()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in _BLOCK_TAGS:
+            self._end_block()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._current.append(data)
+
+    def _end_block(self):
+        text = _SPACES.sub(" ", "".join(self._current)).strip()
+        self._current = []
+        if text:
+            self.blocks.append(text)
+
+
+def extract_text(html: str, min_block_words: int = 4) -> Tuple[str, str]:
+    """
+    Return (title, main text) of an HTML page.
+    Scripts, navigation, headers and footers are dropped, and so are short
+    blocks such as menu entries and buttons.
+    """
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    parser._end_block()
+    blocks = [b for b in parser.blocks if len(b.split()) >= min_block_words]
+    return _SPACES.sub(" ", parser.title).strip(), "\n\n".join(blocks)
+
+
+class FetchResult:
+    def __init__(self, url: str, status: Optional[int] = None, title: str = "", text: str = "",
+                 error: Optional[str] = None, elapsed: float = 0.0):
+        self.url = url
+        self.status = status
+        self.title = title
+        self.text = text
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.text)
+
+
+class PageFetcher:
+    """
+    Fetches many pages at once over one pooled HTTP client.
+    Requests run on a small thread pool; at most `per_host` of them talk to
+    the same host at a time, every request is bounded by `timeout`, and
+    bodies larger than `max_bytes` are cut off.
+    """
+
+    def __init__(self, max_connections: int = FETCH_MAX_CONNECTIONS, per_host: int = FETCH_PER_HOST,
+                 timeout: float = FETCH_TIMEOUT, max_bytes: int = FETCH_MAX_BYTES):
+        self.per_host = per_host
+        self.max_bytes = max_bytes
+        self.client = httpx.Client(
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="fetch")
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host)
+            return self._host_slots[host]
+
+    def fetch(self, url: str) -> FetchResult:
+        started = time.perf_counter()
+        try:
+            with self._slot(url):
+                with self.client.stream("GET", url) as response:
+                    body = bytearray()
+                    for chunk in response.iter_bytes():
+                        body.extend(chunk)
+                        if len(body) >= self.max_bytes:
+                            del body[self.max_bytes:]
+                            break
+                    status = response.status_code
+                    content_type = response.headers.get("content-type", "")
+                    encoding = response.encoding or "utf-8"
+            if status >= 400:
+                return FetchResult(url, status, error=f"HTTP {status}", elapsed=time.perf_counter() - started)
+            html = bytes(body).decode(encoding, errors="replace")
+            if "html" in content_type or not content_type:
+                title, text = extract_text(html)
+            else:
+                title, text = "", html if content_type.startswith("text/") else ""
+            return FetchResult(url, status, title, text, elapsed=time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"[FETCH] {url} failed: {e}")
+            return FetchResult(url, error=str(e), elapsed=time.perf_counter() - started)
+
+    def fetch_many(self, urls: List[str]) -> List[FetchResult]:
+        """Fetch all `urls` concurrently; results are in the same order."""
+        results = list(self._executor.map(self.fetch, urls))
+        ok = sum(r.ok for r in results)
+        logger.info(f"[FETCH] {ok}/{len(urls)} pages fetched in {max((r.elapsed for r in results), default=0):.2f}s")
+        return results
+
+    def close(self):
+        self.client.close()
+        self._executor.shutdown(wait=False)
+
+
+page_fetcher = PageFetcher()
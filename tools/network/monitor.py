@@ -0,0 +1,78 @@
+import logging
+import socket
+import threading
+import time
+from typing import Optional
+
+import environ
+import pathlib
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+CONNECTIVITY_CHECK_INTERVAL = env.float("CONNECTIVITY_CHECK_INTERVAL", default=30.0)
+
+
+class ConnectivityMonitor:
+    """
+    Keeps an up-to-date internet status in memory.
+    A daemon thread opens a TCP connection to a public DNS server every
+    `interval` seconds, which needs no child process and no raw-socket
+    privileges. `status()` answers from the last probe while it is fresh,
+    and probes inline otherwise.
+    """
+
+    def __init__(self, host: str = "8.8.8.8", port: int = 53, timeout: float = 2.0,
+                 interval: float = CONNECTIVITY_CHECK_INTERVAL):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.interval = interval
+        self.connected: Optional[bool] = None
+        self.checked_at: Optional[float] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def probe(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout):
+                connected = True
+        except OSError:
+            connected = False
+        if connected != self.connected:
+            logger.info(f"[NETWORK] Connectivity changed: {'Connected' if connected else 'Disconnected'}")
+        self.connected, self.checked_at = connected, time.monotonic()
+        return connected
+
+    def status(self, max_age: float = None) -> bool:
+        max_age = self.interval * 2 if max_age is None else max_age
+        if self.checked_at is None or time.monotonic() - self.checked_at > max_age:
+            return self.probe()
+        return self.connected
+
+    def refresh(self):
+        """Forget the last status and probe again now, e.g. after enabling Wi-Fi."""
+        self.checked_at = None
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="connectivity-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+connectivity_monitor = ConnectivityMonitor()
@@ -2,6 +2,8 @@ import subprocess
 import logging
 from langchain_core.tools import tool
 
+from tools.network.monitor import connectivity_monitor
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,8 @@ def enable_wifi() -> str:
     try:
         subprocess.check_call(["nmcli", "radio", "wifi", "on"])
         logger.info("[TOOL] Wi-Fi enabled successfully")
+        # The cached status predates the change
+        connectivity_monitor.refresh()
         return "Wi-Fi enabled successfully. Please wait a moment for connection."
     except FileNotFoundError:
         return "Error: nmcli not found. Cannot manage Wi-Fi."
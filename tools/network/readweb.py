@@ -0,0 +1,40 @@
+from typing import List
+
+from langchain_core.tools import tool
+import logging
+
+from config.session_index import session_index
+from tools.network.fetch import page_fetcher
+from tools.network.searchweb import search_results
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXCERPT_CHARS = 600
+
+
+def read_pages(urls: List[str]) -> str:
+    """Fetch pages concurrently, index their text for this session and summarize what was read."""
+    sections = []
+    for page in page_fetcher.fetch_many(urls):
+        if not page.ok:
+            sections.append(f"URL: {page.url}\n(could not read page: {page.error or 'no text found'})")
+            continue
+        chunks = session_index.add_page(page.url, page.text, title=page.title)
+        excerpt = page.text if len(page.text) <= EXCERPT_CHARS else page.text[:EXCERPT_CHARS].rstrip() + "..."
+        sections.append(f"{page.title or page.url}\nURL: {page.url}\n({chunks} chunks indexed)\n{excerpt}")
+    return "\n\n".join(sections)
+
+
+@tool
+def search_and_read(query: str, max_results: int = 3) -> str:
+    """Search the web and read the top result pages. Their full text is indexed so follow-up questions can use it."""
+    try:
+        urls = [r["href"] for r in search_results(query, max_results) if r.get("href")]
+        if not urls:
+            return f"No web results found for: {query}"
+        logger.info(f"[TOOL] search_and_read fetching {len(urls)} pages for: {query}")
+        return read_pages(urls)
+    except Exception as e:
+        logger.error(f"[TOOL] search_and_read error: {e}")
+        return f"Error reading the web: {e}"
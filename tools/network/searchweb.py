@@ -1,21 +1,40 @@
+from typing import Dict, List
+
 from langchain_core.tools import tool
 import ddgs
 import logging
 
+from core.text import normalize_query
+from tools.network.cache import tool_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def search_results(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    """Raw DuckDuckGo results (title, body, href), cached per normalized query."""
+    key = ("duckduckgo_search", normalize_query(query), max_results)
+    cached = tool_cache.get(key)
+    if cached is not None:
+        logger.info(f"[TOOL] DuckDuckGo search served from cache: {query}")
+        return cached
+    with ddgs.DDGS() as search:
+        results = list(search.text(query, max_results=max_results))
+    if results:
+        tool_cache.put(key, results)
+    return results
+
+
 @tool
 def duckduckgo_search(query: str, max_results: int = 5) -> str:
     """Search the web using DuckDuckGo"""
     try:
         results = []
-        with ddgs.DDGS() as search:
-            for r in search.text(query, max_results=max_results):
-                logger.info(f"Result: {r['title']}\n{r['body']}\nURL: {r['href']}")
-                results.append(
-                    f"{r['title']}\n{r['body']}\nURL: {r['href']}"
-                )
+        for r in search_results(query, max_results):
+            logger.info(f"Result: {r['title']}\n{r['body']}\nURL: {r['href']}")
+            results.append(
+                f"{r['title']}\n{r['body']}\nURL: {r['href']}"
+            )
 
         return "\n\n".join(results)
     except Exception as e:
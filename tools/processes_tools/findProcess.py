@@ -1,19 +1,27 @@
 from langchain_core.tools import tool
-import logging , subprocess
+import logging
+
+from tools.processes_tools.registry import process_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @tool
-def find_process(process_name: str) -> str:
-    """Find a process by name."""
+def find_process(process_name: str, cmdline_pattern: str = "") -> str:
+    """Find a process by name, matching part of the name or a regex like pgrep. Several names can be given separated by commas; cmdline_pattern optionally filters by a regex on the command line."""
     logger.info(f"[TOOL] find_process called with process_name={process_name}")
     try:
-        result = subprocess.run(["pgrep", process_name], stdout=subprocess.PIPE)
-        if result.returncode == 0:
-            return f"Process {process_name} found with PID {result.stdout.decode().strip()}"
-        else:
-            return f"Process {process_name} not found"
+        names = [name.strip() for name in process_name.split(",") if name.strip()]
+        lines = []
+        for name, matches in process_registry.find_many(names).items():
+            if cmdline_pattern:
+                matches = process_registry.find(name=name, pattern=cmdline_pattern)
+            if matches:
+                pids = " ".join(str(p.pid) for p in matches)
+                lines.append(f"Process {name} found with PID {pids}")
+            else:
+                lines.append(f"Process {name} not found")
+        return "\n".join(lines)
     except Exception as e:
         logger.error(f"[TOOL] find_process error for process_name={process_name}: {e}")
         return f"Error finding process {process_name}: {e}"
@@ -1,48 +1,28 @@
-import os
 import signal
 import logging
 from langchain_core.tools import tool
-from langchain_core.messages import SystemMessage
-from core.state import AgentState
+
+from tools.processes_tools.registry import process_registry
 
 logger = logging.getLogger(__name__)
 
 
 @tool
-def kill_process(state: AgentState, process_name: str = "deploy_script") -> AgentState:
-    """Kills a running process managed by the agent."""
-    running_processes = state.get("running_processes", {})
-    pid = running_processes.get(process_name)
-
-    if not pid:
-        state["messages"].append(
-            SystemMessage(
-                content=f"[ERROR] No running process found with name: {process_name}"
-            )
-        )
-        return state
-
+def kill_process(process_name: str) -> str:
+    """Kills a running process managed by the agent, by the name it was started under or its PID."""
     try:
-        os.kill(pid, signal.SIGTERM)
-        logger.info(f"[TOOL] Killed process {process_name} with PID {pid}")
-        state["messages"].append(
-            SystemMessage(
-                content=f"[SUCCESS] Process {process_name} (PID: {pid}) has been terminated."
-            )
-        )
-        del state["running_processes"][process_name]
+        info = process_registry.kill(process_name, signal.SIGTERM)
     except ProcessLookupError:
-        state["messages"].append(
-            SystemMessage(
-                content=f"[WARNING] Process {process_name} (PID: {pid}) was not found. It may have already exited."
-            )
-        )
-        if process_name in state["running_processes"]:
-            del state["running_processes"][process_name]
+        return f"[WARNING] Process {process_name} was not found. It may have already exited."
     except Exception as e:
         logger.error(f"[TOOL] Failed to kill process {process_name}: {e}")
-        state["messages"].append(
-            SystemMessage(content=f"[ERROR] Failed to kill process {process_name}: {e}")
+        return f"[ERROR] Failed to kill process {process_name}: {e}"
+
+    if info is None:
+        running = ", ".join(
+            f"{key} (PID {p.pid}, {p.as_dict()['rss_mb']} MB)" for key, p in process_registry.children().items()
         )
+        return f"[ERROR] No running process found with name: {process_name}. Running: {running or 'none'}"
 
-    return state
+    logger.info(f"[TOOL] Killed process {process_name} with PID {info.pid}")
+    return f"[SUCCESS] Process {process_name} (PID: {info.pid}) has been terminated."
@@ -0,0 +1,317 @@
+import logging
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Union
+
+try:
+    import psutil
+except ImportError:
+    # Only used where there is no /proc; `ps` is the fallback after that
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+PROC = "/proc"
+HAS_PROC = os.path.isdir(PROC)
+
+
+def _sysconf(name: str, default: int) -> int:
+    try:
+        return os.sysconf(name)
+    except (AttributeError, ValueError, OSError):
+        return default
+
+
+CLOCK_TICKS = _sysconf("SC_CLK_TCK", 100)
+PAGE_SIZE = _sysconf("SC_PAGE_SIZE", 4096)
+
+
+class ProcessInfo:
+    """
+    One row of the process table, parsed from /proc/<pid>/stat and cmdline.
+    Without /proc it comes from psutil or `ps`; `start_ticks` is then
+    whatever start time those report, which is only compared for equality.
+    """
+
+    __slots__ = ("pid", "ppid", "name", "cmdline", "state", "rss_bytes", "cpu_seconds", "start_ticks")
+
+    def __init__(self, pid, ppid, name, cmdline, state, rss_bytes, cpu_seconds, start_ticks):
+        self.pid = pid
+        self.ppid = ppid
+        self.name = name
+        self.cmdline = cmdline
+        self.state = state
+        self.rss_bytes = rss_bytes
+        self.cpu_seconds = cpu_seconds
+        self.start_ticks = start_ticks
+
+    def as_dict(self) -> dict:
+        return {
+            "pid": self.pid,
+            "ppid": self.ppid,
+            "name": self.name,
+            "cmdline": self.cmdline,
+            "state": self.state,
+            "rss_mb": round(self.rss_bytes / 1_048_576, 1),
+            "cpu_seconds": round(self.cpu_seconds, 2),
+        }
+
+
+def _read_proc(pid: int) -> Optional[ProcessInfo]:
+    try:
+        with open(f"{PROC}/{pid}/stat", "rb") as f:
+            stat = f.read().decode("utf-8", errors="replace")
+        with open(f"{PROC}/{pid}/cmdline", "rb") as f:
+            cmdline = f.read().replace(b"\0", b" ").decode("utf-8", errors="replace").strip()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    # The command name is in parentheses and may itself contain spaces or parentheses
+    name = stat[stat.index("(") + 1:stat.rindex(")")]
+    fields = stat[stat.rindex(")") + 2:].split()
+    return ProcessInfo(
+        pid=pid,
+        ppid=int(fields[1]),
+        name=name,
+        cmdline=cmdline,
+        state=fields[0],
+        rss_bytes=int(fields[21]) * PAGE_SIZE,
+        cpu_seconds=(int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        start_ticks=int(fields[19]),
+    )
+
+
+def _from_psutil(process) -> Optional[ProcessInfo]:
+    try:
+        with process.oneshot():
+            cpu = process.cpu_times()
+            return ProcessInfo(
+                pid=process.pid,
+                ppid=process.ppid(),
+                name=process.name(),
+                cmdline=" ".join(process.cmdline()),
+                state="Z" if process.status() == psutil.STATUS_ZOMBIE else "S",
+                rss_bytes=process.memory_info().rss,
+                cpu_seconds=cpu.user + cpu.system,
+                start_ticks=process.create_time(),
+            )
+    except (psutil.Error, OSError):
+        return None
+
+
+def _read_ps(pid: int = None) -> List[ProcessInfo]:
+    """Parse `ps` output; CPU time is not reported."""
+    command = ["ps", "-o", "pid=,ppid=,stat=,rss=,lstart=,args="]
+    command += ["-p", str(pid)] if pid is not None else ["-ax"]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    processes = []
+    for line in result.stdout.splitlines():
+        fields = line.split(None, 9)
+        if len(fields) < 9:
+            continue
+        cmdline = fields[9] if len(fields) > 9 else ""
+        processes.append(ProcessInfo(
+            pid=int(fields[0]),
+            ppid=int(fields[1]),
+            name=os.path.basename(cmdline.split()[0]) if cmdline else "",
+            cmdline=cmdline,
+            state=fields[2][:1],
+            rss_bytes=int(fields[3]) * 1024,
+            cpu_seconds=0.0,
+            start_ticks=" ".join(fields[4:9]),
+        ))
+    return processes
+
+
+def read_process(pid: int) -> Optional[ProcessInfo]:
+    """Parse one process, or None if it exited meanwhile."""
+    if HAS_PROC:
+        return _read_proc(pid)
+    if psutil is not None:
+        try:
+            return _from_psutil(psutil.Process(pid))
+        except psutil.Error:
+            return None
+    found = _read_ps(pid)
+    return found[0] if found else None
+
+
+def read_processes() -> List[ProcessInfo]:
+    """The whole process table."""
+    if HAS_PROC:
+        processes = (_read_proc(int(entry)) for entry in os.listdir(PROC) if entry.isdigit())
+    elif psutil is not None:
+        processes = (_from_psutil(process) for process in psutil.process_iter())
+    else:
+        processes = _read_ps()
+    return [info for info in processes if info is not None]
+
+
+_REGEX_CHARS = set("^$*?[](){}|\\")
+
+
+def name_matcher(name: str):
+    """
+    pgrep-style matching on process names, ignoring case: "chrom" finds
+    chromium and "code" finds code-oss. Names with regex syntax ("^code$",
+    "fire.*fox") are searched as regexes; others, like "c++", literally.
+    """
+    if _REGEX_CHARS & set(name):
+        try:
+            return re.compile(name, re.I).search
+        except re.error:
+            pass
+    return re.compile(re.escape(name), re.I).search
+
+
+class ProcessRegistry:
+    """
+    In-memory index of the process table.
+    The whole table is read at most once per `refresh_interval` seconds and
+    indexed by name and parent PID, so lookups between refreshes don't fork
+    `pgrep`; a name lookup only scans the distinct names. Processes the agent starts are
+    registered with `track` under a friendly name, which `kill` and
+    `children` use.
+    """
+
+    def __init__(self, refresh_interval: float = 1.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._processes: Dict[int, ProcessInfo] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_ppid: Dict[int, List[int]] = {}
+        # name -> (pid, start_ticks, Popen or None)
+        self._tracked: Dict[str, tuple] = {}
+
+    # -------------------------
+    # Snapshot
+    # -------------------------
+    def refresh(self):
+        processes = {}
+        by_name = defaultdict(list)
+        by_ppid = defaultdict(list)
+        for info in read_processes():
+            processes[info.pid] = info
+            by_name[info.name.lower()].append(info.pid)
+            if info.cmdline:
+                # Scripts show up as "python"; index the executable and script names too
+                for part in info.cmdline.split()[:2]:
+                    base = os.path.basename(part).lower()
+                    if base and base != info.name.lower():
+                        by_name[base].append(info.pid)
+            by_ppid[info.ppid].append(info.pid)
+        with self._lock:
+            self._processes, self._by_name, self._by_ppid = processes, dict(by_name), dict(by_ppid)
+            self._refreshed_at = time.monotonic()
+
+    def _fresh(self):
+        if time.monotonic() - self._refreshed_at > self.refresh_interval:
+            self.refresh()
+
+    def _named(self, name: str) -> List[int]:
+        """PIDs whose name (or executable/script name) matches `name`; call with the lock held."""
+        exact = self._by_name.get(name.lower(), [])
+        match = name_matcher(name)
+        return list(dict.fromkeys(
+            exact + [pid for key, pids in self._by_name.items() if key != name.lower() and match(key) for pid in pids]
+        ))
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def find(self, name: str = None, pattern: str = None, ppid: int = None) -> List[ProcessInfo]:
+        """Processes matching every given criterion: name (see `name_matcher`), cmdline regex, parent PID."""
+        self._fresh()
+        with self._lock:
+            if name is not None:
+                candidates = self._named(name)
+            elif ppid is not None:
+                candidates = self._by_ppid.get(ppid, [])
+            else:
+                candidates = list(self._processes)
+            regex = re.compile(pattern) if pattern else None
+            return [
+                self._processes[pid]
+                for pid in dict.fromkeys(candidates)
+                if pid in self._processes
+                and (ppid is None or self._processes[pid].ppid == ppid)
+                and (regex is None or regex.search(self._processes[pid].cmdline))
+            ]
+
+    def find_many(self, names: Iterable[str]) -> Dict[str, List[ProcessInfo]]:
+        """Batched name lookup against a single snapshot; names match as in `find`."""
+        self._fresh()
+        with self._lock:
+            return {name: [self._processes[pid] for pid in self._named(name)] for name in names}
+
+    def get(self, pid: int) -> Optional[ProcessInfo]:
+        self._fresh()
+        with self._lock:
+            return self._processes.get(pid)
+
+    # -------------------------
+    # Processes started by the agent
+    # -------------------------
+    def track(self, name: str, process: Union[subprocess.Popen, int]) -> str:
+        """Register a child under `name` (suffixed if already taken); returns the name used."""
+        popen = process if isinstance(process, subprocess.Popen) else None
+        pid = popen.pid if popen else int(process)
+        info = read_process(pid)
+        with self._lock:
+            key, n = name, 2
+            while key in self._tracked:
+                key, n = f"{name}-{n}", n + 1
+            self._tracked[key] = (pid, info.start_ticks if info else None, popen)
+        logger.info(f"[PROCESS] Tracking {key} (PID {pid})")
+        return key
+
+    def _alive(self, pid: int, start_ticks: Optional[int], popen: Optional[subprocess.Popen]) -> Optional[ProcessInfo]:
+        if popen is not None and popen.poll() is not None:
+            return None
+        info = read_process(pid)
+        # A recycled PID belongs to a different process
+        if info is None or info.state == "Z" or (start_ticks is not None and info.start_ticks != start_ticks):
+            return None
+        return info
+
+    def children(self, include_untracked: bool = False) -> Dict[str, ProcessInfo]:
+        """
+        Live tracked processes with current resource usage; exited ones are
+        forgotten. With `include_untracked`, other direct children of the
+        agent (e.g. PDF extraction workers) are listed as "<name>-<pid>".
+        """
+        with self._lock:
+            tracked = dict(self._tracked)
+        alive = {}
+        for key, (pid, start_ticks, popen) in tracked.items():
+            info = self._alive(pid, start_ticks, popen)
+            if info is None:
+                with self._lock:
+                    self._tracked.pop(key, None)
+            else:
+                alive[key] = info
+        if include_untracked:
+            known = {info.pid for info in alive.values()}
+            for info in self.find(ppid=os.getpid()):
+                if info.pid not in known and info.state != "Z":
+                    alive[f"{info.name}-{info.pid}"] = info
+        return alive
+
+    def kill(self, name_or_pid: str, sig: int = signal.SIGTERM) -> Optional[ProcessInfo]:
+        """Signal a tracked process by name or PID; returns it, or None if not tracked/alive."""
+        children = self.children()
+        info = children.get(name_or_pid)
+        if info is None and str(name_or_pid).isdigit():
+            info = next((c for c in children.values() if c.pid == int(name_or_pid)), None)
+        if info is None:
+            return None
+        os.kill(info.pid, sig)
+        return info
+
+
+process_registry = ProcessRegistry()
@@ -1,11 +1,27 @@
 from langchain_core.tools import tool
-import subprocess , logging
+import logging
+
+from tools.system.shell import RUN_COMMAND_TIMEOUT, get_session, run_streaming
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 @tool
-def run_command(command: str) -> str:
-    """Run a shell command and return the output."""
+def run_command(command: str, timeout: float = RUN_COMMAND_TIMEOUT, session: str = "") -> str:
+    """Run a shell command and return the output. Long output is cut to its start and end.
+    Pass a session name to run it in a persistent shell that keeps the working directory and variables between calls."""
+    # The tool node's deadline is sized for RUN_COMMAND_TIMEOUT; a longer timeout would outlive it
+    timeout = min(timeout, RUN_COMMAND_TIMEOUT)
     try:
-        result = subprocess.run(command, shell=True, check=True, text=True, capture_output=True)
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        return f"Error: {e.stderr}"
\ No newline at end of file
+        if session:
+            returncode, output, timed_out = get_session(session).run(command, timeout=timeout)
+        else:
+            returncode, output, timed_out = run_streaming(command, timeout=timeout)
+        if timed_out:
+            return f"Error: command timed out after {timeout}s and was killed. Output so far:\n{output}"
+        if returncode:
+            return f"Error (exit code {returncode}): {output}"
+        return output
+    except Exception as e:
+        logger.error(f"[TOOL] run_command error: {e}")
+        return f"Error: {e}"
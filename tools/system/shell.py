@@ -0,0 +1,257 @@
+import codecs
+import io
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from queue import Empty, Queue
+from typing import Dict, Optional, Tuple
+
+import environ
+import pathlib
+
+from tools.processes_tools.registry import process_registry
+
+logger = logging.getLogger(__name__)
+
+env = environ.Env()
+base_dir = pathlib.Path(__file__).parent.parent.parent
+environ.Env.read_env(base_dir / '.env')
+
+RUN_COMMAND_TIMEOUT = env.float("RUN_COMMAND_TIMEOUT", default=60.0)
+RUN_COMMAND_MAX_BYTES = env.int("RUN_COMMAND_MAX_BYTES", default=16000)
+RUN_COMMAND_MAX_LINES = env.int("RUN_COMMAND_MAX_LINES", default=200)
+
+# Time a process group gets between SIGTERM and SIGKILL
+KILL_GRACE = 2.0
+
+# Output is read in chunks of this many bytes; longer unbroken lines are queued in pieces
+PUMP_CHUNK = 4096
+PUMP_MAX_LINE = 4096
+
+
+class OutputBudget:
+    """
+    Keeps the head and tail of a line stream within a byte and line budget.
+    The first half of the budget is filled from the start of the output and
+    the rest holds the most recent lines; anything in between is counted
+    and dropped as it streams by, so memory stays bounded however much a
+    command prints.
+    """
+
+    def __init__(self, max_bytes: int = RUN_COMMAND_MAX_BYTES, max_lines: int = RUN_COMMAND_MAX_LINES):
+        self.head_bytes, self.head_lines = max_bytes // 2, max_lines // 2
+        self.tail_bytes, self.tail_lines = max_bytes - self.head_bytes, max_lines - self.head_lines
+        self.head = []
+        self._head_size = 0
+        self.tail = deque()
+        self._tail_size = 0
+        self.omitted_lines = 0
+        self.omitted_bytes = 0
+
+    def feed(self, line: str):
+        size = len(line.encode("utf-8", errors="replace"))
+        if not self.tail and len(self.head) < self.head_lines and self._head_size + size <= self.head_bytes:
+            self.head.append(line)
+            self._head_size += size
+            return
+        if size > self.tail_bytes:
+            # A single huge line keeps its end only
+            line = line[-self.tail_bytes:]
+            trimmed = len(line.encode("utf-8", errors="replace"))
+            self.omitted_bytes += size - trimmed
+            size = trimmed
+        self.tail.append(line)
+        self._tail_size += size
+        while self.tail and (len(self.tail) > self.tail_lines or self._tail_size > self.tail_bytes):
+            dropped = self.tail.popleft()
+            dropped_size = len(dropped.encode("utf-8", errors="replace"))
+            self._tail_size -= dropped_size
+            self.omitted_lines += 1
+            self.omitted_bytes += dropped_size
+
+    @property
+    def truncated(self) -> bool:
+        return self.omitted_lines > 0 or self.omitted_bytes > 0
+
+    def render(self) -> str:
+        parts = ["".join(self.head)]
+        if self.truncated:
+            parts.append(f"\n... [{self.omitted_lines} lines, {self.omitted_bytes} bytes omitted] ...\n")
+        parts.append("".join(self.tail))
+        return "".join(parts)
+
+
+def kill_group(process: subprocess.Popen, grace: float = KILL_GRACE):
+    """Terminate a process and everything it spawned, escalating to SIGKILL."""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            process.wait(timeout=grace)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _pump(stream, lines: Queue, chunk_size: int = PUMP_CHUNK, max_line: int = PUMP_MAX_LINE):
+    """
+    Read `stream` in fixed-size chunks and queue it line by line, then None.
+    `read1` returns whatever is available instead of waiting for a newline,
+    so a command that prints megabytes without one is queued in
+    `max_line`-sized pieces rather than held as a single string.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+    partial = ""
+    while True:
+        try:
+            chunk = stream.buffer.read1(chunk_size)
+        except (ValueError, OSError):
+            # Closed under us after the process was killed
+            chunk = b""
+        partial += decoder.decode(chunk, final=not chunk)
+        *complete, partial = partial.split("\n")
+        for line in complete:
+            lines.put(line + "\n")
+        while len(partial) >= max_line:
+            lines.put(partial[:max_line])
+            partial = partial[max_line:]
+        if not chunk:
+            break
+    if partial:
+        lines.put(partial)
+    lines.put(None)
+
+
+def run_streaming(command: str, timeout: float = RUN_COMMAND_TIMEOUT, budget: OutputBudget = None,
+                  cwd: str = None) -> Tuple[Optional[int], str, bool]:
+    """
+    Run a shell command in its own process group, streaming its combined
+    stdout/stderr through `budget`. Returns (exit code, output, timed out);
+    on timeout the whole group is killed and the exit code is None.
+    """
+    budget = budget or OutputBudget()
+    process = subprocess.Popen(
+        command, shell=True, text=True, errors="replace", cwd=cwd,
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    # Tracked while it runs so kill_process can stop it
+    process_registry.track(os.path.basename((command.split() or ["command"])[0]), process)
+
+    lines: Queue = Queue()
+    threading.Thread(target=_pump, args=(process.stdout, lines), daemon=True).start()
+    deadline = time.monotonic() + timeout
+    timed_out = False
+    while True:
+        try:
+            line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        except Empty:
+            timed_out = True
+            logger.warning(f"[SHELL] Command timed out after {timeout}s, killing its process group: {command}")
+            kill_group(process)
+            break
+        if line is None:
+            break
+        budget.feed(line)
+
+    returncode = None if timed_out else process.wait()
+    process.stdout.close()
+    return returncode, budget.render(), timed_out
+
+
+class ShellSession:
+    """
+    A long-lived bash process that runs commands one after another, so
+    `cd`, exported variables and activated environments carry over and
+    each command skips shell startup. Every command is followed by a unique
+    marker line carrying its exit status. A command that times out takes
+    the session down with it; the next command starts a fresh shell.
+    """
+
+    def __init__(self, name: str, cwd: str = None):
+        self.name = name
+        self.cwd = cwd
+        self.process: Optional[subprocess.Popen] = None
+        self._lines: Optional[Queue] = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        self.process = subprocess.Popen(
+            ["bash", "--noprofile", "--norc"], text=True, errors="replace", cwd=self.cwd,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        self._lines = Queue()
+        threading.Thread(target=_pump, args=(self.process.stdout, self._lines), daemon=True).start()
+        process_registry.track(f"shell-{self.name}", self.process)
+        logger.info(f"[SHELL] Started session {self.name} (PID {self.process.pid})")
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, command: str, timeout: float = RUN_COMMAND_TIMEOUT,
+            budget: OutputBudget = None) -> Tuple[Optional[int], str, bool]:
+        budget = budget or OutputBudget()
+        with self._lock:
+            if not self.alive:
+                self._start()
+            marker = f"__SWM_DONE_{uuid.uuid4().hex}__"
+            # The braces make the marker follow the command even if it has no trailing newline
+            self.process.stdin.write(f"{{ {command}\n}} < /dev/null\nprintf '\\n{marker} %s\\n' $?\n")
+            self.process.stdin.flush()
+
+            deadline = time.monotonic() + timeout
+            pending = None  # held back one line: the one before the marker is our added newline
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                except Empty:
+                    logger.warning(f"[SHELL] Session {self.name} timed out after {timeout}s; restarting it")
+                    self.close()
+                    if pending:
+                        budget.feed(pending)
+                    return None, budget.render(), True
+                if line is None:
+                    # The shell itself exited, e.g. the command was `exit`
+                    if pending:
+                        budget.feed(pending)
+                    returncode = self.process.wait()
+                    return returncode, budget.render(), False
+                if line.startswith(marker):
+                    if pending and pending != "\n":
+                        budget.feed(pending.rstrip("\n") + "\n")
+                    return int(line.split()[1]), budget.render(), False
+                if pending is not None:
+                    budget.feed(pending)
+                pending = line
+
+    def close(self):
+        if self.process is not None:
+            kill_group(self.process)
+            self.process = None
+
+
+_sessions: Dict[str, ShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str) -> ShellSession:
+    with _sessions_lock:
+        if name not in _sessions:
+            _sessions[name] = ShellSession(name)
+        return _sessions[name]
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,218 @@
+import logging
+import sys
+import threading
+import time
+from queue import Queue
+from typing import Callable, Optional
+
+import numpy as np
+import noisereduce as nr
+import sounddevice as sd
+import webrtcvad
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class RingBuffer:
+    """Fixed-capacity float32 buffer; writes past capacity overwrite the oldest samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._end = 0  # total samples ever written
+
+    def __len__(self) -> int:
+        return min(self._end, self.capacity)
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n >= self.capacity:
+            self._end += n
+            # Rotate so the oldest kept sample lands at _end % capacity, where last() starts reading
+            self._data[:] = np.roll(samples[-self.capacity:], self._end % self.capacity)
+            return
+        start = self._end % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self._end += n
+
+    def last(self, n: int) -> np.ndarray:
+        """Return a copy of the most recent `n` samples in order."""
+        n = min(n, len(self))
+        start = (self._end - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].copy()
+        return np.concatenate((self._data[start:], self._data[:start + n - self.capacity]))
+
+    def clear(self):
+        self._end = 0
+
+
+class CaptureEngine:
+    """
+    Low-latency utterance capture.
+    Microphone frames go through webrtcvad; the last `pre_roll_ms` of audio
+    is kept in a ring buffer so word onsets are not clipped, and
+    `hangover_ms` of trailing audio is kept after speech stops. The turn
+    ends once silence exceeds an endpoint that adapts to the speaker's own
+    pauses, bounded by [endpoint_min_ms, endpoint_max_ms]. Noise reduction
+    runs block by block on a worker thread while recording, against a noise
+    profile taken from the audio heard before speech started.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        pre_roll_ms: int = 300,
+        hangover_ms: int = 240,
+        endpoint_min_ms: int = 500,
+        endpoint_max_ms: int = 1200,
+        start_timeout: float = 8.0,
+        max_seconds: float = 30.0,
+        block_ms: int = 300,
+        noise_ms: int = 600,
+        vad_mode: int = 3,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.pre_roll_frames = max(1, pre_roll_ms // frame_ms)
+        self.hangover_frames = max(0, hangover_ms // frame_ms)
+        self.endpoint_min_ms = endpoint_min_ms
+        self.endpoint_max_ms = endpoint_max_ms
+        self.start_timeout = start_timeout
+        self.max_samples = int(max_seconds * sample_rate)
+        self.block_samples = int(block_ms * sample_rate / 1000)
+        self.noise_samples = int(noise_ms * sample_rate / 1000)
+
+        self.vad = webrtcvad.Vad(vad_mode)
+        # Scratch buffers reused for every frame's int16 conversion
+        self._scaled = np.empty(self.frame_size, dtype=np.float32)
+        self._pcm = np.empty(self.frame_size, dtype=np.int16)
+
+    # -------------------------
+    # Helpers
+    # -------------------------
+    def is_speech(self, frame: np.ndarray) -> bool:
+        np.clip(frame, -1, 1, out=self._scaled)
+        np.multiply(self._scaled, 32767, out=self._scaled)
+        self._pcm[:] = self._scaled
+        return self.vad.is_speech(self._pcm.tobytes(), self.sample_rate)
+
+    def endpoint_ms(self, pauses) -> float:
+        """Silence needed to end the turn: twice the speaker's typical pause, within bounds."""
+        if not pauses:
+            return self.endpoint_max_ms
+        typical = float(np.median(pauses))
+        return float(np.clip(2.0 * typical, self.endpoint_min_ms, self.endpoint_max_ms))
+
+    # -------------------------
+    # Capture
+    # -------------------------
+    def capture(self, on_audio: Callable[[np.ndarray], None] = None) -> Optional[np.ndarray]:
+        """
+        Record one utterance and return the noise-reduced audio, or None if
+        nobody spoke. `on_audio` receives each cleaned block as soon as it is
+        ready, e.g. to feed an incremental transcriber.
+        """
+        noise = RingBuffer(self.noise_samples)
+        pre_roll = RingBuffer(self.pre_roll_frames * self.frame_size)
+        raw = np.zeros(self.max_samples, dtype=np.float32)
+        clean = np.zeros(self.max_samples, dtype=np.float32)
+        written = 0  # raw samples in the utterance
+        blocks: Queue = Queue()
+
+        state = {"noise_profile": None}
+
+        def reduce_worker():
+            while True:
+                item = blocks.get()
+                if item is _STOP:
+                    return
+                start, stop = item
+                block = raw[start:stop]
+                try:
+                    out = nr.reduce_noise(
+                        y=block, sr=self.sample_rate, y_noise=state["noise_profile"], stationary=True
+                    ).astype(np.float32)
+                except Exception as e:
+                    logger.warning(f"Noise reduction failed for block, keeping raw audio: {e}")
+                    out = block
+                clean[start:stop] = out[: stop - start]
+                if on_audio:
+                    on_audio(clean[start:stop])
+
+        worker = threading.Thread(target=reduce_worker, name="capture-nr", daemon=True)
+        worker.start()
+
+        started = False
+        silent_frames = 0
+        pauses = []
+        submitted = 0
+        start_time = time.perf_counter()
+        logger.info("Recording...")
+
+        with sd.InputStream(
+            channels=1, samplerate=self.sample_rate, dtype="float32",
+            blocksize=self.frame_size, device=None, latency="low"
+        ) as stream:
+            while True:
+                frame, _ = stream.read(self.frame_size)
+                frame = frame.reshape(-1)
+                speaking = self.is_speech(frame)
+
+                if not started:
+                    if speaking:
+                        started = True
+                        state["noise_profile"] = noise.last(self.noise_samples) if len(noise) else None
+                        onset = pre_roll.last(self.pre_roll_frames * self.frame_size)
+                        raw[:len(onset)] = onset
+                        written = len(onset)
+                    else:
+                        noise.write(frame)
+                        pre_roll.write(frame)
+                        if time.perf_counter() - start_time > self.start_timeout:
+                            logger.info("Stopped (no speech).")
+                            break
+                        continue
+
+                n = min(len(frame), self.max_samples - written)
+                raw[written:written + n] = frame[:n]
+                written += n
+
+                if speaking:
+                    if silent_frames:
+                        pauses.append(silent_frames * self.frame_ms)
+                    silent_frames = 0
+                else:
+                    silent_frames += 1
+
+                # Hand finished blocks to the noise-reduction worker as we go
+                while written - submitted >= self.block_samples:
+                    blocks.put((submitted, submitted + self.block_samples))
+                    submitted += self.block_samples
+
+                sys.stdout.write(f"\rVoice captured: {written / self.sample_rate:.1f}s")
+                if silent_frames * self.frame_ms >= self.endpoint_ms(pauses):
+                    logger.info("Stopped (silence).")
+                    break
+                if written >= self.max_samples:
+                    logger.info("Stopped (time limit).")
+                    break
+
+        if not started:
+            blocks.put(_STOP)
+            worker.join()
+            return None
+
+        # Keep only the hangover part of the trailing silence
+        end = written - max(0, silent_frames - self.hangover_frames) * self.frame_size
+        if end > submitted:
+            blocks.put((submitted, end))
+        blocks.put(_STOP)
+        worker.join()
+        return clean[:end].copy()
@@ -1,23 +1,121 @@
 import os
 os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
-import sys , time , webrtcvad , logging
-import sounddevice as sd
+import threading , logging
+from typing import Callable, List, Optional
 import numpy as np
-import noisereduce as nr
-from models.voice import whisper_model
-
-
-from scipy.io.wavfile import write
-from uuid import uuid4
+from core.tracing import tracer
+from models.voice import get_whisper_model
+from voices.capture import CaptureEngine
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-vad = webrtcvad.Vad()
-vad.set_mode(3)
+WHISPER_OPTIONS = {"language": "en", "verbose": None, "temperature": 0.7, "fp16": False}
+
+
+class IncrementalTranscriber:
+    """
+    Transcribes an utterance while it is still being spoken.
+    Audio is appended with `feed`; a worker thread re-transcribes the
+    unconfirmed part of the buffer every `step` seconds and reports partial
+    text. Segments that come out identical in two consecutive passes, and
+    end at least `margin` seconds before the live edge, are confirmed and
+    never transcribed again, so `finish` only has to decode the tail.
+    """
+
+    def __init__(self, model=None, sample_rate: int = 16000, step: float = 1.0, margin: float = 1.0,
+                 on_partial: Callable[[str], None] = None):
+        self.model = model or get_whisper_model()
+        self.sample_rate = sample_rate
+        self.step_samples = int(step * sample_rate)
+        self.margin_samples = int(margin * sample_rate)
+        self.on_partial = on_partial
+
+        self._chunks: List[np.ndarray] = []
+        self._total = 0
+        self._confirmed_text: List[str] = []
+        self._confirmed_samples = 0
+        self._previous: List[tuple] = []
+        self._last_pass_total = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._done = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self.partial = ""
+
+    def start(self):
+        self._worker = threading.Thread(target=self._loop, name="stt-incremental", daemon=True)
+        self._worker.start()
+        return self
+
+    def feed(self, audio: np.ndarray):
+        with self._lock:
+            self._chunks.append(np.asarray(audio, dtype=np.float32).reshape(-1))
+            self._total += len(self._chunks[-1])
+        if self._total - self._last_pass_total >= self.step_samples:
+            self._wake.set()
+
+    def _audio(self) -> np.ndarray:
+        with self._lock:
+            if len(self._chunks) > 1:
+                self._chunks = [np.concatenate(self._chunks)]
+            return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def _decode(self, audio: np.ndarray) -> dict:
+        prompt = " ".join(self._confirmed_text)[-200:] or None
+        return self.model.transcribe(audio, initial_prompt=prompt, **WHISPER_OPTIONS)
+
+    def _loop(self):
+        while not self._done.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._done.is_set():
+                break
+            self._pass()
+
+    def _pass(self):
+        audio = self._audio()
+        self._last_pass_total = len(audio)
+        tail = audio[self._confirmed_samples:]
+        if len(tail) < self.step_samples:
+            return
+        result = self._decode(tail)
+        segments = [
+            (seg["text"].strip(), int(seg["end"] * self.sample_rate))
+            for seg in result.get("segments", [])
+        ]
+
+        # Confirm the stable prefix: same text as last pass and clear of the live edge
+        confirmed = 0
+        for i, (text, end) in enumerate(segments):
+            if i >= len(self._previous) or self._previous[i][0] != text:
+                break
+            if end > len(tail) - self.margin_samples:
+                break
+            confirmed = i + 1
+        if confirmed:
+            self._confirmed_text.extend(text for text, _ in segments[:confirmed] if text)
+            self._confirmed_samples += segments[confirmed - 1][1]
+            segments = [(text, end - segments[confirmed - 1][1]) for text, end in segments[confirmed:]]
+        self._previous = segments
+
+        self.partial = " ".join(self._confirmed_text + [text for text, _ in segments if text])
+        if self.on_partial:
+            self.on_partial(self.partial)
+
+    def finish(self) -> str:
+        """Stop the worker and decode only the audio that was never confirmed."""
+        self._done.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+        tail = self._audio()[self._confirmed_samples:]
+        if len(tail) > 0:
+            self._confirmed_text.append(self._decode(tail)["text"].strip())
+        return " ".join(text for text in self._confirmed_text if text).strip()
 
 class VoiceModule:
     def __init__(self):
@@ -38,62 +136,35 @@ class VoiceModule:
             logger.error(f"An error occurred: {e}")
             return None
 
-    
-    def is_speech(self,frame):
-        pcm = (np.clip(frame, -1, 1) * 32767).astype(np.int16).tobytes()
-        return vad.is_speech(pcm, self.SAMPLE_RATE)
-
-    def record_until_silence(self,silence_limit=5.0, max_seconds=5):
-        logger.info("Recording...")
-
-        frames = []
-        silence_start = None
-        start = time.time()
-
-        collected_duration = 0
-        required_samples = max_seconds * self.SAMPLE_RATE
-        
-        with sd.InputStream(
-            channels=1, samplerate=self.SAMPLE_RATE, dtype="float32",
-            blocksize=self.FRAME_SIZE , device=None , latency="low"
-        ) as stream:
-
-            while True:
-                frame, _ = stream.read(self.FRAME_SIZE)
-                frame = frame.flatten()
-
-                speaking = self.is_speech(frame)
-
-                if speaking:
-                    frames.append(frame)
-                    silence_start = None
-                else:
-                    if silence_start is None:
-                        silence_start = time.time()
-                    else:
-                        if time.time() - silence_start >= silence_limit:
-                            logger.info("Stopped (silence).")
-                            break
-                
-                if time.time() - start > max_seconds:
-                    logger.info("Stopped (time limit).")
-                    break
-                collected_duration += len(frame)
-
-                progress = min(collected_duration / required_samples * 100, 100)
-                sys.stdout.write(f"\rVoice captured: {collected_duration/self.SAMPLE_RATE:.1f}/{max_seconds}s [{int(progress)}%]")
-
-        if len(frames) == 0:
+    def listen_incremental(self, on_partial: Callable[[str], None] = None) -> Optional[str]:
+        """Record and transcribe at the same time, reporting partial transcripts."""
+        try:
+            transcriber = IncrementalTranscriber(sample_rate=self.SAMPLE_RATE, on_partial=on_partial).start()
+            audio = self.record_until_silence(on_speech=transcriber.feed)
+            text = transcriber.finish()
+            if audio is None:
+                logger.info("No voice detected.")
+                return None
+            return text
+        except Exception as e:
+            logger.error(f"An error occurred: {e}")
             return None
 
-        raw = np.concatenate(frames)
-        clean = nr.reduce_noise(y=raw, sr=self.SAMPLE_RATE)
-
-        return clean
     
+    def record_until_silence(self,silence_limit=1.2, max_seconds=30, on_speech: Callable[[np.ndarray], None] = None):
+        """Record one utterance; the turn ends after at most `silence_limit` seconds of silence."""
+        engine = CaptureEngine(
+            sample_rate=self.SAMPLE_RATE,
+            frame_ms=self.FRAME_DURATION,
+            endpoint_max_ms=int(silence_limit * 1000),
+            endpoint_min_ms=min(500, int(silence_limit * 1000)),
+            max_seconds=max_seconds,
+        )
+        return engine.capture(on_audio=on_speech)
+
     def transcribe(self,audio):
-        temp = f"{uuid4()}_temp.wav"
-        write(temp, self.SAMPLE_RATE, (audio * 32767).astype(np.int16))
-        result = whisper_model.transcribe(temp, language="en" , verbose=True ,temperature=0.7)
-        os.remove(temp)
+        # Whisper takes 16 kHz float32 arrays directly; no temp WAV round-trip
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        with tracer.span("stt.transcribe", audio_seconds=round(len(audio) / 16000, 2)):
+            result = get_whisper_model().transcribe(audio, **WHISPER_OPTIONS)
         return result["text"].strip()
\ No newline at end of file